@@ -7,6 +7,7 @@ import argparse
 
 from homeassistant import bootstrap
 import homeassistant.config as config_util
+from homeassistant.util import profiler
 from homeassistant.const import __version__, EVENT_HOMEASSISTANT_START
 
 
@@ -95,6 +96,11 @@ def get_arguments():
         type=int,
         default=None,
         help='Enables daily log rotation and keeps up to the specified days')
+    parser.add_argument(
+        '--profile-startup',
+        metavar='path_to_trace_file',
+        default=None,
+        help='Writes a timeline of the startup in the Chrome trace format')
     parser.add_argument(
         '--install-osx',
         action='store_true',
@@ -204,6 +210,24 @@ def uninstall_osx():
     print("Home Assistant has been uninstalled.")
 
 
+def write_startup_profile(hass, path):
+    """ Waits for the startup to finish and writes the timeline. """
+    hass.pool.block_till_done()
+
+    startup = profiler.stop()
+
+    try:
+        startup.write(path)
+    except OSError as err:
+        print('Unable to write startup timeline to ' + path, err)
+    else:
+        print('Startup timeline written to', path)
+
+    print('Startup time spent per category, excluding nested phases:')
+    for category, seconds in sorted(startup.totals().items()):
+        print('  {}: {:.3f}s'.format(category, seconds))
+
+
 def main():
     """ Starts Home Assistant. """
     validate_python()
@@ -233,6 +257,9 @@ def main():
     if args.pid_file:
         write_pid(args.pid_file)
 
+    if args.profile_startup:
+        profiler.start()
+
     if args.demo_mode:
         config = {
             'frontend': {},
@@ -259,6 +286,10 @@ def main():
         hass.bus.listen_once(EVENT_HOMEASSISTANT_START, open_browser)
 
     hass.start()
+
+    if args.profile_startup:
+        write_startup_profile(hass, args.profile_startup)
+
     hass.block_till_stopped()
 
 if __name__ == "__main__":
@@ -15,20 +15,22 @@ import logging.handlers
 import os
 import shutil
 import sys
+import threading
+import time
 
 import homeassistant.core as core
 import homeassistant.util.dt as date_util
 import homeassistant.util.package as pkg_util
 import homeassistant.util.location as loc_util
+from homeassistant.util import profiler
 import homeassistant.config as config_util
 import homeassistant.loader as loader
 import homeassistant.components as core_components
-import homeassistant.components.group as group
 from homeassistant.helpers.entity import Entity
 from homeassistant.const import (
     __version__, EVENT_COMPONENT_LOADED, CONF_LATITUDE, CONF_LONGITUDE,
     CONF_TEMPERATURE_UNIT, CONF_NAME, CONF_TIME_ZONE, CONF_CUSTOMIZE,
-    TEMP_CELCIUS, TEMP_FAHRENHEIT)
+    CONF_SETUP_WORKERS, TEMP_CELCIUS, TEMP_FAHRENHEIT)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,6 +38,20 @@ ATTR_COMPONENT = 'component'
 
 PLATFORM_FORMAT = '{}.{}'
 ERROR_LOG_FILENAME = 'home-assistant.log'
+REQUIREMENTS_CACHE_FILENAME = '.requirements.json'
+
+# Checked by name so the group component is not imported on startup
+GROUP_DOMAIN = 'group'
+
+# Ensures a component is not set up by two threads at the same time
+_SETUP_LOCKS = defaultdict(threading.Lock)
+_SETUP_LOCKS_LOCK = threading.Lock()
+
+# Requirements caches mapped path => RequirementsCache
+_REQUIREMENTS_CACHES = {}
+
+# Pools shared by the platform setups of parallel startup mapped hass => pool
+_PLATFORM_POOLS = {}
 
 
 def setup_component(hass, domain, config=None):
@@ -67,21 +83,62 @@ def _handle_requirements(hass, component, name):
     if hass.config.skip_pip or not hasattr(component, 'REQUIREMENTS'):
         return True
 
-    for req in component.REQUIREMENTS:
-        if not pkg_util.install_package(req, target=hass.config.path('lib')):
-            _LOGGER.error('Not initializing %s because could not install '
-                          'dependency %s', name, req)
-            return False
+    cache = _requirements_cache(hass)
+
+    with profiler.phase(name, profiler.CATEGORY_REQUIREMENTS):
+        for req in component.REQUIREMENTS:
+            if cache.is_met(req):
+                continue
+
+            if not pkg_util.install_package(
+                    req, target=hass.config.path('lib')):
+                _LOGGER.error('Not initializing %s because could not install '
+                              'dependency %s', name, req)
+                return False
+
+            cache.add(req)
+
+    cache.save()
 
     return True
 
 
+def _requirements_cache(hass):
+    """ Returns the requirements cache for the config dir of hass. """
+    path = hass.config.path(REQUIREMENTS_CACHE_FILENAME)
+
+    with _SETUP_LOCKS_LOCK:
+        cache = _REQUIREMENTS_CACHES.get(path)
+
+        if cache is None:
+            cache = _REQUIREMENTS_CACHES[path] = pkg_util.RequirementsCache(
+                path, hass.config.path('lib'))
+
+    return cache
+
+
 def _setup_component(hass, domain, config):
     """ Setup a component for Home Assistant. """
+    if domain in hass.config.components:
+        return True
+
+    with _SETUP_LOCKS_LOCK:
+        lock = _SETUP_LOCKS[domain]
+
+    with lock:
+        return _setup_component_locked(hass, domain, config)
+
+
+def _setup_component_locked(hass, domain, config):
+    """ Setup a component while holding the setup lock of the domain. """
+    # Another thread might have set it up while we waited for the lock
     if domain in hass.config.components:
         return True
     component = loader.get_component(domain)
 
+    if component is None:
+        return False
+
     missing_deps = [dep for dep in getattr(component, 'DEPENDENCIES', [])
                     if dep not in hass.config.components]
 
@@ -95,7 +152,10 @@ def _setup_component(hass, domain, config):
         return False
 
     try:
-        if not component.setup(hass, config):
+        with profiler.phase(domain, profiler.CATEGORY_SETUP):
+            result = component.setup(hass, config)
+
+        if not result:
             _LOGGER.error('component %s failed to initialize', domain)
             return False
     except Exception:  # pylint: disable=broad-except
@@ -106,7 +166,7 @@ def _setup_component(hass, domain, config):
 
     # Assumption: if a component does not depend on groups
     # it communicates with devices
-    if group.DOMAIN not in getattr(component, 'DEPENDENCIES', []):
+    if GROUP_DOMAIN not in getattr(component, 'DEPENDENCIES', []):
         hass.pool.add_worker()
 
     hass.bus.fire(
@@ -115,6 +175,14 @@ def _setup_component(hass, domain, config):
     return True
 
 
+def platform_setup_pool(hass):
+    """
+    Returns the pool to set up platforms with while components are set up in
+    parallel on startup or None if platforms should be set up one by one.
+    """
+    return _PLATFORM_POOLS.get(hass)
+
+
 def prepare_setup_platform(hass, config, domain, platform_name):
     """ Loads a platform and makes sure dependencies are setup. """
     _ensure_loader_prepared(hass)
@@ -199,13 +267,96 @@ def from_config_dict(config, hass=None, config_dir=None, enable_log=True,
 
     _LOGGER.info('Home Assistant core initialized')
 
+    load_order = loader.load_order_components(components)
+    loader.save_manifest()
+
     # Setup the components
-    for domain in loader.load_order_components(components):
-        _setup_component(hass, domain, config)
+    if hass.config.setup_workers > 1:
+        setup_times = _setup_components_parallel(
+            hass, load_order, config, hass.config.setup_workers)
+
+    else:
+        setup_times = {}
+
+        for domain in load_order:
+            start = time.time()
+            _setup_component(hass, domain, config)
+            setup_times[domain] = time.time() - start
+
+    _LOGGER.info('Component setup times: %s', ', '.join(
+        '{} {:.2f}s'.format(domain, setup_times[domain]) for domain
+        in sorted(setup_times, key=setup_times.get, reverse=True)))
 
     return hass
 
 
+def _setup_components_parallel(hass, load_order, config, workers):
+    """
+    Sets up the components in load order with workers threads. A component
+    is set up as soon as its dependencies have been set up. Components in
+    loader.LOAD_FIRST are set up before all others and components that use
+    the group component after all components that do not. The platforms of
+    all components share one pool of workers threads.
+
+    Returns a dict with the setup time per component.
+    """
+    setup_times = {}
+    uses_group = {domain for domain in load_order
+                  if GROUP_DOMAIN in loader.load_order_component(domain)}
+    stages = (
+        [domain for domain in load_order if domain in loader.LOAD_FIRST],
+        [domain for domain in load_order
+         if domain not in loader.LOAD_FIRST and domain not in uses_group],
+        [domain for domain in load_order
+         if domain not in loader.LOAD_FIRST and domain in uses_group],
+    )
+
+    for domain in stages[0]:
+        start = time.time()
+        _setup_component(hass, domain, config)
+        setup_times[domain] = time.time() - start
+
+    pool = core.create_worker_pool(workers)
+    _PLATFORM_POOLS[hass] = core.create_worker_pool(workers)
+    cond = threading.Condition()
+    finished = set(stages[0])
+
+    def setup(domain):
+        """ Sets up a component and marks it finished. """
+        start = time.time()
+
+        try:
+            _setup_component(hass, domain, config)
+        finally:
+            with cond:
+                setup_times[domain] = time.time() - start
+                finished.add(domain)
+                cond.notify()
+
+    for stage in stages[1:]:
+        pending = {
+            domain: set(getattr(loader.get_component(domain),
+                                'DEPENDENCIES', [])) & set(stage)
+            for domain in stage}
+
+        with cond:
+            while pending:
+                for domain in [domain for domain, deps in pending.items()
+                               if deps <= finished]:
+                    del pending[domain]
+                    pool.add_job(0, (setup, domain))
+
+                if pending:
+                    cond.wait()
+
+        pool.block_till_done()
+
+    pool.stop()
+    _PLATFORM_POOLS.pop(hass).stop()
+
+    return setup_times
+
+
 def from_config_file(config_path, hass=None, verbose=False, daemon=False,
                      skip_pip=True, log_rotate_days=None):
     """
@@ -336,6 +487,13 @@ def process_ha_core_config(hass, config):
 
     set_time_zone(config.get(CONF_TIME_ZONE))
 
+    if CONF_SETUP_WORKERS in config:
+        try:
+            hac.setup_workers = int(config[CONF_SETUP_WORKERS])
+        except ValueError:
+            _LOGGER.error('Received invalid int value for %s: %s',
+                          CONF_SETUP_WORKERS, config[CONF_SETUP_WORKERS])
+
     customize = config.get(CONF_CUSTOMIZE)
 
     if isinstance(customize, dict):
@@ -10,12 +10,14 @@ import re
 import logging
 import threading
 import json
+import time
 
 import homeassistant.core as ha
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.state import TrackStates
 import homeassistant.remote as rem
-from homeassistant.util import template
+import homeassistant.util.dt as date_util
+from homeassistant.util import split_entity_id, template
 from homeassistant.bootstrap import ERROR_LOG_FILENAME
 from homeassistant.const import (
     URL_API, URL_API_STATES, URL_API_EVENTS, URL_API_SERVICES, URL_API_STREAM,
@@ -24,7 +26,7 @@ from homeassistant.const import (
     URL_API_TEMPLATE, EVENT_TIME_CHANGED, EVENT_HOMEASSISTANT_STOP, MATCH_ALL,
     HTTP_OK, HTTP_CREATED, HTTP_BAD_REQUEST, HTTP_NOT_FOUND,
     HTTP_UNPROCESSABLE_ENTITY, HTTP_HEADER_CONTENT_TYPE,
-    CONTENT_TYPE_TEXT_PLAIN)
+    CONTENT_TYPE_TEXT_PLAIN, ATTR_ENTITY_ID, EVENT_STATE_CHANGED)
 
 
 DOMAIN = 'api'
@@ -32,6 +34,9 @@ DEPENDENCIES = ['http']
 
 STREAM_PING_PAYLOAD = "ping"
 STREAM_PING_INTERVAL = 50  # seconds
+# Seconds events are collected before they are written to a stream
+STREAM_FLUSH_INTERVAL = 0.05
+STREAM_STATE_SYNC = "state_sync"
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +48,7 @@ def setup(hass, config):
     hass.http.register_path('GET', URL_API, _handle_get_api)
 
     # /api/stream
+    hass.http.event_stream = EventStream(hass)
     hass.http.register_path('GET', URL_API_STREAM, _handle_get_api_stream)
 
     # /api/config
@@ -54,6 +60,7 @@ def setup(hass, config):
 
     # /states
     hass.http.register_path('GET', URL_API_STATES, _handle_get_api_states)
+    hass.http.register_path('POST', URL_API_STATES, _handle_post_api_states)
     hass.http.register_path(
         'GET', re.compile(r'/api/states/(?P<entity_id>[a-zA-Z\._0-9]+)'),
         _handle_get_api_states_entity)
@@ -66,6 +73,7 @@ def setup(hass, config):
 
     # /events
     hass.http.register_path('GET', URL_API_EVENTS, _handle_get_api_events)
+    hass.http.register_path('POST', URL_API_EVENTS, _handle_post_api_events)
     hass.http.register_path(
         'POST', re.compile(r'/api/events/(?P<event_type>[a-zA-Z\._0-9]+)'),
         _handle_api_post_events_event)
@@ -106,73 +114,52 @@ def _handle_get_api(handler, path_match, data):
 
 
 def _handle_get_api_stream(handler, path_match, data):
-    """ Provide a streaming interface for the event bus. """
-    gracefully_closed = False
+    """ Provide a streaming interface for the event bus.
+
+    If since is given the stream starts with a state_sync message with the
+    states changed after revision since, or all states if since is unknown,
+    and state_changed events only carry the changed attributes. """
     hass = handler.server.hass
-    wfile = handler.wfile
-    write_lock = threading.Lock()
-    block = threading.Event()
+    sessions = handler.server.sessions
     session_id = None
+    since = data.get('since')
 
-    restrict = data.get('restrict')
-    if restrict:
-        restrict = restrict.split(',')
-
-    def write_message(payload):
-        """ Writes a message to the output. """
-        with write_lock:
-            msg = "data: {}\n\n".format(payload)
+    def extend_session():
+        """ Keeps the session alive while events are received. """
+        sessions.extend_validation(session_id)
 
-            try:
-                wfile.write(msg.encode("UTF-8"))
-                wfile.flush()
-            except (IOError, ValueError):
-                # IOError: socket errors
-                # ValueError: raised when 'I/O operation on closed file'
-                block.set()
+    subscriber = EventStreamSubscriber(
+        handler.wfile, _split_param(data.get('restrict')),
+        _split_param(data.get('entity_id')), _split_param(data.get('domain')),
+        extend_session, since is not None)
 
-    def forward_events(event):
-        """ Forwards events to the open request. """
-        nonlocal gracefully_closed
+    def ping():
+        """ Pings the open request to detect if it is still open. """
+        subscriber.write(STREAM_PING_PAYLOAD)
 
-        if block.is_set() or event.event_type == EVENT_TIME_CHANGED:
-            return
-        elif event.event_type == EVENT_HOMEASSISTANT_STOP:
-            gracefully_closed = True
-            block.set()
-            return
+    def close_stream():
+        """ Stops forwarding events to the request. """
+        if not subscriber.gracefully_closed:
+            _LOGGER.info("Found broken event stream to %s, cleaning up",
+                         handler.client_address[0])
 
-        handler.server.sessions.extend_validation(session_id)
-        write_message(json.dumps(event, cls=rem.JSONEncoder))
+        handler.server.event_stream.unsubscribe(subscriber)
 
     handler.send_response(HTTP_OK)
     handler.send_header('Content-type', 'text/event-stream')
     session_id = handler.set_session_cookie_header()
     handler.end_headers()
 
-    if restrict:
-        for event in restrict:
-            hass.bus.listen(event, forward_events)
-    else:
-        hass.bus.listen(MATCH_ALL, forward_events)
-
-    while True:
-        write_message(STREAM_PING_PAYLOAD)
-
-        block.wait(STREAM_PING_INTERVAL)
-
-        if block.is_set():
-            break
+    handler.server.event_stream.subscribe(subscriber)
 
-    if not gracefully_closed:
-        _LOGGER.info("Found broken event stream to %s, cleaning up",
-                     handler.client_address[0])
+    if since is not None:
+        # Events received since subscribing are written after the sync. They
+        # may be included in the sync and can be ignored by their revision.
+        subscriber.write(_compact_json(_state_sync(hass, since, subscriber)),
+                         before_queued=True)
 
-    if restrict:
-        for event in restrict:
-            hass.bus.remove_listener(event, forward_events)
-    else:
-        hass.bus.remove_listener(MATCH_ALL, forward_events)
+    handler.server.hold_event_stream(
+        handler, ping, subscriber.closed, STREAM_PING_INTERVAL, close_stream)
 
 
 def _handle_get_api_config(handler, path_match, data):
@@ -184,17 +171,34 @@ def _handle_get_api_bootstrap(handler, path_match, data):
     """ Returns all data needed to bootstrap Home Assistant. """
     hass = handler.server.hass
 
-    handler.write_json({
-        'config': hass.config.as_dict(),
-        'states': hass.states.all(),
-        'events': _events_json(hass),
-        'services': _services_json(hass),
-    })
+    if handler.pretty_json:
+        handler.write_json({
+            'config': hass.config.as_dict(),
+            'states': hass.states.all(),
+            'events': _events_json(hass),
+            'services': _services_json(hass),
+        })
+        return
+
+    # Assemble the response using the cached JSON of the states
+    handler.write_raw_json(
+        '{{"config":{},"events":{},"services":{},"states":{}}}'.format(
+            _compact_json(hass.config.as_dict()),
+            _compact_json(_events_json(hass)),
+            _compact_json(_services_json(hass)),
+            hass.states.all_as_json()))
 
 
 def _handle_get_api_states(handler, path_match, data):
-    """ Returns a dict containing all entity ids and their state. """
-    handler.write_json(handler.server.hass.states.all())
+    """ Returns a dict containing all entity ids and their state.
+
+    If since is given, returns the states changed after revision since. """
+    if 'since' in data:
+        handler.write_json(_states_since(handler.server.hass, data['since']))
+    elif handler.pretty_json:
+        handler.write_json(handler.server.hass.states.all())
+    else:
+        handler.write_raw_json(handler.server.hass.states.all_as_json())
 
 
 def _handle_get_api_states_entity(handler, path_match, data):
@@ -240,6 +244,32 @@ def _handle_post_state_entity(handler, path_match, data):
         location=URL_API_STATES_ENTITY.format(entity_id))
 
 
+def _handle_post_api_states(handler, path_match, data):
+    """ Handles updating the states of multiple entities.
+
+    Expects a list states of objects with entity_id, state and optionally
+    attributes. Returns the new states. """
+    states = data.get('states')
+
+    if not isinstance(states, list) or not all(
+            isinstance(item, dict) and 'state' in item and
+            ha.ENTITY_ID_PATTERN.match(str(item.get('entity_id')))
+            for item in states):
+        handler.write_json_message(
+            "states should be a list of objects with entity_id and state",
+            HTTP_BAD_REQUEST)
+        return
+
+    hass = handler.server.hass
+
+    for item in states:
+        hass.states.set(item['entity_id'], item['state'],
+                        item.get('attributes'))
+
+    handler.write_json([hass.states.get(item['entity_id'])
+                        for item in states])
+
+
 def _handle_get_api_events(handler, path_match, data):
     """ Handles getting overview of event listeners. """
     handler.write_json(_events_json(handler.server.hass))
@@ -259,20 +289,31 @@ def _handle_api_post_events_event(handler, path_match, event_data):
         handler.write_json_message(
             "event_data should be an object", HTTP_UNPROCESSABLE_ENTITY)
 
-    event_origin = ha.EventOrigin.remote
+    _fire_remote_event(handler.server.hass, event_type, event_data)
 
-    # Special case handling for event STATE_CHANGED
-    # We will try to convert state dicts back to State objects
-    if event_type == ha.EVENT_STATE_CHANGED and event_data:
-        for key in ('old_state', 'new_state'):
-            state = ha.State.from_dict(event_data.get(key))
+    handler.write_json_message("Event {} fired.".format(event_type))
 
-            if state:
-                event_data[key] = state
 
-    handler.server.hass.bus.fire(event_type, event_data, event_origin)
+def _handle_post_api_events(handler, path_match, data):
+    """ Handles firing of multiple events.
 
-    handler.write_json_message("Event {} fired.".format(event_type))
+    Expects a list events of objects with event_type and event_data. """
+    events = data.get('events')
+
+    if not isinstance(events, list) or not all(
+            isinstance(event, dict) and 'event_type' in event and
+            isinstance(event.get('event_data') or {}, dict)
+            for event in events):
+        handler.write_json_message(
+            "events should be a list of objects with an event_type",
+            HTTP_BAD_REQUEST)
+        return
+
+    for event in events:
+        _fire_remote_event(handler.server.hass, event['event_type'],
+                           event.get('event_data'))
+
+    handler.write_json_message("{} events fired.".format(len(events)))
 
 
 def _handle_get_api_services(handler, path_match, data):
@@ -318,6 +359,7 @@ def _handle_post_api_event_forward(handler, path_match, data):
     api = rem.API(host, api_password, port)
 
     if not api.validate_api():
+        api.close()
         handler.write_json_message(
             "Unable to validate API", HTTP_UNPROCESSABLE_ENTITY)
         return
@@ -351,6 +393,7 @@ def _handle_delete_api_event_forward(handler, path_match, data):
         api = rem.API(host, None, port)
 
         handler.server.event_forwarder.disconnect(api)
+        api.close()
 
     handler.write_json_message("Event forwarding cancelled.")
 
@@ -390,6 +433,100 @@ def _handle_post_api_template(handler, path_match, data):
         return
 
 
+def _states_since(hass, since, entity_filter=None):
+    """ Returns the changes of the states after revision since.
+
+    Contains all states and full is True if since is unknown. """
+    try:
+        changes = hass.states.changed_since(int(since))
+    except ValueError:
+        changes = None
+
+    full = changes is None
+
+    if full:
+        changes = hass.states.changed_since(hass.states.first_revision)
+
+    revision, states, removed = changes
+
+    if entity_filter is not None:
+        states = [state for state in states
+                  if entity_filter(state.entity_id)]
+        removed = [entity_id for entity_id in removed
+                   if entity_filter(entity_id)]
+
+    return {
+        'revision': revision,
+        'full': full,
+        'states': states,
+        'removed': removed,
+    }
+
+
+def _state_sync(hass, since, subscriber):
+    """ Returns the state_sync message for a stream resuming at since. """
+    return {
+        'event_type': STREAM_STATE_SYNC,
+        'data': _states_since(hass, since, subscriber.matches_entity_id),
+    }
+
+
+def _state_changed_delta(event):
+    """ Returns a state_changed event with only the changed attributes. """
+    old_state = event.data.get('old_state')
+    new_state = event.data['new_state']
+    old_attributes = old_state.attributes if old_state else {}
+
+    data = {
+        'entity_id': new_state.entity_id,
+        'revision': event.data.get('revision'),
+        'state': new_state.state,
+        'attributes': {
+            key: value for key, value in new_state.attributes.items()
+            if key not in old_attributes or old_attributes[key] != value},
+        'removed_attributes': [
+            key for key in old_attributes
+            if key not in new_state.attributes],
+        'last_changed': date_util.datetime_to_str(new_state.last_changed),
+        'last_updated': date_util.datetime_to_str(new_state.last_updated),
+    }
+
+    return dict(event.as_dict(), data=data)
+
+
+def _fire_remote_event(hass, event_type, event_data):
+    """ Fires an event received from the API as a remote event. """
+    # Special case handling for event STATE_CHANGED
+    # We will try to convert state dicts back to State objects
+    if event_type == ha.EVENT_STATE_CHANGED and event_data:
+        for key in ('old_state', 'new_state'):
+            state = ha.State.from_dict(event_data.get(key))
+
+            if state:
+                event_data[key] = state
+
+    hass.bus.fire(event_type, event_data, ha.EventOrigin.remote)
+
+
+def _split_param(value):
+    """ Splits a comma separated request parameter into a set. """
+    if not value:
+        return None
+
+    return set(value.split(','))
+
+
+def _flush_subscriber(subscriber):
+    """ Writes the queued messages of a stream subscriber. """
+    subscriber.write()
+
+
+def _compact_json(data):
+    """ Serializes data to compact JSON. """
+    return json.dumps(data, sort_keys=True, separators=(',', ':'),
+                      cls=rem.JSONEncoder)
+
+
 def _services_json(hass):
     """ Generate services data to JSONify. """
     return [{"domain": key, "services": value}
@@ -400,3 +537,216 @@ def _events_json(hass):
     """ Generate event data to JSONify. """
     return [{"event": key, "listener_count": value}
             for key, value in hass.bus.listeners.items()]
+
+
+class EventStream(object):
+    """
+    Forwards the events of the bus to the open requests of /api/stream.
+
+    Each event is serialized once and queued on every subscriber it matches.
+    Queued events are written every STREAM_FLUSH_INTERVAL seconds so a burst
+    of events results in a single write per subscriber.
+    """
+
+    def __init__(self, hass, flush_interval=STREAM_FLUSH_INTERVAL):
+        self.hass = hass
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._subscribers = []
+        # Number of subscribers per event type that we listen to
+        self._listening = {}
+        self._dirty = set()
+        self._running = False
+
+        hass.bus.listen_once(EVENT_HOMEASSISTANT_STOP, self._stop)
+
+    def subscribe(self, subscriber):
+        """ Starts forwarding events to subscriber. """
+        with self._cond:
+            self._subscribers.append(subscriber)
+
+            for event_type in subscriber.restrict or (MATCH_ALL,):
+                count = self._listening.get(event_type, 0)
+
+                if count == 0:
+                    self.hass.bus.listen(
+                        event_type, self._listener(event_type))
+
+                self._listening[event_type] = count + 1
+
+            if not self._running:
+                self._running = True
+                threading.Thread(
+                    target=self._flush_loop, name='EventStream',
+                    daemon=True).start()
+
+    def unsubscribe(self, subscriber):
+        """ Stops forwarding events to subscriber. """
+        with self._cond:
+            if subscriber not in self._subscribers:
+                return
+
+            self._subscribers.remove(subscriber)
+            self._dirty.discard(subscriber)
+
+            for event_type in subscriber.restrict or (MATCH_ALL,):
+                self._listening[event_type] -= 1
+
+                if self._listening[event_type] == 0:
+                    del self._listening[event_type]
+                    self.hass.bus.remove_listener(
+                        event_type, self._listener(event_type))
+
+    def _listener(self, event_type):
+        """ Returns the bus listener for event_type. """
+        if event_type == MATCH_ALL:
+            return self._forward_unrestricted
+
+        return self._forward_restricted
+
+    def _forward_unrestricted(self, event):
+        """ Forwards an event to the subscribers without restriction. """
+        self._forward(event, False)
+
+    def _forward_restricted(self, event):
+        """ Forwards an event to the subscribers restricted to its type. """
+        self._forward(event, True)
+
+    def _forward(self, event, restricted):
+        """ Queues event on the matching subscribers. """
+        if event.event_type == EVENT_TIME_CHANGED:
+            return
+
+        with self._cond:
+            subscribers = [
+                subscriber for subscriber in self._subscribers
+                if bool(subscriber.restrict) == restricted and
+                (not restricted or event.event_type in subscriber.restrict) and
+                subscriber.matches(event)]
+
+        if not subscribers:
+            return
+
+        # Serialize the full and the delta form at most once
+        messages = {}
+        has_delta = (event.event_type == EVENT_STATE_CHANGED and
+                     isinstance(event.data.get('new_state'), ha.State))
+
+        for subscriber in subscribers:
+            delta = has_delta and subscriber.delta
+
+            if delta not in messages:
+                messages[delta] = _compact_json(
+                    _state_changed_delta(event) if delta else event)
+
+            subscriber.queue(messages[delta])
+
+        with self._cond:
+            self._dirty.update(subscribers)
+            self._cond.notify()
+
+    def _flush_loop(self):
+        """ Schedules the writes of the subscribers with queued events. """
+        while True:
+            with self._cond:
+                while self._running and not self._dirty:
+                    self._cond.wait()
+
+                if not self._running:
+                    return
+
+            # Collect the rest of the burst
+            time.sleep(self.flush_interval)
+
+            with self._cond:
+                dirty, self._dirty = self._dirty, set()
+
+            for subscriber in dirty:
+                self.hass.pool.add_job(
+                    ha.JobPriority.EVENT_DEFAULT,
+                    (_flush_subscriber, subscriber))
+
+    def _stop(self, event):
+        """ Closes all streams when Home Assistant stops. """
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+            for subscriber in self._subscribers:
+                subscriber.gracefully_closed = True
+                subscriber.closed.set()
+
+
+class EventStreamSubscriber(object):
+    """
+    An open request of /api/stream. Receives all events or only the event
+    types in restrict. If entity_ids or domains are given only events with
+    a matching entity_id in their data are received. on_events is called
+    after events have been written. If delta is True, state_changed events
+    are written with only the changed attributes.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, wfile, restrict=None, entity_ids=None, domains=None,
+                 on_events=None, delta=False):
+        self.wfile = wfile
+        self.restrict = restrict
+        self.entity_ids = entity_ids
+        self.domains = domains
+        self.on_events = on_events
+        self.delta = delta
+        self.closed = threading.Event()
+        self.gracefully_closed = False
+        self._lock = threading.Lock()
+        self._queue = []
+
+    def matches(self, event):
+        """ Return True if event passes the entity filters. """
+        return self.matches_entity_id(event.data.get(ATTR_ENTITY_ID))
+
+    def matches_entity_id(self, entity_id):
+        """ Return True if entity_id passes the entity filters. """
+        if not self.entity_ids and not self.domains:
+            return True
+
+        if not isinstance(entity_id, str):
+            return False
+
+        return ((self.entity_ids is not None and
+                 entity_id in self.entity_ids) or
+                (self.domains is not None and
+                 split_entity_id(entity_id)[0] in self.domains))
+
+    def queue(self, message):
+        """ Queues a message to be written with the next write. """
+        with self._lock:
+            self._queue.append(message)
+
+    def write(self, message=None, before_queued=False):
+        """ Writes the queued messages and message to the output. """
+        with self._lock:
+            messages, self._queue = self._queue, []
+            has_events = bool(messages)
+
+            if message is not None:
+                messages.insert(0 if before_queued else len(messages),
+                                message)
+
+            if not messages or self.closed.is_set():
+                return
+
+            payload = "".join(
+                "data: {}\n\n".format(msg) for msg in messages)
+
+            try:
+                self.wfile.write(payload.encode("UTF-8"))
+                self.wfile.flush()
+            except (IOError, ValueError):
+                # IOError: socket errors
+                # ValueError: raised when 'I/O operation on closed file'
+                self.closed.set()
+                return
+
+        if has_events and self.on_events is not None:
+            self.on_events()
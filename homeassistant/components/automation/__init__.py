@@ -7,11 +7,17 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/automation/
 """
 import logging
+import threading
+from datetime import timedelta
 
 from homeassistant.bootstrap import prepare_setup_platform
 from homeassistant.util import split_entity_id
-from homeassistant.const import ATTR_ENTITY_ID, CONF_PLATFORM
+from homeassistant.const import (
+    ATTR_ENTITY_ID, CONF_PLATFORM, EVENT_TIME_CHANGED)
 from homeassistant.components import logbook
+from homeassistant.helpers.event import (
+    track_point_in_utc_time, track_state_change)
+import homeassistant.util.dt as dt_util
 
 DOMAIN = 'automation'
 
@@ -27,6 +33,13 @@ CONF_ACTION = 'action'
 CONF_TRIGGER = 'trigger'
 CONF_CONDITION_TYPE = 'condition_type'
 
+CONF_FOR = 'for'
+CONF_DEBOUNCE = 'debounce'
+CONF_MAX_RATE = 'max_rate'
+CONF_HOURS = 'hours'
+CONF_MINUTES = 'minutes'
+CONF_SECONDS = 'seconds'
+
 CONDITION_USE_TRIGGER_VALUES = 'use_trigger_values'
 CONDITION_TYPE_AND = 'and'
 CONDITION_TYPE_OR = 'or'
@@ -223,3 +236,133 @@ def _resolve_platform(method, hass, config, platform):
         return None
 
     return platform
+
+
+def get_time_config(config, key):
+    """
+    Returns the timedelta configured under `key`, None if not configured or
+    False if the configuration is invalid.
+
+    The value can be a number of seconds or a dict with hours, minutes and
+    seconds.
+    """
+    value = config.get(key)
+
+    if value is None:
+        return None
+
+    try:
+        if isinstance(value, dict):
+            delta = timedelta(hours=float(value.get(CONF_HOURS, 0)),
+                              minutes=float(value.get(CONF_MINUTES, 0)),
+                              seconds=float(value.get(CONF_SECONDS, 0)))
+        else:
+            delta = timedelta(seconds=float(value))
+    except (TypeError, ValueError):
+        delta = None
+
+    if delta is None or delta <= timedelta():
+        _LOGGER.error("Received invalid value for '%s': %s", key, value)
+        return False
+
+    return delta
+
+
+# pylint: disable=too-many-arguments
+def track_timed_trigger(hass, config, entity_id, action, matches, holds):
+    """
+    Tracks state changes of entity_id and calls action when matches returns
+    True for a transition, honoring the `for`, `debounce` and `max_rate`
+    options in config.
+
+    matches(from_s, to_s) tells if a state transition fires the trigger.
+    holds(trigger_s, to_s) tells if a later state to_s still satisfies the
+    trigger that was fired with state trigger_s.
+
+    With `for` the action is called once the triggering state persisted for
+    the given time. With `debounce` the delay restarts on every update of the
+    entity. Any state change that does not hold cancels the pending action.
+    With `max_rate` the action is called at most once per given time.
+
+    Returns False if the configuration is invalid.
+    """
+    wait_for = get_time_config(config, CONF_FOR)
+    debounce = get_time_config(config, CONF_DEBOUNCE)
+    max_rate = get_time_config(config, CONF_MAX_RATE)
+
+    if False in (wait_for, debounce, max_rate):
+        return False
+
+    if wait_for is not None and debounce is not None:
+        _LOGGER.error("Only one of %s or %s can be specified",
+                      CONF_FOR, CONF_DEBOUNCE)
+        return False
+
+    delay = wait_for or debounce
+    lock = threading.Lock()
+    # Pending holds the state that triggered and the time listener
+    pending = {}
+    last_fired = [None]
+
+    def fire():
+        """ Calls the action unless limited by max_rate. """
+        now = dt_util.utcnow()
+
+        with lock:
+            if max_rate is not None and last_fired[0] is not None and \
+               now - last_fired[0] < max_rate:
+                _LOGGER.debug("Rate limited trigger for %s", entity_id)
+                return
+
+            last_fired[0] = now
+
+        action()
+
+    def cancel():
+        """ Cancels the pending action. Needs to be called with lock. """
+        if pending:
+            hass.bus.remove_listener(EVENT_TIME_CHANGED, pending['listener'])
+            pending.clear()
+
+    def schedule(trigger_s):
+        """ Schedules the action. Needs to be called with lock. """
+        def delay_listener(now):
+            """ Fires the action if this is still the pending trigger. """
+            with lock:
+                if pending.get('listener') is not listener:
+                    return
+                pending.clear()
+
+            fire()
+
+        listener = track_point_in_utc_time(
+            hass, delay_listener, dt_util.utcnow() + delay)
+        pending['state'] = trigger_s
+        pending['listener'] = listener
+
+    # pylint: disable=unused-argument
+    def timed_state_listener(entity, from_s, to_s):
+        """ Listens for state changes and calls or schedules action. """
+        if delay is None:
+            if matches(from_s, to_s):
+                fire()
+            return
+
+        with lock:
+            if pending:
+                trigger_s = pending['state']
+
+                if holds(trigger_s, to_s):
+                    if debounce is not None:
+                        cancel()
+                        schedule(trigger_s)
+                    return
+
+                cancel()
+
+            if matches(from_s, to_s):
+                schedule(to_s)
+
+    track_state_change(hass, entity_id, timed_state_listener)
+
+    return True
@@ -8,8 +8,8 @@ at https://home-assistant.io/components/automation/#numeric-state-trigger
 """
 import logging
 
+from homeassistant.components.automation import track_timed_trigger
 from homeassistant.const import CONF_VALUE_TEMPLATE
-from homeassistant.helpers.event import track_state_change
 from homeassistant.util import template
 
 
@@ -45,19 +45,18 @@ def trigger(hass, config, action):
     else:
         renderer = lambda value: value.state
 
-    # pylint: disable=unused-argument
-    def state_automation_listener(entity, from_s, to_s):
-        """ Listens for state changes and calls action. """
-
-        # Fire action if we go from outside range into range
-        if _in_range(above, below, renderer(to_s)) and \
-           (from_s is None or not _in_range(above, below, renderer(from_s))):
-            action()
+    def state_matches(from_s, to_s):
+        """ Test if the state change goes from outside range into range. """
+        return _in_range(above, below, renderer(to_s)) and \
+            (from_s is None or not _in_range(above, below, renderer(from_s)))
 
-    track_state_change(
-        hass, entity_id, state_automation_listener)
+    # pylint: disable=unused-argument
+    def state_holds(trigger_s, to_s):
+        """ Test if the state is still within range. """
+        return _in_range(above, below, renderer(to_s))
 
-    return True
+    return track_timed_trigger(
+        hass, config, entity_id, action, state_matches, state_holds)
 
 
 def if_action(hass, config):
@@ -8,8 +8,9 @@ at https://home-assistant.io/components/automation/#state-trigger
 """
 import logging
 
-from homeassistant.helpers.event import track_state_change
+from homeassistant.components.automation import track_timed_trigger
 from homeassistant.const import MATCH_ALL
+from homeassistant.helpers.event import matcher, process_match_param
 
 
 CONF_ENTITY_ID = "entity_id"
@@ -35,14 +36,20 @@ def trigger(hass, config, action):
             'Config error. Surround to/from values with quotes.')
         return False
 
-    def state_automation_listener(entity, from_s, to_s):
-        """ Listens for state changes and calls action. """
-        action()
+    from_state = process_match_param(from_state)
+    to_state = process_match_param(to_state)
 
-    track_state_change(
-        hass, entity_id, state_automation_listener, from_state, to_state)
+    def state_matches(from_s, to_s):
+        """ Test if a state change matches the from and to filters. """
+        return (matcher(from_s and from_s.state, from_state) and
+                matcher(to_s and to_s.state, to_state))
 
-    return True
+    def state_holds(trigger_s, to_s):
+        """ Test if the triggering state is still the current state. """
+        return to_s is not None and to_s.state == trigger_s.state
+
+    return track_timed_trigger(
+        hass, config, entity_id, action, state_matches, state_holds)
 
 
 def if_action(hass, config):
@@ -10,12 +10,14 @@ https://home-assistant.io/components/device_tracker/
 # pylint: disable=too-many-locals
 import csv
 from datetime import timedelta
+import heapq
 import logging
 import os
 import threading
 
 from homeassistant.bootstrap import prepare_setup_platform
 from homeassistant.components import discovery, group, zone
+from homeassistant.core import JobPriority
 from homeassistant.config import load_yaml_config_file
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_per_platform
@@ -23,10 +25,11 @@ from homeassistant.helpers.entity import Entity
 import homeassistant.util as util
 import homeassistant.util.dt as dt_util
 
-from homeassistant.helpers.event import track_utc_time_change
+from homeassistant.helpers.event import (
+    track_point_in_utc_time, track_utc_time_change)
 from homeassistant.const import (
     ATTR_ENTITY_PICTURE, ATTR_GPS_ACCURACY, ATTR_LATITUDE, ATTR_LONGITUDE,
-    DEVICE_DEFAULT_NAME, STATE_HOME, STATE_NOT_HOME)
+    DEVICE_DEFAULT_NAME, EVENT_TIME_CHANGED, STATE_HOME, STATE_NOT_HOME)
 
 DOMAIN = "device_tracker"
 DEPENDENCIES = ['zone']
@@ -127,7 +130,8 @@ def setup(hass, config):
                     _LOGGER.error('Error setting up platform %s', p_type)
                     return
 
-                setup_scanner_platform(hass, p_config, scanner, tracker.see)
+                _setup_scanner_platform(hass, p_config, scanner,
+                                        tracker.see_many)
                 return
 
             if not platform.setup_scanner(hass, p_config, tracker.see):
@@ -146,11 +150,6 @@ def setup(hass, config):
     discovery.listen(hass, DISCOVERY_PLATFORMS.keys(),
                      device_tracker_discovered)
 
-    def update_stale(now):
-        """ Clean up stale devices. """
-        tracker.update_stale(now)
-    track_utc_time_change(hass, update_stale, second=range(0, 60, 5))
-
     tracker.setup_group()
 
     def see_service(call):
@@ -179,6 +178,19 @@ class DeviceTracker(object):
         self.home_range = home_range
         self.lock = threading.Lock()
 
+        # Heap of (expiry time, device id) of devices that are home till
+        # they are not seen for consider_home.
+        self._expiries = []
+        self._expiring = set()
+        self._expiry_listener = None
+        self._next_expiry = None
+
+        # New devices that still have to be written to the config file
+        self._unsaved = []
+        self._unsaved_lock = threading.Lock()
+        # Held while writing so appends to the config file do not interleave
+        self._write_lock = threading.Lock()
+
         for device in devices:
             if device.track:
                 device.update_ha_state()
@@ -188,42 +200,137 @@ class DeviceTracker(object):
     def see(self, mac=None, dev_id=None, host_name=None, location_name=None,
             gps=None, gps_accuracy=None, battery=None):
         """ Notify device tracker that you see a device. """
+        if mac is None and dev_id is None:
+            raise HomeAssistantError('Neither mac or device id passed in')
+
+        self.see_many([{
+            ATTR_MAC: mac, ATTR_DEV_ID: dev_id, ATTR_HOST_NAME: host_name,
+            ATTR_LOCATION_NAME: location_name, ATTR_GPS: gps,
+            ATTR_GPS_ACCURACY: gps_accuracy, ATTR_BATTERY: battery}])
+
+    def see_many(self, seen):
+        """
+        Notify device tracker that you see devices, for example all devices
+        of a scan. seen is a list of dicts with the arguments of see.
+        Entries without mac or device id are skipped.
+        """
+        new_devices = []
+
         with self.lock:
-            if mac is None and dev_id is None:
-                raise HomeAssistantError('Neither mac or device id passed in')
-            elif mac is not None:
-                mac = mac.upper()
-                device = self.mac_to_dev.get(mac)
-                if not device:
-                    dev_id = util.slugify(host_name or '') or util.slugify(mac)
-            else:
-                dev_id = str(dev_id).lower()
-                device = self.devices.get(dev_id)
-
-            if device:
-                device.seen(host_name, location_name, gps, gps_accuracy,
-                            battery)
-                if device.track:
-                    device.update_ha_state()
-                return
+            for kwargs in seen:
+                if kwargs.get(ATTR_MAC) is None and \
+                   kwargs.get(ATTR_DEV_ID) is None:
+                    _LOGGER.error('Neither mac or device id passed in: %s',
+                                  kwargs)
+                    continue
 
-            # If no device can be found, create it
-            device = Device(
-                self.hass, self.consider_home, self.home_range, self.track_new,
-                dev_id, mac, (host_name or dev_id).replace('_', ' '))
-            self.devices[dev_id] = device
-            if mac is not None:
-                self.mac_to_dev[mac] = device
+                device = self._see(**kwargs)
 
-            device.seen(host_name, location_name, gps, gps_accuracy, battery)
-            if device.track:
-                device.update_ha_state()
+                if device is not None:
+                    new_devices.append(device)
+
+            if not new_devices:
+                return
 
             # During init, we ignore the group
             if self.group is not None:
                 self.group.update_tracked_entity_ids(
-                    list(self.group.tracking) + [device.entity_id])
-            update_config(self.hass.config.path(YAML_DEVICES), dev_id, device)
+                    list(self.group.tracking) +
+                    [device.entity_id for device in new_devices])
+
+        self._save_devices(new_devices)
+
+    def _see(self, mac=None, dev_id=None, host_name=None, location_name=None,
+             gps=None, gps_accuracy=None, battery=None):
+        """ Updates a seen device. Returns the device if it is new. """
+        if mac is not None:
+            mac = mac.upper()
+            device = self.mac_to_dev.get(mac)
+            if not device:
+                dev_id = util.slugify(host_name or '') or util.slugify(mac)
+        else:
+            dev_id = str(dev_id).lower()
+            device = self.devices.get(dev_id)
+
+        if device:
+            old_state = device.written_state()
+
+            device.seen(host_name, location_name, gps, gps_accuracy, battery)
+
+            # Seeing a device at home again usually changes nothing
+            if device.track and device.written_state() != old_state:
+                device.update_ha_state()
+            self._track_expiry(device)
+            return None
+
+        # If no device can be found, create it
+        device = Device(
+            self.hass, self.consider_home, self.home_range, self.track_new,
+            dev_id, mac, (host_name or dev_id).replace('_', ' '))
+        self.devices[dev_id] = device
+        if mac is not None:
+            self.mac_to_dev[mac] = device
+
+        device.seen(host_name, location_name, gps, gps_accuracy, battery)
+        if device.track:
+            device.update_ha_state()
+        self._track_expiry(device)
+
+        return device
+
+    def _track_expiry(self, device):
+        """ Plans to update a device that is home when it goes stale. """
+        if not device.track or not device.last_update_home or \
+           device.dev_id in self._expiring:
+            return
+
+        self._expiring.add(device.dev_id)
+        heapq.heappush(self._expiries, (
+            device.last_seen + device.consider_home, device.dev_id))
+        self._plan_expiry()
+
+    def _plan_expiry(self):
+        """ Makes sure update_stale runs when the next device expires. """
+        if not self._expiries:
+            return
+
+        expiry = self._expiries[0][0]
+
+        if self._next_expiry is not None:
+            if self._next_expiry <= expiry:
+                return
+
+            self.hass.bus.remove_listener(
+                EVENT_TIME_CHANGED, self._expiry_listener)
+
+        self._next_expiry = expiry
+        self._expiry_listener = track_point_in_utc_time(
+            self.hass, self.update_stale, expiry)
+
+    def _save_devices(self, devices):
+        """ Adds new devices to the config file in the background. """
+        with self._unsaved_lock:
+            write_scheduled = bool(self._unsaved)
+            self._unsaved.extend(devices)
+
+        if not write_scheduled:
+            self.hass.pool.add_job(
+                JobPriority.EVENT_DEFAULT, (self._write_devices, None))
+
+    def _write_devices(self, _):
+        """ Writes the new devices that were seen till now in one go. """
+        with self._write_lock:
+            with self._unsaved_lock:
+                devices, self._unsaved = self._unsaved, []
+
+            if not devices:
+                return
+
+            try:
+                append_config(self.hass.config.path(YAML_DEVICES), devices)
+            except OSError:
+                _LOGGER.exception('Error saving new devices to %s',
+                                  YAML_DEVICES)
 
     def setup_group(self):
         """ Initializes group for all tracked devices. """
@@ -233,13 +340,30 @@ class DeviceTracker(object):
             self.hass, GROUP_NAME_ALL_DEVICES, entity_ids, False)
 
     def update_stale(self, now):
-        """ Update stale devices. """
+        """ Update devices that expired by now. """
         with self.lock:
-            for device in self.devices.values():
-                if (device.track and device.last_update_home and
-                        device.stale(now)):
+            # Update might be called by a listener that has been replaced
+            self.hass.bus.remove_listener(
+                EVENT_TIME_CHANGED, self._expiry_listener)
+            self._next_expiry = None
+
+            while self._expiries and self._expiries[0][0] < now:
+                _, dev_id = heapq.heappop(self._expiries)
+                device = self.devices[dev_id]
+
+                # Device has been seen again since it was added
+                if not device.stale(now):
+                    heapq.heappush(self._expiries, (
+                        device.last_seen + device.consider_home, dev_id))
+                    continue
+
+                self._expiring.remove(dev_id)
+
+                if device.track and device.last_update_home:
                     device.update_ha_state(True)
 
+            self._plan_expiry()
+
 
 class Device(Entity):
     """ Tracked device. """
@@ -320,6 +444,11 @@ class Device(Entity):
         """ If device should be hidden. """
         return self.away_hide and self.state != STATE_HOME
 
+    def written_state(self):
+        """ Returns the values that update_ha_state writes. """
+        return (self.state, self.state_attributes, self.name, self.icon,
+                self.unit_of_measurement, self.hidden)
+
     def seen(self, host_name=None, location_name=None, gps=None,
              gps_accuracy=0, battery=None):
         """ Mark the device as seen. """
@@ -387,16 +516,28 @@ def load_config(path, hass, consider_home, home_range):
     """ Load devices from YAML config file. """
     if not os.path.isfile(path):
         return []
+    devices = load_yaml_config_file(path, cache=True)
     return [
         Device(hass, consider_home, home_range, device.get('track', False),
                str(dev_id).lower(), str(device.get('mac')).upper(),
                device.get('name'), device.get('picture'),
                device.get(CONF_AWAY_HIDE, DEFAULT_AWAY_HIDE))
-        for dev_id, device in load_yaml_config_file(path).items()]
+        for dev_id, device in devices.items()]
 
 
 def setup_scanner_platform(hass, config, scanner, see_device):
     """ Helper method to connect scanner-based platform to device tracker. """
+    def see_devices(devices):
+        """ Tells about the devices of a scan one by one. """
+        for kwargs in devices:
+            see_device(**kwargs)
+
+    _setup_scanner_platform(hass, config, scanner, see_devices)
+
+
+def _setup_scanner_platform(hass, config, scanner, see_devices):
+    """ Connects a scanner-based platform to a device tracker.
+        see_devices is called with the devices of each scan. """
     interval = util.convert(config.get(CONF_SCAN_INTERVAL), int,
                             DEFAULT_SCAN_INTERVAL)
 
@@ -405,13 +546,17 @@ def setup_scanner_platform(hass, config, scanner, see_device):
 
     def device_tracker_scan(now):
         """ Called when interval matches. """
+        devices = []
+
         for mac in scanner.scan_devices():
             if mac in seen:
                 host_name = None
             else:
                 host_name = scanner.get_device_name(mac)
                 seen.add(mac)
-            see_device(mac=mac, host_name=host_name)
+            devices.append({ATTR_MAC: mac, ATTR_HOST_NAME: host_name})
+
+        see_devices(devices)
 
     track_utc_time_change(hass, device_tracker_scan, second=range(0, 60,
                                                                   interval))
@@ -421,13 +566,24 @@ def setup_scanner_platform(hass, config, scanner, see_device):
 
 def update_config(path, dev_id, device):
     """ Add device to YAML config file. """
-    with open(path, 'a') as out:
-        out.write('\n')
-        out.write('{}:\n'.format(device.dev_id))
+    append_config(path, [device])
+
+
+def append_config(path, devices):
+    """ Add devices to YAML config file with a single write. """
+    lines = []
+
+    for device in devices:
+        lines.append('\n')
+        lines.append('{}:\n'.format(device.dev_id))
 
         for key, value in (('name', device.name), ('mac', device.mac),
                            ('picture', device.config_picture),
                            ('track', 'yes' if device.track else 'no'),
                            (CONF_AWAY_HIDE,
                             'yes' if device.away_hide else 'no')):
-            out.write('  {}: {}\n'.format(key, '' if value is None else value))
+            lines.append(
+                '  {}: {}\n'.format(key, '' if value is None else value))
+
+    with open(path, 'a') as out:
+        out.write(''.join(lines))
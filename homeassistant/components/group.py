@@ -6,11 +6,13 @@ Provides functionality to group devices that can be turned on or off.
 For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/group/
 """
+import threading
+import weakref
+
 import homeassistant.core as ha
 from homeassistant.helpers import generate_entity_id
 from homeassistant.helpers.event import track_state_change
 from homeassistant.helpers.entity import Entity
-import homeassistant.util as util
 from homeassistant.const import (
     ATTR_ENTITY_ID, STATE_ON, STATE_OFF,
     STATE_HOME, STATE_NOT_HOME, STATE_OPEN, STATE_CLOSED,
@@ -20,8 +22,13 @@ DOMAIN = "group"
 
 ENTITY_ID_FORMAT = DOMAIN + ".{}"
 
+ENTITY_ID_PREFIX = DOMAIN + "."
+
 ATTR_AUTO = "auto"
 
+# Cached group expansions per Home Assistant instance
+_EXPANSIONS = weakref.WeakKeyDictionary()
+
 # List of ON/OFF state tuples for groupable states
 _GROUP_TYPES = [(STATE_ON, STATE_OFF), (STATE_HOME, STATE_NOT_HOME),
                 (STATE_OPEN, STATE_CLOSED)]
@@ -52,7 +59,9 @@ def is_on(hass, entity_id):
 def expand_entity_ids(hass, entity_ids):
     """ Returns the given list of entity ids and expands group ids into
         the entity ids it represents if found. """
+    # Ordered set of the found ids
     found_ids = []
+    found = set()
 
     for entity_id in entity_ids:
         if not isinstance(entity_id, str):
@@ -60,25 +69,94 @@ def expand_entity_ids(hass, entity_ids):
 
         entity_id = entity_id.lower()
 
-        try:
-            # If entity_id points at a group, expand it
-            domain, _ = util.split_entity_id(entity_id)
+        # If entity_id points at a group, expand it
+        if not entity_id.startswith(ENTITY_ID_PREFIX):
+            new_ids = (entity_id,)
+        elif found:
+            new_ids = _expand_group(hass, entity_id)
+        else:
+            # Expansions contain no duplicates
+            new_ids = _expand_group(hass, entity_id)
+            found_ids.extend(new_ids)
+            found.update(new_ids)
+            continue
 
-            if domain == DOMAIN:
-                found_ids.extend(
-                    ent_id for ent_id
-                    in get_entity_ids(hass, entity_id)
-                    if ent_id not in found_ids)
+        for ent_id in new_ids:
+            if ent_id not in found:
+                found.add(ent_id)
+                found_ids.append(ent_id)
 
-            else:
-                if entity_id not in found_ids:
-                    found_ids.append(entity_id)
+    return found_ids
 
-        except AttributeError:
-            # Raised by util.split_entity_id if entity_id is not a string
-            pass
 
-    return found_ids
+def _group_members(hass, entity_id):
+    """ Returns the entity ids attribute of a group or None. """
+    state = hass.states.get(entity_id)
+
+    if state is None:
+        return None
+
+    return state.attributes.get(ATTR_ENTITY_ID)
+
+
+def _expand_group(hass, entity_id):
+    """
+    Returns the entity ids of a group with nested groups expanded.
+    Expansions are cached per Home Assistant instance. A cached expansion
+    stays valid until the members of one of the groups it used change.
+    """
+    cache = _EXPANSIONS.setdefault(hass, {})
+    cached = cache.get(entity_id)
+
+    if cached is not None and _members_unchanged(hass, cached[0]):
+        return cached[1]
+
+    used = []
+    expanded = []
+    found = set()
+    _expand_group_into(hass, entity_id, used, expanded, found)
+
+    cache[entity_id] = (tuple(used), tuple(expanded))
+
+    return cache[entity_id][1]
+
+
+def _members_unchanged(hass, used):
+    """ Returns if the members of the used groups are still the same. """
+    for group_id, members in used:
+        current = _group_members(hass, group_id)
+
+        # The state machine keeps the attribute values that are set, so
+        # unchanged members are usually the very same object.
+        if current is not members and current != members:
+            return False
+
+    return True
+
+
+def _expand_group_into(hass, entity_id, used, expanded, found):
+    """
+    Expands a group recursively into expanded. Nested groups that do not
+    exist expand to nothing, like groups that are expanded directly.
+    """
+    members = _group_members(hass, entity_id)
+    used.append((entity_id, members))
+    found.add(entity_id)
+
+    for ent_id in members or ():
+        if not isinstance(ent_id, str):
+            continue
+
+        ent_id = ent_id.lower()
+
+        if ent_id in found:
+            continue
+
+        if ent_id.startswith(ENTITY_ID_PREFIX):
+            _expand_group_into(hass, ent_id, used, expanded, found)
+        else:
+            found.add(ent_id)
+            expanded.append(ent_id)
 
 
 def get_entity_ids(hass, entity_id, domain_filter=None):
@@ -126,6 +204,9 @@ class Group(Entity):
         self.tracking = []
         self.group_on = None
         self.group_off = None
+        # Tracked entity ids that are in the ON-state of the group
+        self._on = set()
+        self._lock = threading.Lock()
 
         if entity_ids is not None:
             self.update_tracked_entity_ids(entity_ids)
@@ -175,51 +256,50 @@ class Group(Entity):
 
     def update(self):
         """ Query all the tracked states and determine current group state. """
-        self._state = STATE_UNKNOWN
+        with self._lock:
+            self._on.clear()
+
+            for entity_id in self.tracking:
+                state = self.hass.states.get(entity_id)
 
-        for entity_id in self.tracking:
-            state = self.hass.states.get(entity_id)
+                if state is not None:
+                    self._process_tracked_state(state)
 
-            if state is not None:
-                self._process_tracked_state(state)
+            self._update_group_state()
 
     def _state_changed_listener(self, entity_id, old_state, new_state):
         """ Listener to receive state changes of tracked entities. """
-        self._process_tracked_state(new_state)
+        with self._lock:
+            if new_state is None:
+                self._on.discard(entity_id)
+            else:
+                self._process_tracked_state(new_state)
+
+            self._update_group_state()
+
         self.update_ha_state()
 
     def _process_tracked_state(self, tr_state):
-        """ Updates group state based on a new state of a tracked entity. """
+        """ Updates the ON-states based on a new state of a tracked entity. """
 
-        # We have not determined type of group yet
+        # We have not determined type of group yet. The type is based on the
+        # first state that we can recognize, so no earlier state was ON.
         if self.group_on is None:
             self.group_on, self.group_off = _get_group_on_off(tr_state.state)
 
-            if self.group_on is not None:
-                # New state of the group is going to be based on the first
-                # state that we can recognize
-                self._state = tr_state.state
-
-            return
-
-        # There is already a group state
-        cur_gr_state = self._state
-        group_on, group_off = self.group_on, self.group_off
-
-        # if cur_gr_state = OFF and tr_state = ON: set ON
-        # if cur_gr_state = ON and tr_state = OFF: research
-        # else: ignore
-
-        if cur_gr_state == group_off and tr_state.state == group_on:
-            self._state = group_on
-
-        elif cur_gr_state == group_on and tr_state.state == group_off:
+        if self.group_on is not None and tr_state.state == self.group_on:
+            self._on.add(tr_state.entity_id)
+        else:
+            self._on.discard(tr_state.entity_id)
 
-            # Set to off if no other states are on
-            if not any(self.hass.states.is_state(ent_id, group_on)
-                       for ent_id in self.tracking
-                       if tr_state.entity_id != ent_id):
-                self._state = group_off
+    def _update_group_state(self):
+        """ Group is ON if any tracked entity is ON. """
+        if self.group_on is None:
+            self._state = STATE_UNKNOWN
+        elif self._on:
+            self._state = self.group_on
+        else:
+            self._state = self.group_off
 
 
 def setup_group(hass, name, entity_ids, user_defined=True):
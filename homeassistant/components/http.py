@@ -6,6 +6,7 @@ This module provides an API and a HTTP interface for debug purposes.
 For more details about the RESTful API, please refer to the documentation at
 https://home-assistant.io/developers/api/
 """
+from collections import OrderedDict
 from datetime import timedelta
 import gzip
 from http import cookies
@@ -13,6 +14,9 @@ from http.server import SimpleHTTPRequestHandler, HTTPServer
 import json
 import logging
 import os
+import re
+import selectors
+import socket
 from socketserver import ThreadingMixIn
 import ssl
 import threading
@@ -21,11 +25,13 @@ from urllib.parse import urlparse, parse_qs
 
 import homeassistant.core as ha
 from homeassistant.const import (
-    SERVER_PORT, CONTENT_TYPE_JSON,
+    SERVER_PORT, CONTENT_TYPE_JSON, HTTP_HEADER_ACCEPT,
     HTTP_HEADER_HA_AUTH, HTTP_HEADER_CONTENT_TYPE, HTTP_HEADER_ACCEPT_ENCODING,
     HTTP_HEADER_CONTENT_ENCODING, HTTP_HEADER_VARY, HTTP_HEADER_CONTENT_LENGTH,
-    HTTP_HEADER_CACHE_CONTROL, HTTP_HEADER_EXPIRES, HTTP_OK, HTTP_UNAUTHORIZED,
-    HTTP_NOT_FOUND, HTTP_METHOD_NOT_ALLOWED, HTTP_UNPROCESSABLE_ENTITY)
+    HTTP_HEADER_CACHE_CONTROL, HTTP_HEADER_EXPIRES, HTTP_HEADER_ETAG,
+    HTTP_HEADER_IF_NONE_MATCH, HTTP_HEADER_LAST_MODIFIED, HTTP_OK,
+    HTTP_NOT_MODIFIED, HTTP_UNAUTHORIZED, HTTP_NOT_FOUND,
+    HTTP_METHOD_NOT_ALLOWED, HTTP_UNPROCESSABLE_ENTITY)
 import homeassistant.remote as rem
 import homeassistant.util as util
 import homeassistant.util.dt as date_util
@@ -39,6 +45,26 @@ CONF_SERVER_PORT = "server_port"
 CONF_DEVELOPMENT = "development"
 CONF_SSL_CERTIFICATE = 'ssl_certificate'
 CONF_SSL_KEY = 'ssl_key'
+CONF_SERVER_MODE = 'server_mode'
+CONF_SERVER_WORKERS = 'server_workers'
+
+SERVER_MODE_THREADED = 'threaded'
+SERVER_MODE_POOLED = 'pooled'
+
+DEFAULT_SERVER_WORKERS = 10
+
+# Seconds an idle keep-alive connection is kept open by the pooled server
+KEEP_ALIVE_TIMEOUT = 60
+# Seconds a pooled worker waits on a client while handling a request
+REQUEST_TIMEOUT = 30
+
+# JSON responses of at least this many bytes are gzipped if supported
+JSON_GZIP_MIN_SIZE = 1024
+# Lower than the default of 9, responses are compressed for every request
+JSON_GZIP_LEVEL = 6
+
+# Number of files whose gzipped content is kept in memory
+STATIC_CACHE_MAX_FILES = 100
 
 DATA_API_PASSWORD = 'api_password'
 
@@ -47,6 +73,9 @@ SESSION_CLEAR_INTERVAL = timedelta(seconds=20)
 SESSION_TIMEOUT_SECONDS = 1800
 SESSION_KEY = 'sessionId'
 
+# Literal start of a regular expression path, used to place it in the router
+RE_PATH_LITERAL = re.compile(r'[^\\.^$*+?{}\[\]|()]*')
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -62,11 +91,19 @@ def setup(hass, config):
     development = str(conf.get(CONF_DEVELOPMENT, "")) == "1"
     ssl_certificate = conf.get(CONF_SSL_CERTIFICATE)
     ssl_key = conf.get(CONF_SSL_KEY)
+    server_mode = conf.get(CONF_SERVER_MODE, SERVER_MODE_THREADED)
 
     try:
-        server = HomeAssistantHTTPServer(
-            (server_host, server_port), RequestHandler, hass, api_password,
-            development, ssl_certificate, ssl_key)
+        if server_mode == SERVER_MODE_POOLED:
+            server = PooledHTTPServer(
+                (server_host, server_port), KeepAliveRequestHandler, hass,
+                api_password, development, ssl_certificate, ssl_key,
+                util.convert(conf.get(CONF_SERVER_WORKERS), int,
+                             DEFAULT_SERVER_WORKERS))
+        else:
+            server = HomeAssistantHTTPServer(
+                (server_host, server_port), RequestHandler, hass,
+                api_password, development, ssl_certificate, ssl_key)
     except OSError:
         # If address already in use
         _LOGGER.exception("Error setting up HTTP server")
@@ -91,6 +128,8 @@ class HomeAssistantHTTPServer(ThreadingMixIn, HTTPServer):
 
     allow_reuse_address = True
     daemon_threads = True
+    # If False, SSL is set up per connection by the server
+    wrap_listening_socket = True
 
     # pylint: disable=too-many-arguments
     def __init__(self, server_address, request_handler_class,
@@ -101,21 +140,26 @@ class HomeAssistantHTTPServer(ThreadingMixIn, HTTPServer):
         self.hass = hass
         self.api_password = api_password
         self.development = development
-        self.paths = []
+        self.router = PathRouter()
         self.sessions = SessionStore()
+        self.file_cache = StaticFileCache()
         self.use_ssl = ssl_certificate is not None
+        self.ssl_kwargs = None
 
         # We will lazy init this one if needed
         self.event_forwarder = None
+        # Set up by the api component
+        self.event_stream = None
 
         if development:
             _LOGGER.info("running http in development mode")
 
         if ssl_certificate is not None:
-            wrap_kwargs = {'certfile': ssl_certificate}
+            self.ssl_kwargs = {'certfile': ssl_certificate}
             if ssl_key is not None:
-                wrap_kwargs['keyfile'] = ssl_key
-            self.socket = ssl.wrap_socket(self.socket, **wrap_kwargs)
+                self.ssl_kwargs['keyfile'] = ssl_key
+            if self.wrap_listening_socket:
+                self.socket = ssl.wrap_socket(self.socket, **self.ssl_kwargs)
 
     def start(self):
         """ Starts the HTTP server. """
@@ -140,7 +184,25 @@ class HomeAssistantHTTPServer(ThreadingMixIn, HTTPServer):
 
     def register_path(self, method, url, callback, require_auth=True):
         """ Registers a path with the server. """
-        self.paths.append((method, url, callback, require_auth))
+        self.router.register(method, url, callback, require_auth)
+
+    # pylint: disable=too-many-arguments,no-self-use
+    def hold_event_stream(self, handler, ping, stopped, interval, on_close):
+        """
+        Keeps the connection of handler open for an event stream.
+
+        Calls ping every interval seconds till stopped is set, then calls
+        on_close. Blocks the thread of the request.
+        """
+        while True:
+            ping()
+
+            stopped.wait(interval)
+
+            if stopped.is_set():
+                break
+
+        on_close()
 
     def log_message(self, fmt, *args):
         """ Redirect built-in log to HA logging """
@@ -148,6 +210,252 @@ class HomeAssistantHTTPServer(ThreadingMixIn, HTTPServer):
         _LOGGER.info(fmt, *args)
 
 
+class KeepAliveConnection(object):
+    """ Represents a client connection of the PooledHTTPServer. """
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ['sock', 'client_address', 'rfile', 'wfile', 'last_active',
+                 'stream']
+
+    def __init__(self, sock, client_address):
+        self.sock = sock
+        self.client_address = client_address
+        self.rfile = None
+        self.wfile = None
+        self.last_active = time.monotonic()
+        # Tuple (ping, stopped, interval, on_close, last_ping) for streams
+        self.stream = None
+
+    def close(self):
+        """ Closes the connection. """
+        for fil in (self.wfile, self.rfile):
+            try:
+                if fil is not None:
+                    fil.close()
+            except OSError:
+                pass
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.sock.close()
+
+
+class PooledHTTPServer(HomeAssistantHTTPServer):
+    """
+    Handle HTTP requests with a bounded pool of worker threads.
+
+    A selector loop accepts connections and watches idle keep-alive
+    connections. A connection is handed to a worker when a request comes in
+    and returned to the loop once the response is written. Event streams are
+    kept open by the loop without occupying a worker.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    wrap_listening_socket = False
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, server_address, request_handler_class,
+                 hass, api_password, development, ssl_certificate, ssl_key,
+                 worker_count=DEFAULT_SERVER_WORKERS):
+        super().__init__(server_address, request_handler_class, hass,
+                         api_password, development, ssl_certificate, ssl_key)
+
+        self.worker_count = worker_count
+        self._pool = None
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        # Connections to be watched by the selector loop
+        self._rearm = []
+        self._streams = set()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+
+    def serve_forever(self, poll_interval=0.5):
+        """ Handles requests until shutdown is called. """
+        self._pool = ha.create_worker_pool(self.worker_count)
+        self._running.set()
+        self._selector.register(self.socket, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+
+        try:
+            while self._running.is_set():
+                for key, _ in self._selector.select(poll_interval):
+                    if key.fileobj is self.socket:
+                        self._accept()
+                    elif key.fileobj is self._wakeup_recv:
+                        self._wakeup_recv.recv(1024)
+                    else:
+                        self._selector.unregister(key.fileobj)
+                        self._dispatch(key.data)
+
+                self._service_connections()
+        finally:
+            self._close_all()
+            self._stopped.set()
+
+    def shutdown(self):
+        """ Stops serve_forever and waits till it is done. """
+        if not self._running.is_set():
+            return
+
+        self._running.clear()
+        self._wake()
+        self._stopped.wait()
+        self._pool.stop()
+
+    # pylint: disable=too-many-arguments
+    def hold_event_stream(self, handler, ping, stopped, interval, on_close):
+        """
+        Keeps the connection of handler open for an event stream.
+
+        The selector loop calls ping every interval seconds and on_close
+        when stopped is set or the client disconnects. Returns immediately.
+        """
+        conn = handler.request
+
+        ping()
+
+        with self._lock:
+            conn.stream = (ping, stopped, interval, on_close,
+                           time.monotonic())
+            self._streams.add(conn)
+
+    def _accept(self):
+        """ Accepts a new connection and hands it to a worker. """
+        try:
+            sock, client_address = self.socket.accept()
+        except OSError:
+            return
+
+        sock.settimeout(REQUEST_TIMEOUT)
+        self._dispatch(KeepAliveConnection(sock, client_address))
+
+    def _dispatch(self, conn):
+        """ Handles readable connection. """
+        if conn.stream is not None:
+            # Clients do not send data on event streams, treat as closed
+            conn.stream[1].set()
+        else:
+            self._pool.add_job(0, (self._handle_connection, conn))
+
+    def _wake(self):
+        """ Wakes up the selector loop. """
+        try:
+            self._wakeup_send.send(b'x')
+        except OSError:
+            pass
+
+    def _handle_connection(self, conn):
+        """ Handles a request on a connection from a worker thread. """
+        try:
+            if conn.rfile is None and self.ssl_kwargs is not None:
+                conn.sock = ssl.wrap_socket(
+                    conn.sock, server_side=True, **self.ssl_kwargs)
+
+            handler = self.RequestHandlerClass(
+                conn, conn.client_address, self)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error handling request from %s",
+                              conn.client_address[0])
+            conn.close()
+            return
+
+        if conn.stream is None and handler.close_connection:
+            conn.close()
+        elif conn.stream is None and _has_pending_input(conn):
+            self._pool.add_job(0, (self._handle_connection, conn))
+        else:
+            conn.last_active = time.monotonic()
+            with self._lock:
+                self._rearm.append(conn)
+            self._wake()
+
+    def _service_connections(self):
+        """
+        Watches connections returned by workers, closes idle connections and
+        pings and cleans up event streams.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            rearm, self._rearm = self._rearm, []
+            streams = list(self._streams)
+
+        for conn in rearm:
+            try:
+                self._selector.register(conn.sock, selectors.EVENT_READ, conn)
+            except (ValueError, KeyError):
+                # ValueError if closed, KeyError if already registered
+                pass
+
+        for key in list(self._selector.get_map().values()):
+            conn = key.data
+            if conn is not None and conn.stream is None and \
+               now - conn.last_active > KEEP_ALIVE_TIMEOUT:
+                self._selector.unregister(key.fileobj)
+                conn.close()
+
+        for conn in streams:
+            ping, stopped, interval, on_close, last_ping = conn.stream
+
+            if stopped.is_set():
+                with self._lock:
+                    self._streams.discard(conn)
+                try:
+                    self._selector.unregister(conn.sock)
+                except (ValueError, KeyError):
+                    pass
+                on_close()
+                conn.close()
+
+            elif now - last_ping >= interval:
+                conn.stream = (ping, stopped, interval, on_close, now)
+                self._pool.add_job(0, (_ping_stream, ping))
+
+    def _close_all(self):
+        """ Closes all connections and stops all event streams. """
+        with self._lock:
+            streams = list(self._streams)
+            self._streams.clear()
+
+        for conn in streams:
+            conn.stream[1].set()
+            conn.stream[3]()
+
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                key.data.close()
+
+        self._selector.close()
+
+
+def _ping_stream(ping):
+    """ Pings an event stream from a worker of the PooledHTTPServer. """
+    ping()
+
+
+def _has_pending_input(conn):
+    """ Returns True if data of the next request is already buffered. """
+    sock = conn.sock
+
+    if isinstance(sock, ssl.SSLSocket) and sock.pending():
+        return True
+
+    timeout = sock.gettimeout()
+    sock.settimeout(0)
+
+    try:
+        return bool(conn.rfile.peek(1))
+    except (OSError, ValueError):
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+
 # pylint: disable=too-many-public-methods,too-many-locals
 class RequestHandler(SimpleHTTPRequestHandler):
     """
@@ -208,31 +516,8 @@ class RequestHandler(SimpleHTTPRequestHandler):
         if '_METHOD' in data:
             method = data.pop('_METHOD')
 
-        # Var to keep track if we found a path that matched a handler but
-        # the method was different
-        path_matched_but_not_method = False
-
-        # Var to hold the handler for this path and method if found
-        handle_request_method = False
-        require_auth = True
-
-        # Check every handler to find matching result
-        for t_method, t_path, t_handler, t_auth in self.server.paths:
-            # we either do string-comparison or regular expression matching
-            # pylint: disable=maybe-no-member
-            if isinstance(t_path, str):
-                path_match = url.path == t_path
-            else:
-                path_match = t_path.match(url.path)
-
-            if path_match and method == t_method:
-                # Call the method
-                handle_request_method = t_handler
-                require_auth = t_auth
-                break
-
-            elif path_match:
-                path_matched_but_not_method = True
+        handle_request_method, require_auth, path_match = \
+            self.server.router.resolve(method, url.path)
 
         # Did we find a handler for the incoming request?
         if handle_request_method:
@@ -244,7 +529,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
 
             handle_request_method(self, path_match, data)
 
-        elif path_matched_but_not_method:
+        elif path_match:
             self.send_response(HTTP_METHOD_NOT_ALLOWED)
             self.end_headers()
 
@@ -278,8 +563,33 @@ class RequestHandler(SimpleHTTPRequestHandler):
 
     def write_json(self, data=None, status_code=HTTP_OK, location=None):
         """ Helper method to return JSON to the caller. """
+        if data is None:
+            body = None
+        elif self.pretty_json:
+            body = json.dumps(data, indent=4, sort_keys=True,
+                              cls=rem.JSONEncoder)
+        else:
+            body = json.dumps(data, sort_keys=True, separators=(',', ':'),
+                              cls=rem.JSONEncoder)
+
+        self.write_raw_json(body, status_code, location)
+
+    def write_raw_json(self, body, status_code=HTTP_OK, location=None):
+        """ Helper method to return an already serialized JSON string. """
+        body = body.encode("UTF-8") if body is not None else b''
+        do_gzip = (len(body) >= JSON_GZIP_MIN_SIZE and
+                   'gzip' in self.headers.get(HTTP_HEADER_ACCEPT_ENCODING, ''))
+
+        if do_gzip:
+            body = gzip.compress(body, JSON_GZIP_LEVEL)
+
         self.send_response(status_code)
         self.send_header(HTTP_HEADER_CONTENT_TYPE, CONTENT_TYPE_JSON)
+        self.send_header(HTTP_HEADER_CONTENT_LENGTH, str(len(body)))
+
+        if do_gzip:
+            self.send_header(HTTP_HEADER_CONTENT_ENCODING, "gzip")
+            self.send_header(HTTP_HEADER_VARY, HTTP_HEADER_ACCEPT_ENCODING)
 
         if location:
             self.send_header('Location', location)
@@ -288,47 +598,72 @@ class RequestHandler(SimpleHTTPRequestHandler):
 
         self.end_headers()
 
-        if data is not None:
-            self.wfile.write(
-                json.dumps(data, indent=4, sort_keys=True,
-                           cls=rem.JSONEncoder).encode("UTF-8"))
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    @property
+    def pretty_json(self):
+        """ True if JSON should be indented, which is for browsers. """
+        return 'text/html' in self.headers.get(HTTP_HEADER_ACCEPT, '')
 
     def write_file(self, path, cache_headers=True):
         """ Returns a file to the user. """
         try:
             with open(path, 'rb') as inp:
                 self.write_file_pointer(self.guess_type(path), inp,
-                                        cache_headers)
+                                        cache_headers, path)
 
         except IOError:
             self.send_response(HTTP_NOT_FOUND)
             self.end_headers()
             _LOGGER.exception("Unable to serve %s", path)
 
-    def write_file_pointer(self, content_type, inp, cache_headers=True):
+    # pylint: disable=too-many-arguments
+    def write_file_pointer(self, content_type, inp, cache_headers=True,
+                           path=None):
         """
         Helper function to write a file pointer to the user.
+        The gzipped content of cacheable files with a path is cached.
         Does not do error handling.
         """
+        fst = os.fstat(inp.fileno())
         do_gzip = 'gzip' in self.headers.get(HTTP_HEADER_ACCEPT_ENCODING, '')
+        etag = file_etag(fst, do_gzip)
+
+        if etag_matches(etag, self.headers.get(HTTP_HEADER_IF_NONE_MATCH)):
+            self.send_response(HTTP_NOT_MODIFIED)
+            self.send_header(HTTP_HEADER_ETAG, etag)
+            self.send_header(HTTP_HEADER_VARY, HTTP_HEADER_ACCEPT_ENCODING)
+
+            if cache_headers:
+                self.set_cache_header()
+            self.set_session_cookie_header()
+
+            self.end_headers()
+            return
 
         self.send_response(HTTP_OK)
         self.send_header(HTTP_HEADER_CONTENT_TYPE, content_type)
+        self.send_header(HTTP_HEADER_ETAG, etag)
+        self.send_header(HTTP_HEADER_VARY, HTTP_HEADER_ACCEPT_ENCODING)
+        self.send_header(HTTP_HEADER_LAST_MODIFIED,
+                         self.date_time_string(fst.st_mtime))
 
         if cache_headers:
             self.set_cache_header()
         self.set_session_cookie_header()
 
         if do_gzip:
-            gzip_data = gzip.compress(inp.read())
+            if path is None or not cache_headers:
+                gzip_data = gzip.compress(inp.read())
+            else:
+                gzip_data = self.server.file_cache.gzip(path, fst, inp)
 
             self.send_header(HTTP_HEADER_CONTENT_ENCODING, "gzip")
-            self.send_header(HTTP_HEADER_VARY, HTTP_HEADER_ACCEPT_ENCODING)
             self.send_header(HTTP_HEADER_CONTENT_LENGTH, str(len(gzip_data)))
 
         else:
-            fst = os.fstat(inp.fileno())
-            self.send_header(HTTP_HEADER_CONTENT_LENGTH, str(fst[6]))
+            self.send_header(HTTP_HEADER_CONTENT_LENGTH, str(fst.st_size))
 
         self.end_headers()
 
@@ -338,6 +673,11 @@ class RequestHandler(SimpleHTTPRequestHandler):
         elif do_gzip:
             self.wfile.write(gzip_data)
 
+        elif hasattr(self.connection, 'sendfile'):
+            # Zero-copy on Python 3.5+, falls back to send() for SSL sockets
+            self.wfile.flush()
+            self.connection.sendfile(inp, 0, fst.st_size)
+
         else:
             self.copyfile(inp, self.wfile)
 
@@ -415,6 +755,215 @@ class RequestHandler(SimpleHTTPRequestHandler):
         self.server.sessions.destroy(session_id)
 
 
+class KeepAliveRequestHandler(RequestHandler):
+    """
+    Handles a single request on a connection of the PooledHTTPServer.
+
+    Responses without a Content-Length close the connection because the
+    client can only detect their end by the connection being closed. This
+    does not apply to 304 responses, which never have a body.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, req, client_addr, server):
+        self._has_content_length = False
+        self._status_code = None
+        super().__init__(req, client_addr, server)
+
+    def setup(self):
+        """ Use the files of the connection to keep its read buffer. """
+        conn = self.request
+        self.connection = conn.sock
+
+        if conn.rfile is None:
+            conn.rfile = conn.sock.makefile('rb', self.rbufsize)
+            conn.wfile = conn.sock.makefile('wb')
+
+        self.rfile = conn.rfile
+        self.wfile = conn.wfile
+
+    def handle(self):
+        """ Handle one request. """
+        self.close_connection = True
+        self.handle_one_request()
+
+    def finish(self):
+        """ Flush the response but keep the connection open. """
+        try:
+            self.wfile.flush()
+        except (OSError, ValueError):
+            self.close_connection = True
+
+    def send_response_only(self, code, message=None):
+        """ Track the status code of the response. """
+        self._status_code = code
+
+        super().send_response_only(code, message)
+
+    def send_header(self, keyword, value):
+        """ Track if the response has a content length. """
+        if keyword.lower() == HTTP_HEADER_CONTENT_LENGTH.lower():
+            self._has_content_length = True
+
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        """ Close the connection after responses without length. """
+        if not self._has_content_length and not self.close_connection and \
+           self._status_code != HTTP_NOT_MODIFIED:
+            self.send_header('Connection', 'close')
+
+        super().end_headers()
+
+
+class PathRouter(object):
+    """
+    Resolves the handler registered for a method and path.
+
+    String paths are looked up in a dict. Regular expression paths are stored
+    in a tree keyed by the path segments of their literal prefix so that only
+    the expressions that can match a path are tried. Routes are tried in the
+    order they were registered.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._static = {}
+        # Tree nodes are tuples (routes, children)
+        self._tree = ([], {})
+
+    def register(self, method, path, handler, require_auth=True):
+        """ Registers a handler for a method and a string or regex path. """
+        route = (self._count, method, path, handler, require_auth)
+        self._count += 1
+
+        if isinstance(path, str):
+            self._static.setdefault(path, []).append(route)
+            return
+
+        node = self._tree
+
+        # Case insensitive expressions are tried for every path
+        if getattr(path, 'flags', 0) & re.IGNORECASE:
+            literal = ''
+        else:
+            literal = RE_PATH_LITERAL.match(
+                getattr(path, 'pattern', '')).group(0)
+
+        # The last segment of the literal prefix can be continued by the
+        # expression so only complete segments are used as keys.
+        for segment in literal.split('/')[:-1]:
+            node = node[1].setdefault(segment, ([], {}))
+
+        node[0].append(route)
+
+    def resolve(self, method, path):
+        """
+        Returns a tuple (handler, require_auth, path_match).
+
+        If no route matches, handler and path_match are None. If a route
+        matches the path but not the method, handler is None and path_match
+        is True.
+        """
+        candidates = list(self._static.get(path, ()))
+        has_regex = False
+
+        node = self._tree
+        for segment in path.split('/'):
+            if node[0]:
+                candidates.extend(node[0])
+                has_regex = True
+
+            node = node[1].get(segment)
+
+            if node is None:
+                break
+        else:
+            if node[0]:
+                candidates.extend(node[0])
+                has_regex = True
+
+        if has_regex:
+            candidates.sort(key=lambda route: route[0])
+
+        path_matched = None
+
+        for _, t_method, t_path, t_handler, t_auth in candidates:
+            if isinstance(t_path, str):
+                path_match = True
+            else:
+                path_match = t_path.match(path)
+
+                if not path_match:
+                    continue
+
+            if method == t_method:
+                return t_handler, t_auth, path_match
+
+            path_matched = True
+
+        return None, True, path_matched
+
+
+def file_etag(stat, gzipped=False):
+    """
+    Returns an ETag for a file based on its modification time and size.
+    The gzipped body of a file gets its own ETag.
+    """
+    return '"{:x}-{:x}{}"'.format(
+        stat.st_mtime_ns, stat.st_size, '-gz' if gzipped else '')
+
+
+def etag_matches(etag, if_none_match):
+    """ Return True if etag matches the value of an If-None-Match header. """
+    if not if_none_match:
+        return False
+
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+
+        if tag == '*' or tag == etag or tag == 'W/' + etag:
+            return True
+
+    return False
+
+
+class StaticFileCache(object):
+    """
+    Stores the gzipped content of served files. Entries are keyed by path and
+    replaced when the modification time or size of the file changes. Only the
+    max_files most recently used files are kept.
+    """
+
+    def __init__(self, max_files=STATIC_CACHE_MAX_FILES):
+        self._files = OrderedDict()
+        self._max_files = max_files
+        self._lock = threading.Lock()
+
+    def gzip(self, path, stat, inp):
+        """ Returns the gzipped content of file inp at path with stat. """
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._files.get(path)
+
+            if cached is not None and cached[0] == key:
+                self._files.move_to_end(path)
+                return cached[1]
+
+        data = gzip.compress(inp.read())
+
+        with self._lock:
+            self._files[path] = (key, data)
+            self._files.move_to_end(path)
+
+            while len(self._files) > self._max_files:
+                self._files.popitem(last=False)
+
+        return data
+
+
 def session_valid_time():
     """ Time till when a session will be valid. """
     return date_util.utcnow() + timedelta(seconds=SESSION_TIMEOUT_SECONDS)
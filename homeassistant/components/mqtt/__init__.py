@@ -6,12 +6,15 @@ MQTT component, using paho-mqtt.
 For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/mqtt/
 """
+from collections import deque
 import logging
 import os
 import socket
+import threading
 import time
 
 
+from homeassistant.core import JobPriority
 from homeassistant.exceptions import HomeAssistantError
 import homeassistant.util as util
 from homeassistant.helpers import validate_config
@@ -24,10 +27,23 @@ DOMAIN = "mqtt"
 
 MQTT_CLIENT = None
 
+# TopicTrie with the callbacks of the subscriptions
+SUBSCRIPTIONS = None
+
+# MessageQueue with the received messages
+MESSAGE_QUEUE = None
+
 DEFAULT_PORT = 1883
 DEFAULT_KEEPALIVE = 60
 DEFAULT_QOS = 0
 DEFAULT_RETAIN = False
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_MAX_IN_FLIGHT = 10
+
+# What to do with a message that is received while the queue is full
+OVERLOAD_COALESCE = 'coalesce'
+OVERLOAD_DROP_OLDEST = 'drop_oldest'
+DEFAULT_OVERLOAD = OVERLOAD_COALESCE
 
 SERVICE_PUBLISH = 'publish'
 EVENT_MQTT_MESSAGE_RECEIVED = 'MQTT_MESSAGE_RECEIVED'
@@ -41,6 +57,8 @@ CONF_KEEPALIVE = 'keepalive'
 CONF_USERNAME = 'username'
 CONF_PASSWORD = 'password'
 CONF_CERTIFICATE = 'certificate'
+CONF_QUEUE_SIZE = 'queue_size'
+CONF_OVERLOAD = 'overload'
 
 ATTR_TOPIC = 'topic'
 ATTR_PAYLOAD = 'payload'
@@ -67,13 +85,7 @@ def publish(hass, topic, payload, qos=None, retain=None):
 
 def subscribe(hass, topic, callback, qos=DEFAULT_QOS):
     """ Subscribe to a topic. """
-    def mqtt_topic_subscriber(event):
-        """ Match subscribed MQTT topic. """
-        if _match_topic(topic, event.data[ATTR_TOPIC]):
-            callback(event.data[ATTR_TOPIC], event.data[ATTR_PAYLOAD],
-                     event.data[ATTR_QOS])
-
-    hass.bus.listen(EVENT_MQTT_MESSAGE_RECEIVED, mqtt_topic_subscriber)
+    SUBSCRIPTIONS.add(topic, callback)
     MQTT_CLIENT.subscribe(topic, qos)
 
 
@@ -92,6 +104,14 @@ def setup(hass, config):
     username = util.convert(conf.get(CONF_USERNAME), str)
     password = util.convert(conf.get(CONF_PASSWORD), str)
     certificate = util.convert(conf.get(CONF_CERTIFICATE), str)
+    queue_size = util.convert(conf.get(CONF_QUEUE_SIZE), int,
+                              DEFAULT_QUEUE_SIZE)
+    overload = conf.get(CONF_OVERLOAD, DEFAULT_OVERLOAD)
+
+    if overload not in (OVERLOAD_COALESCE, OVERLOAD_DROP_OLDEST):
+        _LOGGER.error('Invalid %s: %s. Choose from %s or %s', CONF_OVERLOAD,
+                      overload, OVERLOAD_COALESCE, OVERLOAD_DROP_OLDEST)
+        return False
 
     # For cloudmqtt.com, secured connection, auto fill in certificate
     if certificate is None and 19999 < port < 30000 and \
@@ -99,16 +119,47 @@ def setup(hass, config):
         certificate = os.path.join(os.path.dirname(__file__),
                                    'addtrustexternalcaroot.crt')
 
-    global MQTT_CLIENT
+    global MQTT_CLIENT, SUBSCRIPTIONS, MESSAGE_QUEUE
+    message_queue = MessageQueue(hass, queue_size, overload)
+
     try:
         MQTT_CLIENT = MQTT(hass, broker, port, client_id, keepalive, username,
-                           password, certificate)
+                           password, certificate, message_queue)
     except socket.error:
         _LOGGER.exception("Can't connect to the broker. "
                           "Please check your settings and the broker "
                           "itself.")
         return False
 
+    subscriptions = SUBSCRIPTIONS = TopicTrie()
+    MESSAGE_QUEUE = message_queue
+    message_queue.start()
+
+    def message_received(event):
+        """
+        Calls the callbacks of the subscriptions matching the topic. Messages
+        still arrive as events so they can be fired by others, but each
+        callback runs as its own job so a slow one does not hold up others.
+        The message is done once its callbacks are queued, so blocking
+        callbacks do not stop the delivery of other messages.
+        """
+        topic = event.data[ATTR_TOPIC]
+
+        def run_callback(callback):
+            """ Calls a callback of the subscriptions. """
+            try:
+                callback(topic, event.data[ATTR_PAYLOAD],
+                         event.data[ATTR_QOS])
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception('Error handling message on %s', topic)
+
+        try:
+            for callback in subscriptions.match(topic):
+                hass.pool.add_job(JobPriority.EVENT_DEFAULT,
+                                  (run_callback, callback))
+        finally:
+            message_queue.done(event.data)
+
     def stop_mqtt(event):
         """ Stop MQTT component. """
         MQTT_CLIENT.stop()
@@ -128,7 +179,13 @@ def setup(hass, config):
             return
         MQTT_CLIENT.publish(msg_topic, payload, qos, retain)
 
+    def stop_queue(event):
+        """ Stop handling received messages. """
+        message_queue.stop()
+
     hass.bus.listen_once(EVENT_HOMEASSISTANT_START, start_mqtt)
+    hass.bus.listen_once(EVENT_HOMEASSISTANT_STOP, stop_queue)
+    hass.bus.listen(EVENT_MQTT_MESSAGE_RECEIVED, message_received)
 
     hass.services.register(DOMAIN, SERVICE_PUBLISH, publish_service)
 
@@ -139,11 +196,12 @@ def setup(hass, config):
 class MQTT(object):
     """ Implements messaging service for MQTT. """
     def __init__(self, hass, broker, port, client_id, keepalive, username,
-                 password, certificate):
+                 password, certificate, message_queue):
         import paho.mqtt.client as mqtt
 
         self.userdata = {
             'hass': hass,
+            'queue': message_queue,
             'topics': {},
             'progress': {},
         }
@@ -196,13 +254,272 @@ class MQTT(object):
         self.userdata['progress'][mid] = topic
 
 
+class TopicTrie(object):
+    """
+    Finds the callbacks of the subscriptions that match a topic. Each level
+    of a subscription is a node in the trie, so a lookup only visits the
+    nodes of the levels of the topic and of the wildcards + and #.
+    """
+
+    def __init__(self):
+        self._root = _TopicNode()
+        self._lock = threading.Lock()
+
+    def add(self, subscription, callback):
+        """ Adds a callback for a subscription. """
+        with self._lock:
+            node = self._root
+
+            for level in subscription.split('/'):
+                node = node.children.setdefault(level, _TopicNode())
+
+            node.callbacks.append(callback)
+
+    def match(self, topic):
+        """ Returns the callbacks of subscriptions matching topic. """
+        levels = topic.split('/')
+        callbacks = []
+
+        with self._lock:
+            nodes = [self._root]
+
+            for level in levels:
+                next_nodes = []
+
+                for node in nodes:
+                    # A # at the end of a subscription matches all levels
+                    if '#' in node.children:
+                        callbacks.extend(node.children['#'].callbacks)
+
+                    for key in (level, '+'):
+                        if key in node.children:
+                            next_nodes.append(node.children[key])
+
+                nodes = next_nodes
+
+                if not nodes:
+                    return callbacks
+
+            for node in nodes:
+                callbacks.extend(node.callbacks)
+
+                # A # also matches the level before it
+                if '#' in node.children:
+                    callbacks.extend(node.children['#'].callbacks)
+
+        return callbacks
+
+
+class _TopicNode(object):
+    """ Level of a subscription in the topic trie. """
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ['children', 'callbacks']
+
+    def __init__(self):
+        self.children = {}
+        self.callbacks = []
+
+
+class TopicStats(object):
+    """ Statistics of the messages received on a topic. """
+    # pylint: disable=too-few-public-methods
+
+    # Weight of the newest interval in the average interval
+    SMOOTHING = 0.2
+
+    def __init__(self):
+        self.received = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.last_received = None
+        self.interval = None
+
+    @property
+    def rate(self):
+        """ Average number of messages per second. """
+        if not self.interval:
+            return None
+
+        return 1 / self.interval
+
+    def message_received(self, now):
+        """ Counts a received message. """
+        self.received += 1
+
+        if self.last_received is not None:
+            interval = now - self.last_received
+
+            if self.interval is None:
+                self.interval = interval
+            else:
+                self.interval += self.SMOOTHING * (interval - self.interval)
+
+        self.last_received = now
+
+
+class MessageQueue(object):
+    """
+    Bounded queue between the MQTT client and the event bus. A thread fires
+    the events of queued messages while fewer than max_in_flight messages
+    are waiting to be dispatched to their callbacks. When the queue is full
+    a message replaces the queued message of the same topic with overload
+    coalesce, otherwise the oldest message is dropped.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, hass, size=DEFAULT_QUEUE_SIZE,
+                 overload=DEFAULT_OVERLOAD,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.hass = hass
+        self.size = size
+        self.overload = overload
+        self.max_in_flight = max_in_flight
+
+        # Number of messages dropped and coalesced
+        self.dropped = 0
+        self.coalesced = 0
+        # Dict mapping topic => TopicStats
+        self.stats = {}
+
+        # Queued messages as [topic, qos, payload]
+        self._queue = deque()
+        # Dict mapping topic => last queued message of the topic
+        self._last = {}
+        # Event data of the fired messages that are being handled
+        self._in_flight = {}
+        self._overloaded = False
+        self._firing = False
+        self._running = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def start(self):
+        """ Starts firing the events of queued messages. """
+        with self._cond:
+            self._running = True
+
+        self._thread = threading.Thread(
+            target=self._run, name='MQTTMessageQueue', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops firing events. Queued messages are discarded. """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def put(self, topic, qos, payload):
+        """ Queues a received message. """
+        with self._cond:
+            stats = self.stats.get(topic)
+
+            if stats is None:
+                stats = self.stats[topic] = TopicStats()
+
+            stats.message_received(time.monotonic())
+
+            if len(self._queue) >= self.size:
+                self._overload()
+
+                last = self._last.get(topic)
+
+                if self.overload == OVERLOAD_COALESCE and last is not None:
+                    last[1:] = qos, payload
+                    self.coalesced += 1
+                    stats.coalesced += 1
+                    return
+
+                self._drop_oldest()
+
+            message = [topic, qos, payload]
+            self._queue.append(message)
+            self._last[topic] = message
+            self._cond.notify()
+
+    def block_till_done(self):
+        """ Blocks till the events of all queued messages are fired. """
+        with self._cond:
+            while self._running and (self._queue or self._firing):
+                self._cond.wait()
+
+    def done(self, data):
+        """
+        Called with the event data when the message of an event has been
+        dispatched. Events that were not fired by this queue are ignored.
+        """
+        with self._cond:
+            if self._in_flight.pop(id(data), None) is data:
+                self._cond.notify()
+
+    def _overload(self):
+        """ Warns once per overload that messages are lost. """
+        if not self._overloaded:
+            self._overloaded = True
+            _LOGGER.warning(
+                'More than %d MQTT messages are waiting, %s messages',
+                self.size,
+                'coalescing' if self.overload == OVERLOAD_COALESCE else
+                'dropping')
+
+    def _drop_oldest(self):
+        """ Drops the oldest message. """
+        topic = self._pop()[0]
+        self.dropped += 1
+        self.stats[topic].dropped += 1
+
+    def _pop(self):
+        """ Removes the oldest message from the queue and returns it. """
+        message = self._queue.popleft()
+
+        if self._last.get(message[0]) is message:
+            del self._last[message[0]]
+
+        return message
+
+    def _run(self):
+        """ Fires the events of queued messages. """
+        while True:
+            with self._cond:
+                while self._running and \
+                        (not self._queue or
+                         len(self._in_flight) >= self.max_in_flight):
+                    self._cond.wait()
+
+                if not self._running:
+                    return
+
+                topic, qos, payload = self._pop()
+                data = {
+                    ATTR_TOPIC: topic,
+                    ATTR_QOS: qos,
+                    ATTR_PAYLOAD: payload,
+                }
+                # Keeps data alive so its id identifies it until done
+                self._in_flight[id(data)] = data
+                self._firing = True
+
+                if self._overloaded and not self._queue:
+                    self._overloaded = False
+                    _LOGGER.info(
+                        'MQTT message queue is empty again. %d messages '
+                        'dropped and %d coalesced so far',
+                        self.dropped, self.coalesced)
+
+            # Firing outside the lock does not hold up the MQTT client
+            self.hass.bus.fire(EVENT_MQTT_MESSAGE_RECEIVED, data)
+
+            with self._cond:
+                self._firing = False
+                self._cond.notify_all()
+
+
 def _mqtt_on_message(mqttc, userdata, msg):
     """ Message callback """
-    userdata['hass'].bus.fire(EVENT_MQTT_MESSAGE_RECEIVED, {
-        ATTR_TOPIC: msg.topic,
-        ATTR_QOS: msg.qos,
-        ATTR_PAYLOAD: msg.payload.decode('utf-8'),
-    })
+    userdata['queue'].put(msg.topic, msg.qos, msg.payload.decode('utf-8'))
 
 
 def _mqtt_on_connect(mqttc, userdata, flags, result_code):
@@ -275,16 +592,3 @@ def _raise_on_error(result):
     """ Raise error if error result. """
     if result != 0:
         raise HomeAssistantError('Error talking to MQTT: {}'.format(result))
-
-
-def _match_topic(subscription, topic):
-    """ Returns if topic matches subscription. """
-    if subscription.endswith('#'):
-        return (subscription[:-2] == topic or
-                topic.startswith(subscription[:-1]))
-
-    sub_parts = subscription.split('/')
-    topic_parts = topic.split('/')
-
-    return (len(sub_parts) == len(topic_parts) and
-            all(a == b for a, b in zip(sub_parts, topic_parts) if a != '+'))
@@ -245,8 +245,15 @@ class Recorder(threading.Thread):
 
     def record_event(self, event):
         """ Save an event to the database. """
+        data = event.data
+
+        # Revisions of the state machine are only meaningful within a run
+        if event.event_type == EVENT_STATE_CHANGED and 'revision' in data:
+            data = {key: value for key, value in data.items()
+                    if key != 'revision'}
+
         info = (
-            event.event_type, json.dumps(event.data, cls=JSONEncoder),
+            event.event_type, json.dumps(data, cls=JSONEncoder),
             str(event.origin), date_util.utcnow(), event.time_fired,
             self.utc_offset
         )
@@ -9,7 +9,7 @@ https://home-assistant.io/components/sensor.forecast/
 import logging
 from datetime import timedelta
 
-from homeassistant.util import Throttle
+from homeassistant.util import Throttle, fetch
 from homeassistant.const import (CONF_API_KEY, TEMP_CELCIUS)
 from homeassistant.helpers.entity import Entity
 
@@ -191,11 +191,18 @@ class ForeCastData(object):
     @Throttle(MIN_TIME_BETWEEN_UPDATES)
     def update(self):
         """ Gets the latest data from Forecast.io. """
+        self.data, self.unit_system = fetch.cached(
+            ('forecast', self._api_key, self.latitude, self.longitude,
+             self.units),
+            self._fetch, MIN_TIME_BETWEEN_UPDATES)
+
+    def _fetch(self):
+        """ Fetches the current weather and its unit system. """
         import forecastio
 
         forecast = forecastio.load_forecast(self._api_key,
                                             self.latitude,
                                             self.longitude,
                                             units=self.units)
-        self.data = forecast.currently()
-        self.unit_system = forecast.json['flags']['units']
+
+        return forecast.currently(), forecast.json['flags']['units']
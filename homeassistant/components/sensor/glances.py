@@ -11,7 +11,7 @@ import logging
 
 import requests
 
-from homeassistant.util import Throttle
+from homeassistant.util import Throttle, fetch
 from homeassistant.helpers.entity import Entity
 from homeassistant.const import STATE_UNKNOWN
 
@@ -165,8 +165,10 @@ class GlancesData(object):
     def update(self):
         """ Gets the latest data from the Glances REST API. """
         try:
-            response = requests.get(self._resource, timeout=10)
-            self.data = response.json()
+            self.data = fetch.cached(
+                ('glances', self._resource),
+                lambda: requests.get(self._resource, timeout=10).json(),
+                MIN_TIME_BETWEEN_UPDATES)
         except requests.exceptions.ConnectionError:
             _LOGGER.error("No route to host/endpoint '%s'. Is device offline?",
                           self._resource)
@@ -9,7 +9,7 @@ https://home-assistant.io/components/sensor.openweathermap/
 import logging
 from datetime import timedelta
 
-from homeassistant.util import Throttle
+from homeassistant.util import Throttle, fetch
 from homeassistant.const import (CONF_API_KEY, TEMP_CELCIUS, TEMP_FAHRENHEIT)
 from homeassistant.helpers.entity import Entity
 
@@ -164,10 +164,18 @@ class WeatherData(object):
     @Throttle(MIN_TIME_BETWEEN_UPDATES)
     def update(self):
         """ Gets the latest data from OpenWeatherMap. """
+        self.data, self.fc_data = fetch.cached(
+            ('openweathermap', self.owm.get_API_key(), self.latitude,
+             self.longitude, self.forecast),
+            self._fetch, MIN_TIME_BETWEEN_UPDATES)
+
+    def _fetch(self):
+        """ Fetches the weather and the forecast if needed. """
         obs = self.owm.weather_at_coords(self.latitude, self.longitude)
-        self.data = obs.get_weather()
+        fc_data = None
 
         if self.forecast == 1:
-            obs = self.owm.three_hours_forecast_at_coords(self.latitude,
-                                                          self.longitude)
-            self.fc_data = obs.get_forecast()
+            fc_data = self.owm.three_hours_forecast_at_coords(
+                self.latitude, self.longitude).get_forecast()
+
+        return obs.get_weather(), fc_data
@@ -12,6 +12,7 @@ import requests
 
 from homeassistant.const import CONF_VALUE_TEMPLATE
 from homeassistant.util import template, Throttle
+from homeassistant.util import fetch
 from homeassistant.helpers.entity import Entity
 
 _LOGGER = logging.getLogger(__name__)
@@ -125,15 +126,21 @@ class RestDataGet(object):
     def update(self):
         """ Gets the latest data from REST service with GET method. """
         try:
-            response = requests.get(self._resource, timeout=10,
-                                    verify=self._verify_ssl)
+            text = fetch.cached(
+                ('rest', 'GET', self._resource, self._verify_ssl),
+                self._fetch, MIN_TIME_BETWEEN_UPDATES)
             if 'error' in self.data:
                 del self.data['error']
-            self.data = response.text
+            self.data = text
         except requests.exceptions.ConnectionError:
             _LOGGER.error("No route to resource/endpoint.")
             self.data['error'] = 'N/A'
 
+    def _fetch(self):
+        """ Fetches the resource. """
+        return requests.get(self._resource, timeout=10,
+                            verify=self._verify_ssl).text
+
 
 # pylint: disable=too-few-public-methods
 class RestDataPost(object):
@@ -149,11 +156,18 @@ class RestDataPost(object):
     def update(self):
         """ Gets the latest data from REST service with POST method. """
         try:
-            response = requests.post(self._resource, data=self._payload,
-                                     timeout=10, verify=self._verify_ssl)
+            text = fetch.cached(
+                ('rest', 'POST', self._resource, str(self._payload),
+                 self._verify_ssl),
+                self._fetch, MIN_TIME_BETWEEN_UPDATES)
             if 'error' in self.data:
                 del self.data['error']
-            self.data = response.text
+            self.data = text
         except requests.exceptions.ConnectionError:
             _LOGGER.error("No route to resource/endpoint.")
             self.data['error'] = 'N/A'
+
+    def _fetch(self):
+        """ Posts the payload to the resource. """
+        return requests.post(self._resource, data=self._payload, timeout=10,
+                             verify=self._verify_ssl).text
@@ -9,6 +9,7 @@ https://home-assistant.io/components/sensor.systemmonitor/
 import logging
 
 import homeassistant.util.dt as dt_util
+from homeassistant.util import fetch
 from homeassistant.helpers.entity import Entity
 from homeassistant.const import STATE_ON, STATE_OFF
 
@@ -37,6 +38,9 @@ SENSOR_TYPES = {
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds the system values are shared between the sensors
+CACHE_TTL = 10
+
 
 # pylint: disable=unused-argument
 def setup_platform(hass, config, add_devices, discovery_info=None):
@@ -80,54 +84,75 @@ class SystemMonitorSensor(Entity):
 
     # pylint: disable=too-many-branches
     def update(self):
-        import psutil
         if self.type == 'disk_use_percent':
-            self._state = psutil.disk_usage(self.argument).percent
+            self._state = _psutil('disk_usage', self.argument).percent
         elif self.type == 'disk_use':
-            self._state = round(psutil.disk_usage(self.argument).used /
+            self._state = round(_psutil('disk_usage', self.argument).used /
                                 1024**3, 1)
         elif self.type == 'disk_free':
-            self._state = round(psutil.disk_usage(self.argument).free /
+            self._state = round(_psutil('disk_usage', self.argument).free /
                                 1024**3, 1)
         elif self.type == 'memory_use_percent':
-            self._state = psutil.virtual_memory().percent
+            self._state = _psutil('virtual_memory').percent
         elif self.type == 'memory_use':
-            self._state = round((psutil.virtual_memory().total -
-                                 psutil.virtual_memory().available) /
+            self._state = round((_psutil('virtual_memory').total -
+                                 _psutil('virtual_memory').available) /
                                 1024**2, 1)
         elif self.type == 'memory_free':
-            self._state = round(psutil.virtual_memory().available / 1024**2, 1)
+            self._state = round(
+                _psutil('virtual_memory').available / 1024**2, 1)
         elif self.type == 'swap_use_percent':
-            self._state = psutil.swap_memory().percent
+            self._state = _psutil('swap_memory').percent
         elif self.type == 'swap_use':
-            self._state = round(psutil.swap_memory().used / 1024**3, 1)
+            self._state = round(_psutil('swap_memory').used / 1024**3, 1)
         elif self.type == 'swap_free':
-            self._state = round(psutil.swap_memory().free / 1024**3, 1)
+            self._state = round(_psutil('swap_memory').free / 1024**3, 1)
         elif self.type == 'processor_use':
-            self._state = round(psutil.cpu_percent(interval=None))
+            self._state = round(_psutil('cpu_percent', None))
         elif self.type == 'process':
-            if any(self.argument in l.name() for l in psutil.process_iter()):
+            if any(self.argument in name for name in _process_names()):
                 self._state = STATE_ON
             else:
                 self._state = STATE_OFF
         elif self.type == 'network_out':
-            self._state = round(psutil.net_io_counters(pernic=True)
+            self._state = round(_psutil('net_io_counters', True)
                                 [self.argument][0] / 1024**2, 1)
         elif self.type == 'network_in':
-            self._state = round(psutil.net_io_counters(pernic=True)
+            self._state = round(_psutil('net_io_counters', True)
                                 [self.argument][1] / 1024**2, 1)
         elif self.type == 'packets_out':
-            self._state = psutil.net_io_counters(pernic=True)[self.argument][2]
+            self._state = _psutil('net_io_counters', True)[self.argument][2]
         elif self.type == 'packets_in':
-            self._state = psutil.net_io_counters(pernic=True)[self.argument][3]
+            self._state = _psutil('net_io_counters', True)[self.argument][3]
         elif self.type == 'ipv4_address':
-            self._state = psutil.net_if_addrs()[self.argument][0][1]
+            self._state = _psutil('net_if_addrs')[self.argument][0][1]
         elif self.type == 'ipv6_address':
-            self._state = psutil.net_if_addrs()[self.argument][1][1]
+            self._state = _psutil('net_if_addrs')[self.argument][1][1]
         elif self.type == 'last_boot':
             self._state = dt_util.datetime_to_date_str(
                 dt_util.as_local(
-                    dt_util.utc_from_timestamp(psutil.boot_time())))
+                    dt_util.utc_from_timestamp(_psutil('boot_time'))))
         elif self.type == 'since_last_boot':
             self._state = dt_util.utcnow() - dt_util.utc_from_timestamp(
-                psutil.boot_time())
+                _psutil('boot_time'))
+
+
+def _psutil(function, *args):
+    """
+    Calls a psutil function. The result is shared between the sensors for
+    CACHE_TTL seconds.
+    """
+    import psutil
+
+    return fetch.cached(('systemmonitor', function) + args,
+                        lambda: getattr(psutil, function)(*args), CACHE_TTL)
+
+
+def _process_names():
+    """ Returns the names of the running processes. """
+    import psutil
+
+    return fetch.cached(
+        ('systemmonitor', 'process_names'),
+        lambda: [process.name() for process in psutil.process_iter()],
+        CACHE_TTL)
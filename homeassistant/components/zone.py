@@ -7,6 +7,8 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/zone/
 """
 import logging
+import math
+import weakref
 
 from homeassistant.const import (
     ATTR_HIDDEN, ATTR_ICON, ATTR_LATITUDE, ATTR_LONGITUDE, CONF_NAME)
@@ -26,32 +28,81 @@ DEFAULT_RADIUS = 100
 
 ICON_HOME = 'mdi:home'
 
+# Size in degrees of the cells of the zone index
+INDEX_CELL_SIZE = 0.05
+
+# Zones and lookups that cover more cells are not looked up by cell
+INDEX_MAX_CELLS = 64
+
+# Meters per degree latitude, rounded down so boxes are never too small
+_METERS_PER_DEGREE = 110000
+
+# Zone indexes per Home Assistant instance
+_INDEXES = weakref.WeakKeyDictionary()
+
 
 def active_zone(hass, latitude, longitude, radius=0):
     """ Find the active zone for given latitude, longitude. """
-    # Sort entity IDs so that we are deterministic if equal distance to 2 zones
-    zones = (hass.states.get(entity_id) for entity_id
-             in sorted(hass.states.entity_ids(DOMAIN)))
+    return active_zones(hass, [(latitude, longitude, radius)])[0]
+
+
+def active_zones(hass, locations):
+    """
+    Find the active zones for a list of (latitude, longitude, radius)
+    tuples. All locations are looked up in the same index and locations
+    that occur more than once are looked up once.
+    """
+    found = _find_active_zones(zone_index(hass), locations)
+
+    # The index is not invalidated when a zone is removed
+    if any(hass.states.get(entity_id) is None for entity_id
+           in set(zone.entity_id for zone in found.values() if zone)):
+        _INDEXES[hass].generation += 1
+        found = _find_active_zones(zone_index(hass), locations)
+
+    return [found[location] for location in locations]
+
+
+def _find_active_zones(index, locations):
+    """ Returns a dict mapping the locations to their active zone. """
+    found = {}
+
+    for location in locations:
+        if location not in found:
+            found[location] = index.active_zone(*location)
+
+    return found
+
 
-    min_dist = None
-    closest = None
+def zone_index(hass):
+    """
+    Returns the index of the current zones. The index is rebuilt after a
+    Zone entity has written its state.
+    """
+    cache = _INDEXES.get(hass)
 
-    for zone in zones:
-        zone_dist = distance(
-            latitude, longitude,
-            zone.attributes[ATTR_LATITUDE], zone.attributes[ATTR_LONGITUDE])
+    if cache is None:
+        cache = _INDEXES[hass] = _ZoneIndexCache()
 
-        within_zone = zone_dist - radius < zone.attributes[ATTR_RADIUS]
-        closer_zone = closest is None or zone_dist < min_dist
-        smaller_zone = (zone_dist == min_dist and
-                        zone.attributes[ATTR_RADIUS] <
-                        closest.attributes[ATTR_RADIUS])
+    generation = cache.generation
+    cached = cache.index
 
-        if within_zone and (closer_zone or smaller_zone):
-            min_dist = zone_dist
-            closest = zone
+    if cached is not None and cached[0] == generation:
+        return cached[1]
 
-    return closest
+    index = ZoneIndex(hass.states.get(entity_id) for entity_id
+                      in hass.states.entity_ids(DOMAIN))
+    cache.index = generation, index
+
+    return index
+
+
+def invalidate_index(hass):
+    """ Makes the next lookup rebuild the index of the zones. """
+    cache = _INDEXES.get(hass)
+
+    if cache is not None:
+        cache.generation += 1
 
 
 def in_zone(zone, latitude, longitude, radius=0):
@@ -63,6 +114,123 @@ def in_zone(zone, latitude, longitude, radius=0):
     return zone_dist - radius < zone.attributes[ATTR_RADIUS]
 
 
+def _bounding_box(latitude, longitude, radius):
+    """ Returns (min lat, min lon, max lat, max lon) around a circle. """
+    lat_delta = radius / _METERS_PER_DEGREE
+    max_lat = abs(latitude) + lat_delta
+
+    if max_lat >= 90:
+        return latitude - lat_delta, -180, latitude + lat_delta, 180
+
+    lon_delta = lat_delta / math.cos(math.radians(max_lat))
+
+    return (latitude - lat_delta, longitude - lon_delta,
+            latitude + lat_delta, longitude + lon_delta)
+
+
+def _in_box(box, latitude, longitude):
+    """ Returns if a location is within a bounding box. """
+    return (box[0] <= latitude <= box[2] and
+            (box[1] <= longitude <= box[3] or
+             box[1] <= longitude - 360 <= box[3] or
+             box[1] <= longitude + 360 <= box[3]))
+
+
+def _cells(box):
+    """ Returns the index cells a bounding box covers or None if too many. """
+    min_lat, min_lon, max_lat, max_lon = (
+        int(math.floor(value / INDEX_CELL_SIZE)) for value in box)
+
+    if (min_lon < -180 / INDEX_CELL_SIZE or
+            max_lon >= 180 / INDEX_CELL_SIZE or
+            (max_lat - min_lat + 1) * (max_lon - min_lon + 1) >
+            INDEX_MAX_CELLS):
+        return None
+
+    return [(lat, lon) for lat in range(min_lat, max_lat + 1)
+            for lon in range(min_lon, max_lon + 1)]
+
+
+class _ZoneIndexCache(object):
+    """ Holds the zone index of a Home Assistant instance. """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        # Increased on every change of a zone
+        self.generation = 0
+        # Tuple (generation, index)
+        self.index = None
+
+
+class ZoneIndex(object):
+    """
+    Finds the active zone for a location without measuring the distance to
+    every zone. Zones are put in the cells of a grid that their bounding box
+    covers. Only zones in the cells around a location whose bounding box
+    contains the location are measured.
+    """
+
+    def __init__(self, zones):
+        # Sort entity IDs so that we are deterministic if equal distance to
+        # 2 zones
+        self._zones = [
+            (order, zone, zone.attributes[ATTR_LATITUDE],
+             zone.attributes[ATTR_LONGITUDE], zone.attributes[ATTR_RADIUS])
+            for order, zone in enumerate(
+                sorted(zones, key=lambda zone: zone.entity_id))]
+        self._cells = {}
+        self._large = []
+
+        for entry in self._zones:
+            cells = _cells(_bounding_box(*entry[2:]))
+
+            if cells is None:
+                self._large.append(entry)
+                continue
+
+            for cell in cells:
+                self._cells.setdefault(cell, []).append(entry[0])
+
+    def candidates(self, latitude, longitude, radius=0):
+        """ Returns the zones that might contain a location, in order. """
+        cells = _cells(_bounding_box(latitude, longitude, radius))
+
+        if cells is None:
+            entries = self._zones
+        else:
+            found = set(entry[0] for entry in self._large)
+
+            for cell in cells:
+                found.update(self._cells.get(cell, ()))
+
+            entries = [self._zones[order] for order in sorted(found)]
+
+        return [entry for entry in entries
+                if _in_box(_bounding_box(entry[2], entry[3],
+                                         entry[4] + radius),
+                           latitude, longitude)]
+
+    def active_zone(self, latitude, longitude, radius=0):
+        """ Find the active zone for given latitude, longitude. """
+        min_dist = None
+        closest = None
+
+        for _, zone, zone_lat, zone_lon, zone_radius in \
+                self.candidates(latitude, longitude, radius):
+            zone_dist = distance(latitude, longitude, zone_lat, zone_lon)
+
+            within_zone = zone_dist - radius < zone_radius
+            closer_zone = closest is None or zone_dist < min_dist
+            smaller_zone = (zone_dist == min_dist and
+                            zone_radius < closest.attributes[ATTR_RADIUS])
+
+            if within_zone and (closer_zone or smaller_zone):
+                min_dist = zone_dist
+                closest = zone
+
+        return closest
+
+
 def setup(hass, config):
     """ Setup zone. """
     entities = set()
@@ -134,3 +302,8 @@ class Zone(Entity):
             ATTR_LONGITUDE: self.longitude,
             ATTR_RADIUS: self.radius,
         }
+
+    def update_ha_state(self, force_refresh=False):
+        """ Writes the zone and invalidates the zone index. """
+        super().update_ha_state(force_refresh)
+        invalidate_index(self.hass)
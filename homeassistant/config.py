@@ -4,6 +4,7 @@ homeassistant.config
 
 Module to help with parsing and generating configuration files.
 """
+import json
 import logging
 import os
 
@@ -12,6 +13,7 @@ from homeassistant.const import (
     CONF_LATITUDE, CONF_LONGITUDE, CONF_TEMPERATURE_UNIT, CONF_NAME,
     CONF_TIME_ZONE)
 import homeassistant.util.location as loc_util
+from homeassistant.util import profiler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -115,20 +117,51 @@ def find_config_file(config_dir):
 
 def load_config_file(config_path):
     """ Loads given config file. """
-    return load_yaml_config_file(config_path)
+    return load_yaml_config_file(config_path, cache=True)
 
 
-def load_yaml_config_file(config_path):
-    """ Parse a YAML configuration file. """
+def load_yaml_config_file(config_path, cache=False):
+    """
+    Parse a YAML configuration file. If cache is True the parsed
+    configuration is stored next to the file and used until the file or
+    one of the files it includes changes. Python specific YAML tags are not
+    supported.
+    """
+    if cache:
+        conf_dict = _load_yaml_cache(config_path)
+
+        if conf_dict is not None:
+            return conf_dict
+
     import yaml
 
+    # Use the fast C implementation of the loader if available
+    base_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+    # pylint: disable=too-many-ancestors
+    class IncludeLoader(base_loader):
+        """ Loader that knows the directory of the file it parses. """
+
+        def __init__(self, stream, directory):
+            super().__init__(stream)
+            self.directory = directory
+
+    # Files that make up the configuration
+    included = []
+
     def parse(fname):
         """ Parse a YAML file.  """
         try:
             with open(fname, encoding='utf-8') as conf_file:
-                # If configuration file is empty YAML returns None
-                # We convert that to an empty dict
-                return yaml.load(conf_file) or {}
+                included.append(os.path.abspath(fname))
+                loader = IncludeLoader(conf_file, os.path.dirname(fname))
+
+                try:
+                    # If configuration file is empty YAML returns None
+                    # We convert that to an empty dict
+                    return loader.get_single_data() or {}
+                finally:
+                    loader.dispose()
         except yaml.YAMLError:
             error = 'Error reading YAML configuration file {}'.format(fname)
             _LOGGER.exception(error)
@@ -141,12 +174,14 @@ def load_yaml_config_file(config_path):
         Example:
             device_tracker: !include device_tracker.yaml
         """
-        fname = os.path.join(os.path.dirname(loader.name), node.value)
+        fname = os.path.join(loader.directory, node.value)
         return parse(fname)
 
-    yaml.add_constructor('!include', yaml_include)
+    IncludeLoader.add_constructor('!include', yaml_include)
 
-    conf_dict = parse(config_path)
+    with profiler.phase(os.path.basename(config_path),
+                        profiler.CATEGORY_CONFIG):
+        conf_dict = parse(config_path)
 
     if not isinstance(conf_dict, dict):
         _LOGGER.error(
@@ -154,4 +189,87 @@ def load_yaml_config_file(config_path):
             os.path.basename(config_path))
         raise HomeAssistantError()
 
+    if cache:
+        _save_yaml_cache(config_path, included, conf_dict)
+
     return conf_dict
+
+
+def yaml_cache_path(config_path):
+    """ Returns the path of the cache of a YAML configuration file. """
+    return os.path.join(os.path.dirname(config_path),
+                        '.{}.cache'.format(os.path.basename(config_path)))
+
+
+def _file_version(fname):
+    """ Returns a list that changes when the file changes. """
+    try:
+        stat = os.stat(fname)
+    except OSError:
+        return None
+
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _valid_yaml_cache(config_path, cache):
+    """ Returns True if cache is a cache of config_path that is up to date. """
+    if not isinstance(cache, dict) or \
+       cache.get('path') != os.path.abspath(config_path) or \
+       not isinstance(cache.get('versions'), list) or \
+       not isinstance(cache.get('config'), dict):
+        return False
+
+    for entry in cache['versions']:
+        if not isinstance(entry, list) or len(entry) != 2 or \
+           not isinstance(entry[0], str) or \
+           _file_version(entry[0]) != entry[1]:
+            return False
+
+    return True
+
+
+def _load_yaml_cache(config_path):
+    """ Returns the cached configuration if it is up to date. """
+    try:
+        with open(yaml_cache_path(config_path), encoding='utf-8') as inp:
+            cache = json.load(inp)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        _LOGGER.warning('Ignoring invalid configuration cache for %s',
+                        config_path)
+        return None
+
+    if not _valid_yaml_cache(config_path, cache):
+        return None
+
+    return cache['config']
+
+
+def _save_yaml_cache(config_path, included, conf_dict):
+    """
+    Stores the parsed configuration and the version of its files. Only
+    configurations that JSON represents exactly are stored.
+    """
+    try:
+        data = json.dumps({
+            'path': os.path.abspath(config_path),
+            'versions': [[fname, _file_version(fname)]
+                         for fname in included],
+            'config': conf_dict,
+        })
+    except (TypeError, ValueError):
+        # Values like dates are not supported by JSON
+        return
+
+    # Keys that are not strings are converted by JSON
+    if json.loads(data)['config'] != conf_dict:
+        return
+
+    try:
+        with open(yaml_cache_path(config_path), 'w',
+                  encoding='utf-8') as outp:
+            outp.write(data)
+    except OSError:
+        _LOGGER.warning('Unable to write configuration cache for %s',
+                        config_path)
@@ -16,6 +16,7 @@ CONF_TEMPERATURE_UNIT = "temperature_unit"
 CONF_NAME = "name"
 CONF_TIME_ZONE = "time_zone"
 CONF_CUSTOMIZE = "customize"
+CONF_SETUP_WORKERS = "setup_workers"
 
 CONF_PLATFORM = "platform"
 CONF_HOST = "host"
@@ -27,6 +28,9 @@ CONF_ACCESS_TOKEN = "access_token"
 
 CONF_VALUE_TEMPLATE = "value_template"
 
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_ADAPTIVE_SCAN = "adaptive_scan"
+
 # #### EVENTS ####
 EVENT_HOMEASSISTANT_START = "homeassistant_start"
 EVENT_HOMEASSISTANT_STOP = "homeassistant_stop"
@@ -172,6 +176,7 @@ URL_API_TEMPLATE = "/api/template"
 HTTP_OK = 200
 HTTP_CREATED = 201
 HTTP_MOVED_PERMANENTLY = 301
+HTTP_NOT_MODIFIED = 304
 HTTP_BAD_REQUEST = 400
 HTTP_UNAUTHORIZED = 401
 HTTP_NOT_FOUND = 404
@@ -180,6 +185,7 @@ HTTP_UNPROCESSABLE_ENTITY = 422
 HTTP_INTERNAL_SERVER_ERROR = 500
 
 HTTP_HEADER_HA_AUTH = "X-HA-access"
+HTTP_HEADER_ACCEPT = "Accept"
 HTTP_HEADER_ACCEPT_ENCODING = "Accept-Encoding"
 HTTP_HEADER_CONTENT_TYPE = "Content-type"
 HTTP_HEADER_CONTENT_ENCODING = "Content-Encoding"
@@ -187,6 +193,9 @@ HTTP_HEADER_VARY = "Vary"
 HTTP_HEADER_CONTENT_LENGTH = "Content-Length"
 HTTP_HEADER_CACHE_CONTROL = "Cache-Control"
 HTTP_HEADER_EXPIRES = "Expires"
+HTTP_HEADER_ETAG = "ETag"
+HTTP_HEADER_IF_NONE_MATCH = "If-None-Match"
+HTTP_HEADER_LAST_MODIFIED = "Last-Modified"
 
 CONTENT_TYPE_JSON = "application/json"
 CONTENT_TYPE_MULTIPART = 'multipart/x-mixed-replace; boundary={}'
@@ -8,13 +8,14 @@ of entities and react to changes.
 
 import os
 import time
+import json
 import logging
 import signal
 import threading
 import enum
 import re
 import functools as ft
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 from homeassistant.const import (
     __version__, EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP,
@@ -38,6 +39,9 @@ TIMER_INTERVAL = 1  # seconds
 # How long we wait for the result of a service call
 SERVICE_CALL_LIMIT = 10  # seconds
 
+# Number of removed entities remembered for changed_since
+REMOVED_HISTORY_SIZE = 1000
+
 # Define number of MINIMUM worker threads.
 # During bootstrap of HA (see bootstrap._setup_component()) worker threads
 # will be added for each component that polls devices.
@@ -338,7 +342,7 @@ class State(object):
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated']
+                 'last_changed', 'last_updated', '_json']
 
     # pylint: disable=too-many-arguments
     def __init__(self, entity_id, state, attributes=None, last_changed=None,
@@ -361,6 +365,8 @@ class State(object):
         self.last_changed = dt_util.strip_microseconds(
             last_changed or self.last_updated)
 
+        self._json = None
+
     @property
     def domain(self):
         """ Returns domain of this state. """
@@ -394,6 +400,19 @@ class State(object):
                 'last_changed': dt_util.datetime_to_str(self.last_changed),
                 'last_updated': dt_util.datetime_to_str(self.last_updated)}
 
+    def as_json(self):
+        """ Returns the compact JSON representation of as_dict.
+
+        The result is cached because states are not changed after they have
+        been set in the state machine. Copies start without a cache. """
+        if self._json is None:
+            from homeassistant.remote import JSONEncoder
+
+            self._json = json.dumps(self.as_dict(), sort_keys=True,
+                                    separators=(',', ':'), cls=JSONEncoder)
+
+        return self._json
+
     @classmethod
     def from_dict(cls, json_dict):
         """ Static method to create a state from a dict.
@@ -433,12 +452,29 @@ class State(object):
 
 
 class StateMachine(object):
-    """ Helper class that tracks the state of different entities. """
+    """
+    Helper class that tracks the state of different entities.
+
+    Every change increases the revision of the state machine. Revisions start
+    at the time of creation in milliseconds so revisions of a previous run
+    are not mistaken for revisions of this run. The revision of a change is
+    passed as revision in the data of its state_changed event.
+
+    Only the last REMOVED_HISTORY_SIZE removals are remembered, changes since
+    older revisions are unknown.
+    """
 
     def __init__(self, bus):
         self._states = {}
         self._bus = bus
         self._lock = threading.Lock()
+        self._first_revision = self._revision = int(time.time() * 1000)
+        # Revision of the last change per entity id
+        self._revisions = {}
+        # Revision of the removal per entity id, oldest first
+        self._removed = OrderedDict()
+        # Oldest revision for which all removals are known
+        self._removed_since = self._first_revision
 
     def entity_ids(self, domain_filter=None):
         """ List of entity ids that are being tracked. """
@@ -455,6 +491,13 @@ class StateMachine(object):
         with self._lock:
             return [state.copy() for state in self._states.values()]
 
+    def all_as_json(self):
+        """ Returns a JSON list of all states. """
+        with self._lock:
+            states = list(self._states.values())
+
+        return '[{}]'.format(','.join(state.as_json() for state in states))
+
     def get(self, entity_id):
         """ Returns the state of the specified entity. """
         state = self._states.get(entity_id.lower())
@@ -476,7 +519,44 @@ class StateMachine(object):
         entity_id = entity_id.lower()
 
         with self._lock:
-            return self._states.pop(entity_id, None) is not None
+            if self._states.pop(entity_id, None) is None:
+                return False
+
+            self._revision += 1
+            self._revisions.pop(entity_id)
+            self._removed[entity_id] = self._revision
+
+            if len(self._removed) > REMOVED_HISTORY_SIZE:
+                self._removed_since = self._removed.popitem(last=False)[1]
+
+            return True
+
+    @property
+    def revision(self):
+        """ Revision of the last change of the state machine. """
+        return self._revision
+
+    @property
+    def first_revision(self):
+        """ Revision of the state machine before any change. """
+        return self._first_revision
+
+    def changed_since(self, revision):
+        """ Returns the changes after revision.
+
+        Returns a tuple (current revision, changed states, removed entity
+        ids) or None if revision is not a revision of this state machine or
+        too old to know all removals since. """
+        with self._lock:
+            if (revision != self._first_revision and
+                    not self._removed_since <= revision <= self._revision):
+                return None
+
+            return (self._revision,
+                    [self._states[entity_id].copy() for entity_id, rev
+                     in self._revisions.items() if rev > revision],
+                    [entity_id for entity_id, rev in self._removed.items()
+                     if rev > revision])
 
     def set(self, entity_id, new_state, attributes=None):
         """ Set the state of an entity, add entity if it does not exist.
@@ -506,7 +586,12 @@ class StateMachine(object):
             state = State(entity_id, new_state, attributes, last_changed)
             self._states[entity_id] = state
 
-            event_data = {'entity_id': entity_id, 'new_state': state}
+            self._revision += 1
+            self._revisions[entity_id] = self._revision
+            self._removed.pop(entity_id, None)
+
+            event_data = {'entity_id': entity_id, 'new_state': state,
+                          'revision': self._revision}
 
             if old_state:
                 event_data['old_state'] = old_state
@@ -699,6 +784,10 @@ class Config(object):
         # If True, pip install is skipped for requirements on startup
         self.skip_pip = False
 
+        # Number of threads that set up components and platforms at the same
+        # time on startup. If 0 they are set up one after another.
+        self.setup_workers = 0
+
         # List of loaded components
         self.components = []
 
@@ -38,7 +38,7 @@ def extract_entity_ids(hass, service):
     if isinstance(service_ent_id, str):
         return group.expand_entity_ids(hass, [service_ent_id.lower()])
 
-    return [ent_id for ent_id in group.expand_entity_ids(hass, service_ent_id)]
+    return group.expand_entity_ids(hass, service_ent_id)
 
 
 def validate_config(config, items, logger):
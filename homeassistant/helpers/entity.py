@@ -71,6 +71,14 @@ class Entity(object):
         """ Suggestion if the entity should be hidden from UIs. """
         return False
 
+    @property
+    def scan_interval(self):
+        """
+        Seconds between polls of the entity.
+        None to use the interval of its platform or component.
+        """
+        return None
+
     def update(self):
         """ Retrieve latest state. """
         pass
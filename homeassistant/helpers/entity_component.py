@@ -4,17 +4,23 @@ homeassistant.helpers.entity_component
 
 Provides helpers for components that manage entities.
 """
-from threading import Lock
+from threading import Event, Lock, local
 
-from homeassistant.bootstrap import prepare_setup_platform
+from homeassistant.bootstrap import (
+    prepare_setup_platform, platform_setup_pool)
 from homeassistant.helpers import (
     generate_entity_id, config_per_platform, extract_entity_ids)
-from homeassistant.helpers.event import track_utc_time_change
-from homeassistant.components import group, discovery
-from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.helpers.polling import (
+    PollingScheduler, DEFAULT_POLL_WORKERS, DEFAULT_UPDATE_TIMEOUT)
+from homeassistant.util import convert, profiler
+from homeassistant.const import (
+    ATTR_ENTITY_ID, CONF_SCAN_INTERVAL, CONF_ADAPTIVE_SCAN)
 
 DEFAULT_SCAN_INTERVAL = 15
 
+# Marks the threads of the shared pool that are setting up a platform
+_SETUP_THREAD = local()
+
 
 class EntityComponent(object):
     # pylint: disable=too-many-instance-attributes
@@ -24,7 +30,9 @@ class EntityComponent(object):
     """
     def __init__(self, logger, domain, hass,
                  scan_interval=DEFAULT_SCAN_INTERVAL,
-                 discovery_platforms=None, group_name=None):
+                 discovery_platforms=None, group_name=None,
+                 poll_workers=DEFAULT_POLL_WORKERS,
+                 update_timeout=DEFAULT_UPDATE_TIMEOUT, adaptive_scan=False):
         self.logger = logger
         self.hass = hass
 
@@ -33,10 +41,13 @@ class EntityComponent(object):
         self.scan_interval = scan_interval
         self.discovery_platforms = discovery_platforms
         self.group_name = group_name
+        self.poll_workers = poll_workers
+        self.update_timeout = update_timeout
+        self.adaptive_scan = adaptive_scan
 
         self.entities = {}
         self.group = None
-        self.is_polling = False
+        self.poller = None
 
         self.config = None
         self.lock = Lock()
@@ -50,19 +61,41 @@ class EntityComponent(object):
         self.config = config
 
         # Look in config for Domain, Domain 2, Domain 3 etc and load them
-        for p_type, p_config in \
-                config_per_platform(config, self.domain, self.logger):
+        platforms = list(config_per_platform(config, self.domain, self.logger))
+        pool = platform_setup_pool(self.hass)
 
-            self._setup_platform(p_type, p_config)
+        # A platform job waiting on the pool it runs in could deadlock it
+        if (pool is not None and len(platforms) > 1 and
+                not getattr(_SETUP_THREAD, 'active', False)):
+            # Set up the platforms concurrently and wait till all are done
+            done = []
+
+            for p_type, p_config in platforms:
+                done.append(Event())
+                pool.add_job(0, (self._setup_platform_job,
+                                 (p_type, p_config, done[-1])))
+
+            for event in done:
+                event.wait()
+
+        else:
+            for p_type, p_config in platforms:
+                self._setup_platform(p_type, p_config)
 
         if self.discovery_platforms:
+            # Only import discovery when it is used
+            from homeassistant.components import discovery
+
             discovery.listen(self.hass, self.discovery_platforms.keys(),
                              self._entity_discovered)
 
-    def add_entities(self, new_entities):
+    def add_entities(self, new_entities, scan_interval=None, adaptive=None):
         """
         Takes in a list of new entities. For each entity will see if it already
         exists. If not, will add it, set it up and push the first state.
+        Entities that should be polled are polled every scan_interval seconds
+        unless they specify their own scan interval. If adaptive is True
+        polling backs off while their state does not change.
         """
         with self.lock:
             for entity in new_entities:
@@ -81,22 +114,27 @@ class EntityComponent(object):
                 entity.update_ha_state()
 
             if self.group is None and self.group_name is not None:
+                # Only import group when it is used
+                from homeassistant.components import group
+
                 self.group = group.Group(self.hass, self.group_name,
                                          user_defined=False)
 
             if self.group is not None:
                 self.group.update_tracked_entity_ids(self.entities.keys())
 
-            if self.is_polling or \
-               not any(entity.should_poll for entity
-                       in self.entities.values()):
-                return
+            for entity in new_entities:
+                if entity is None or not entity.should_poll:
+                    continue
 
-            self.is_polling = True
+                if self.poller is None:
+                    self.poller = PollingScheduler(
+                        self.hass, self.logger, self.scan_interval,
+                        self.poll_workers, self.update_timeout)
 
-            track_utc_time_change(
-                self.hass, self._update_entity_states,
-                second=range(0, 60, self.scan_interval))
+                self.poller.add(
+                    entity, scan_interval,
+                    self.adaptive_scan if adaptive is None else adaptive)
 
     def extract_from_service(self, service):
         """
@@ -111,18 +149,16 @@ class EntityComponent(object):
                     in extract_entity_ids(self.hass, service)
                     if entity_id in self.entities]
 
-    def _update_entity_states(self, now):
-        """ Update the states of all the entities. """
-        with self.lock:
-            # We copy the entities because new entities might be detected
-            # during state update causing deadlocks.
-            entities = list(entity for entity in self.entities.values()
-                            if entity.should_poll)
-
-        self.logger.info("Updating %s entities", self.domain)
+    def _setup_platform_job(self, platform):
+        """ Sets up a platform given as a (type, config, done) tuple. """
+        p_type, p_config, done = platform
+        _SETUP_THREAD.active = True
 
-        for entity in entities:
-            entity.update_ha_state(True)
+        try:
+            self._setup_platform(p_type, p_config)
+        finally:
+            _SETUP_THREAD.active = False
+            done.set()
 
     def _entity_discovered(self, service, info):
         """ Called when a entity is discovered. """
@@ -140,13 +176,25 @@ class EntityComponent(object):
         if platform is None:
             return
 
+        platform_name = '{}.{}'.format(self.domain, platform_type)
+
+        # Platforms can override the scan interval of the component
+        scan_interval = convert(platform_config.get(CONF_SCAN_INTERVAL), int,
+                                getattr(platform, 'SCAN_INTERVAL', None))
+        adaptive = platform_config.get(CONF_ADAPTIVE_SCAN)
+
+        def add_entities(new_entities):
+            """ Adds entities with the polling settings of the platform. """
+            self.add_entities(new_entities, scan_interval, adaptive)
+
         try:
-            platform.setup_platform(
-                self.hass, platform_config, self.add_entities, discovery_info)
+            with profiler.phase(platform_name, profiler.CATEGORY_SETUP):
+                platform.setup_platform(
+                    self.hass, platform_config, add_entities,
+                    discovery_info)
         except Exception:  # pylint: disable=broad-except
             self.logger.exception(
                 'Error while setting up platform %s', platform_type)
             return
 
-        platform_name = '{}.{}'.format(self.domain, platform_type)
         self.hass.config.components.append(platform_name)
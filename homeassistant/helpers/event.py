@@ -18,14 +18,14 @@ def track_state_change(hass, entity_ids, action, from_state=None,
     Returns the listener that listens on the bus for EVENT_STATE_CHANGED.
     Pass the return value into hass.bus.remove_listener to remove it.
     """
-    from_state = _process_match_param(from_state)
-    to_state = _process_match_param(to_state)
+    from_state = process_match_param(from_state)
+    to_state = process_match_param(to_state)
 
-    # Ensure it is a lowercase list with entity ids we want to match on
+    # Ensure it is a lowercase set with entity ids we want to match on
     if isinstance(entity_ids, str):
-        entity_ids = (entity_ids.lower(),)
+        entity_ids = frozenset((entity_ids.lower(),))
     else:
-        entity_ids = tuple(entity_id.lower() for entity_id in entity_ids)
+        entity_ids = frozenset(entity_id.lower() for entity_id in entity_ids)
 
     @ft.wraps(action)
     def state_change_listener(event):
@@ -38,8 +38,8 @@ def track_state_change(hass, entity_ids, action, from_state=None,
         else:
             old_state = None
 
-        if _matcher(old_state, from_state) and \
-           _matcher(event.data['new_state'].state, to_state):
+        if matcher(old_state, from_state) and \
+           matcher(event.data['new_state'].state, to_state):
 
             action(event.data['entity_id'],
                    event.data.get('old_state'),
@@ -110,7 +110,7 @@ def track_utc_time_change(hass, action, year=None, month=None, day=None,
         hass.bus.listen(EVENT_TIME_CHANGED, time_change_listener)
         return time_change_listener
 
-    pmp = _process_match_param
+    pmp = process_match_param
     year, month, day = pmp(year), pmp(month), pmp(day)
     hour, minute, second = pmp(hour), pmp(minute), pmp(second)
 
@@ -122,7 +122,7 @@ def track_utc_time_change(hass, action, year=None, month=None, day=None,
         if local:
             now = dt_util.as_local(now)
 
-        mat = _matcher
+        mat = matcher
 
         # pylint: disable=too-many-boolean-expressions
         if mat(now.year, year) and \
@@ -146,7 +146,7 @@ def track_time_change(hass, action, year=None, month=None, day=None,
                           local=True)
 
 
-def _process_match_param(parameter):
+def process_match_param(parameter):
     """ Wraps parameter in a tuple if it is not one and returns it. """
     if parameter is None or parameter == MATCH_ALL:
         return MATCH_ALL
@@ -156,7 +156,7 @@ def _process_match_param(parameter):
         return tuple(parameter)
 
 
-def _matcher(subject, pattern):
+def matcher(subject, pattern):
     """ Returns True if subject matches the pattern.
 
     Pattern is either a tuple of allowed subjects or a `MATCH_ALL`.
@@ -0,0 +1,291 @@
+"""
+homeassistant.helpers.polling
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Provides a scheduler that polls entities for new state.
+
+Updates are spread over the scan interval and run concurrently on a small
+pool of worker threads so that one slow entity does not delay the others.
+All schedulers of a Home Assistant instance share one pool.
+"""
+from datetime import timedelta
+import heapq
+import itertools
+import threading
+import time
+import weakref
+
+from homeassistant.core import create_worker_pool
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.helpers.event import track_utc_time_change
+import homeassistant.util.dt as dt_util
+
+DEFAULT_POLL_WORKERS = 4
+
+# Seconds after which an update is considered to hang
+DEFAULT_UPDATE_TIMEOUT = 10
+
+# Adaptive polling backs off up to this many times the scan interval
+ADAPTIVE_MAX_FACTOR = 8
+
+# Fraction used to spread the first updates of entities over the interval
+_SPREAD = 0.618033988749895
+
+# Worker pool and schedulers per Home Assistant instance
+_POOLS = weakref.WeakKeyDictionary()
+_SCHEDULERS = weakref.WeakKeyDictionary()
+_POOLS_LOCK = threading.Lock()
+
+
+def _register(scheduler):
+    """ Registers a scheduler to be stopped with the pool of its hass. """
+    hass = scheduler.hass
+
+    with _POOLS_LOCK:
+        if hass not in _SCHEDULERS:
+            _SCHEDULERS[hass] = weakref.WeakSet()
+
+            def stop_pool(event):
+                """ Stops the schedulers and the pool of hass. """
+                with _POOLS_LOCK:
+                    schedulers = list(_SCHEDULERS.get(hass, []))
+
+                # Schedulers do not use the pool after they are stopped
+                for sched in schedulers:
+                    sched.stop()
+
+                with _POOLS_LOCK:
+                    pool = _POOLS.pop(hass, None)
+
+                # Do not wait for updates that hang
+                if pool is not None:
+                    pool.stop(False)
+
+            hass.bus.listen_once(EVENT_HOMEASSISTANT_STOP, stop_pool)
+
+        _SCHEDULERS[hass].add(scheduler)
+
+
+def _get_pool(hass, workers):
+    """ Returns the pool of hass with at least workers threads. """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(hass)
+
+        if pool is None:
+            pool = _POOLS[hass] = create_worker_pool(workers)
+
+        while pool.worker_count < workers:
+            pool.add_worker()
+
+        return pool
+
+
+class PolledEntity(object):
+    """ Holds the polling state of an entity. """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, entity, scan_interval, adaptive):
+        self.entity = entity
+        self.scan_interval = scan_interval
+        self.interval = scan_interval
+        self.adaptive = adaptive
+        # Planned time of the last update and version of the schedule entry
+        self.planned = None
+        self.version = 0
+
+
+class PollingScheduler(object):
+    """
+    Polls entities every scan_interval seconds. An entity is skipped if its
+    previous update is still running. If an update takes longer than timeout
+    seconds a worker is added to the pool to replace the blocked one.
+
+    Entities with adaptive polling are polled half as often after every
+    update that did not change their state, up to ADAPTIVE_MAX_FACTOR times
+    their scan interval, and at their scan interval again once it changes.
+    """
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+
+    def __init__(self, hass, logger, scan_interval,
+                 workers=DEFAULT_POLL_WORKERS, timeout=DEFAULT_UPDATE_TIMEOUT):
+        self.hass = hass
+        self.logger = logger
+        self.scan_interval = scan_interval
+        self.workers = workers
+        self.timeout = timeout
+
+        # Duration in seconds of the last update per entity id
+        self.durations = {}
+        # Number of updates skipped because the previous one was running
+        self.skipped = {}
+        # Number of updates that took longer than timeout
+        self.timeouts = {}
+
+        self._entities = {}
+        self._schedule = []
+        self._order = itertools.count()
+        self._running = {}
+        self._timed_out = set()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._stopped = False
+
+        track_utc_time_change(hass, self._tick)
+        _register(self)
+
+    def add(self, entity, scan_interval=None, adaptive=False):
+        """
+        Starts polling entity. The scan interval of the entity takes
+        precedence over scan_interval, which defaults to the scan interval
+        of the scheduler.
+        """
+        interval = getattr(entity, 'scan_interval', None) or \
+            scan_interval or self.scan_interval
+
+        with self._lock:
+            if entity.entity_id in self._entities:
+                return
+
+            polled = PolledEntity(entity, interval, adaptive)
+            self._entities[entity.entity_id] = polled
+
+            offset = (len(self._entities) * _SPREAD) % 1 * interval
+
+            self._plan(polled, dt_util.utcnow() + timedelta(seconds=offset))
+
+    def remove(self, entity_id):
+        """ Stops polling an entity. """
+        with self._lock:
+            self._entities.pop(entity_id, None)
+
+    def interval(self, entity_id):
+        """ Returns the current seconds between polls of an entity. """
+        with self._lock:
+            polled = self._entities.get(entity_id)
+
+            return None if polled is None else polled.interval
+
+    def block_till_done(self):
+        """ Blocks till all running updates are done. """
+        if self._pool is not None:
+            self._pool.block_till_done()
+
+    def _plan(self, polled, point_in_time):
+        """ Plans the next update of an entity. """
+        polled.version += 1
+
+        heapq.heappush(self._schedule, (
+            point_in_time, next(self._order), polled.entity.entity_id,
+            polled.version))
+
+    def _tick(self, now):
+        """ Starts the updates that are due. """
+        due = []
+
+        with self._lock:
+            if self._stopped:
+                return
+
+            while self._schedule and self._schedule[0][0] <= now:
+                planned, _, entity_id, version = \
+                    heapq.heappop(self._schedule)
+                polled = self._entities.get(entity_id)
+
+                # Entity is removed or its update has been planned again
+                if polled is None or polled.version != version:
+                    continue
+
+                next_update = planned + timedelta(seconds=polled.interval)
+
+                # Do not try to catch up if we fell behind
+                if next_update <= now:
+                    next_update = now + timedelta(seconds=polled.interval)
+
+                self._plan(polled, next_update)
+
+                if entity_id in self._running:
+                    self.skipped[entity_id] = \
+                        self.skipped.get(entity_id, 0) + 1
+                    self.logger.debug(
+                        'Skipping update of %s, previous update is running',
+                        entity_id)
+                    continue
+
+                polled.planned = planned
+                self._running[entity_id] = time.time()
+                due.append(polled)
+
+            if due and self._pool is None:
+                self._pool = _get_pool(self.hass, self.workers)
+
+            for polled in due:
+                self._pool.add_job(0, (self._update, polled))
+
+            self._check_timeouts()
+
+    def _check_timeouts(self):
+        """ Replaces workers that are blocked by updates that hang. """
+        limit = time.time() - self.timeout
+
+        for entity_id, start in self._running.items():
+            if start > limit or entity_id in self._timed_out:
+                continue
+
+            self._timed_out.add(entity_id)
+            self.timeouts[entity_id] = self.timeouts.get(entity_id, 0) + 1
+            self._pool.add_worker()
+
+            self.logger.warning(
+                'Update of %s is taking longer than %d seconds',
+                entity_id, self.timeout)
+
+    def _update(self, polled):
+        """ Updates an entity and records how long it took. """
+        entity_id = polled.entity.entity_id
+        old_state = self.hass.states.get(entity_id)
+        changed = False
+
+        try:
+            polled.entity.update_ha_state(True)
+
+            changed = self.hass.states.get(entity_id) != old_state
+        finally:
+            with self._lock:
+                self.durations[entity_id] = \
+                    time.time() - self._running.pop(entity_id)
+
+                if polled.adaptive:
+                    self._adapt(polled, changed)
+
+                if entity_id in self._timed_out:
+                    self._timed_out.remove(entity_id)
+
+                    if not self._stopped:
+                        self._pool.remove_worker()
+
+    def _adapt(self, polled, changed):
+        """ Adapts the interval of an entity to how often it changes. """
+        if changed:
+            interval = polled.scan_interval
+        else:
+            interval = min(polled.interval * 2,
+                           polled.scan_interval * ADAPTIVE_MAX_FACTOR)
+
+        if interval == polled.interval:
+            return
+
+        polled.interval = interval
+
+        self.logger.debug('Polling %s every %d seconds',
+                          polled.entity.entity_id, interval)
+
+        self._plan(polled, max(polled.planned + timedelta(seconds=interval),
+                               dt_util.utcnow()))
+
+    def stop(self):
+        """ Stops polling entities. Running updates are not waited for. """
+        # The pool is only used while holding the lock and not after
+        # stopping, so the pool can be stopped once this returns.
+        with self._lock:
+            self._stopped = True
+            self._entities.clear()
@@ -12,13 +12,21 @@ If you want to retrieve a platform that is part of a component, you should
 call get_component('switch.your_platform'). In both cases the config directory
 is checked to see if it contains a user provided version. If not available it
 will check the built-in components and platforms.
+
+To resolve the load order without importing every component, the
+dependencies of components are parsed from their source into a manifest
+that is cached in the config directory.
 """
+import ast
 import os
 import sys
 import pkgutil
 import importlib
+import json
 import logging
 
+from homeassistant.util import profiler
+
 from homeassistant.util import OrderedSet
 
 PREPARED = False
@@ -29,17 +37,41 @@ AVAILABLE_COMPONENTS = []
 # Dict of loaded components mapped name => module
 _COMPONENT_CACHE = {}
 
+# File in the config dir that caches the manifest between runs
+MANIFEST_FILE = '.components.json'
+
+# Dict of components mapped name => manifest entry. An entry holds the
+# dependencies parsed from the source of the component and the path and
+# mtime of that source to detect changes.
+_MANIFEST = {}
+
+# Path the manifest is stored at, None if it is not stored
+_MANIFEST_PATH = None
+
+# Directories to find the source of components mapped prefix => dir
+_COMPONENT_DIRS = []
+
+# If the manifest has changed since it was loaded
+_MANIFEST_CHANGED = False
+
+# Components that are loaded before all others, in this order
+LOAD_FIRST = ('logger', 'recorder', 'introduction')
+
 _LOGGER = logging.getLogger(__name__)
 
 
 def prepare(hass):
     """ Prepares the loading of components. """
-    global PREPARED  # pylint: disable=global-statement
+    global PREPARED, _MANIFEST_PATH  # pylint: disable=global-statement
 
     # Load the built-in components
     import homeassistant.components as components
 
     AVAILABLE_COMPONENTS.clear()
+    _COMPONENT_DIRS.clear()
+
+    _COMPONENT_DIRS.append(
+        ('homeassistant.components.', components.__path__[0]))
 
     AVAILABLE_COMPONENTS.extend(
         item[1] for item in
@@ -52,6 +84,9 @@ def prepare(hass):
         # Ensure we can load custom components using Pythons import
         sys.path.insert(0, hass.config.config_dir)
 
+        # Custom components take precedence over built-in components
+        _COMPONENT_DIRS.insert(0, ('custom_components.', custom_path))
+
         # We cannot use the same approach as for built-in components because
         # custom components might only contain a platform for a component.
         # ie custom_components/switch/some_platform.py. Using pkgutil would
@@ -70,6 +105,9 @@ def prepare(hass):
                 AVAILABLE_COMPONENTS.append(
                     'custom_components.{}'.format(fil[0:-3]))
 
+    _MANIFEST_PATH = hass.config.path(MANIFEST_FILE)
+    _load_manifest()
+
     PREPARED = True
 
 
@@ -112,7 +150,8 @@ def get_component(comp_name):
             continue
 
         try:
-            module = importlib.import_module(path)
+            with profiler.phase(comp_name, profiler.CATEGORY_IMPORT):
+                module = importlib.import_module(path)
 
             # In Python 3 you can import files from directories that do not
             # contain the file __init__.py. A directory is a valid module if
@@ -144,6 +183,157 @@ def get_component(comp_name):
     return None
 
 
+def get_manifest(comp_name):
+    """
+    Returns a dict with the dependencies of a component without importing
+    it. Returns None if they can not be determined from its source, in
+    which case the component has to be imported.
+    """
+    global _MANIFEST_CHANGED  # pylint: disable=global-statement
+
+    if comp_name in _COMPONENT_CACHE:
+        component = _COMPONENT_CACHE[comp_name]
+
+        return {
+            'dependencies': list(getattr(component, 'DEPENDENCIES', [])),
+        }
+
+    source = _component_source(comp_name)
+
+    if source is None:
+        return None
+
+    try:
+        mtime = os.path.getmtime(source)
+    except OSError:
+        return None
+
+    entry = _MANIFEST.get(comp_name)
+
+    if entry is None or entry['path'] != source or entry['mtime'] != mtime:
+        entry = _parse_manifest(source)
+
+        if entry is None:
+            return None
+
+        entry['path'] = source
+        entry['mtime'] = mtime
+        _MANIFEST[comp_name] = entry
+        _MANIFEST_CHANGED = True
+
+    if entry.get('dependencies') is None:
+        return None
+
+    return entry
+
+
+def get_dependencies(comp_name):
+    """
+    Returns the dependencies of a component, importing it only if they
+    can not be determined from its source. Returns None if the component
+    does not exist.
+    """
+    manifest = get_manifest(comp_name)
+
+    if manifest is not None:
+        return manifest['dependencies']
+
+    component = get_component(comp_name)
+
+    if component is None:
+        return None
+
+    return list(getattr(component, 'DEPENDENCIES', []))
+
+
+def save_manifest():
+    """ Stores the manifest in the config dir if it has changed. """
+    global _MANIFEST_CHANGED  # pylint: disable=global-statement
+
+    if not _MANIFEST_CHANGED or _MANIFEST_PATH is None:
+        return
+
+    try:
+        with open(_MANIFEST_PATH, 'w') as outp:
+            json.dump(dict(_MANIFEST), outp)
+
+        _MANIFEST_CHANGED = False
+    except OSError:
+        _LOGGER.warning('Unable to store component manifest in %s',
+                        _MANIFEST_PATH)
+
+
+def _load_manifest():
+    """ Loads the manifest stored in the config dir. """
+    global _MANIFEST_CHANGED  # pylint: disable=global-statement
+
+    _MANIFEST.clear()
+    _MANIFEST_CHANGED = False
+
+    if not os.path.isfile(_MANIFEST_PATH):
+        return
+
+    try:
+        with open(_MANIFEST_PATH) as inp:
+            manifest = json.load(inp)
+    except (OSError, ValueError):
+        _LOGGER.warning('Ignoring invalid component manifest %s',
+                        _MANIFEST_PATH)
+        return
+
+    if isinstance(manifest, dict):
+        _MANIFEST.update(manifest)
+
+
+def _component_source(comp_name):
+    """ Returns the path to the source of a component or None. """
+    # Platforms are only known to their component
+    if '.' in comp_name:
+        return None
+
+    for prefix, directory in _COMPONENT_DIRS:
+        if prefix + comp_name not in AVAILABLE_COMPONENTS:
+            continue
+
+        for source in (os.path.join(directory, comp_name + '.py'),
+                       os.path.join(directory, comp_name, '__init__.py')):
+            if os.path.isfile(source):
+                return source
+
+    return None
+
+
+def _parse_manifest(source):
+    """
+    Parses DEPENDENCIES from the source of a component. The value is None
+    if it is not a literal list. Returns None if the source can not be
+    parsed.
+    """
+    try:
+        with open(source, 'rb') as inp:
+            tree = ast.parse(inp.read(), source)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    entry = {'dependencies': []}
+
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+
+        for target in node.targets:
+            if not isinstance(target, ast.Name) or \
+               target.id != 'DEPENDENCIES':
+                continue
+
+            try:
+                entry['dependencies'] = list(ast.literal_eval(node.value))
+            except (ValueError, TypeError):
+                entry['dependencies'] = None
+
+    return entry
+
+
 def load_order_components(components):
     """
     Takes in a list of components we want to load:
@@ -167,7 +357,7 @@ def load_order_components(components):
         load_order.update(comp_load_order)
 
     # Push some to first place in load order
-    for comp in ('logger', 'recorder', 'introduction'):
+    for comp in LOAD_FIRST:
         if comp in load_order:
             load_order.promote(comp)
 
@@ -185,15 +375,15 @@ def load_order_component(comp_name):
 
 def _load_order_component(comp_name, load_order, loading):
     """ Recursive function to get load order of components. """
-    component = get_component(comp_name)
+    dependencies = get_dependencies(comp_name)
 
     # if None it does not exist, error already thrown by get_component
-    if component is None:
+    if dependencies is None:
         return OrderedSet()
 
     loading.add(comp_name)
 
-    for dependency in getattr(component, 'DEPENDENCIES', []):
+    for dependency in dependencies:
         # Check not already loaded
         if dependency in load_order:
             continue
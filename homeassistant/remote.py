@@ -10,7 +10,9 @@ HomeAssistantError will be raised.
 For more details about the Python API, please refer to the documentation at
 https://home-assistant.io/developers/python_api/
 """
+import collections
 import threading
+import time
 import logging
 import json
 import enum
@@ -31,6 +33,25 @@ METHOD_GET = "get"
 METHOD_POST = "post"
 METHOD_DELETE = "delete"
 
+# Retries of requests that could not connect to the API
+API_RETRIES = 3
+# Seconds to wait per attempt to connect to and for a response of the API
+API_CONNECT_TIMEOUT = 2
+API_TIMEOUT = 5
+
+# Events queued per target of the EventForwarder before events are dropped
+FORWARD_QUEUE_SIZE = 1000
+# Maximum number of events the EventForwarder sends in one request
+FORWARD_BATCH_SIZE = 100
+FORWARD_DROP_OLDEST = "drop_oldest"
+FORWARD_DROP_NEWEST = "drop_newest"
+# Seconds to wait before retrying events that failed, doubled per failure
+FORWARD_RETRY_WAIT = 1
+FORWARD_MAX_RETRY_WAIT = 60
+
+# Seconds a mirror waits for missed revisions before it synchronizes
+MIRROR_RESYNC_DELAY = 1
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -48,7 +69,10 @@ class APIStatus(enum.Enum):
 
 
 class API(object):
-    """ Object to pass around Home Assistant API location and credentials. """
+    """
+    Object to pass around Home Assistant API location and credentials.
+    Calls are made using a session that keeps connections to the API open.
+    """
     # pylint: disable=too-few-public-methods
 
     def __init__(self, host, api_password=None, port=None, use_ssl=False):
@@ -60,10 +84,16 @@ class API(object):
         else:
             self.base_url = "http://{}:{}".format(host, self.port)
         self.status = None
-        self._headers = {}
+        self._session = requests.Session()
+        # Only retry requests that did not reach the API, a request that
+        # timed out waiting for a response is not sent again
+        self._session.mount(
+            self.base_url, requests.adapters.HTTPAdapter(
+                max_retries=requests.adapters.Retry(
+                    total=API_RETRIES, read=False)))
 
         if api_password is not None:
-            self._headers[HTTP_HEADER_HA_AUTH] = api_password
+            self._session.headers[HTTP_HEADER_HA_AUTH] = api_password
 
     def validate_api(self, force_validate=False):
         """ Tests if we can communicate with the API. """
@@ -81,11 +111,13 @@ class API(object):
 
         try:
             if method == METHOD_GET:
-                return requests.get(
-                    url, params=data, timeout=5, headers=self._headers)
+                return self._session.get(
+                    url, params=data,
+                    timeout=(API_CONNECT_TIMEOUT, API_TIMEOUT))
             else:
-                return requests.request(
-                    method, url, data=data, timeout=5, headers=self._headers)
+                return self._session.request(
+                    method, url, data=data,
+                    timeout=(API_CONNECT_TIMEOUT, API_TIMEOUT))
 
         except requests.exceptions.ConnectionError:
             _LOGGER.exception("Error connecting to server")
@@ -96,6 +128,10 @@ class API(object):
             _LOGGER.exception(error)
             raise HomeAssistantError(error)
 
+    def close(self):
+        """ Closes the connections to the API. """
+        self._session.close()
+
     def __repr__(self):
         return "API({}, {}, {})".format(
             self.host, self.api_password, self.port)
@@ -179,11 +215,24 @@ class EventBus(ha.EventBus):
 
 
 class EventForwarder(object):
-    """ Listens for events and forwards to specified APIs. """
+    """
+    Listens for events and forwards to specified APIs.
+
+    Events are queued per target and sent in batches by a thread of the
+    target so a slow target does not block the event bus. If the queue of a
+    target is full, events are dropped according to the overflow policy.
+    Events that could not be sent are queued again and retried.
+    """
 
-    def __init__(self, hass, restrict_origin=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, hass, restrict_origin=None,
+                 queue_size=FORWARD_QUEUE_SIZE, batch_size=FORWARD_BATCH_SIZE,
+                 overflow=FORWARD_DROP_OLDEST):
         self.hass = hass
         self.restrict_origin = restrict_origin
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.overflow = overflow
 
         # We use a tuple (host, port) as key to ensure
         # that we do not forward to the same host twice
@@ -204,44 +253,217 @@ class EventForwarder(object):
 
             key = (api.host, api.port)
 
-            self._targets[key] = api
+            if key in self._targets:
+                self._targets[key].stop()
+
+            self._targets[key] = ForwardingTarget(
+                api, self.queue_size, self.batch_size, self.overflow)
 
     def disconnect(self, api):
         """ Removes target from being forwarded to. """
         with self._lock:
             key = (api.host, api.port)
 
-            did_remove = self._targets.pop(key, None) is None
+            target = self._targets.pop(key, None)
+
+            if target is not None:
+                target.stop()
 
             if len(self._targets) == 0:
                 # Remove event listener if no forwarding targets present
                 self.hass.bus.remove_listener(ha.MATCH_ALL,
                                               self._event_listener)
 
-            return did_remove
+            return target is None
+
+    def metrics(self):
+        """ Returns the forwarding metrics per target as a dict. """
+        with self._lock:
+            return {"{}:{}".format(*key): target.metrics()
+                    for key, target in self._targets.items()}
+
+    def block_till_done(self):
+        """ Blocks till all queued events have been sent. """
+        with self._lock:
+            targets = list(self._targets.values())
+
+        for target in targets:
+            target.block_till_done()
 
     def _event_listener(self, event):
         """ Listen and forwards all events. """
+        # We don't forward time events or, if enabled, non-local events
+        if event.event_type == ha.EVENT_TIME_CHANGED or \
+           (self.restrict_origin and event.origin != self.restrict_origin):
+            return
+
         with self._lock:
-            # We don't forward time events or, if enabled, non-local events
-            if event.event_type == ha.EVENT_TIME_CHANGED or \
-               (self.restrict_origin and event.origin != self.restrict_origin):
-                return
+            for target in self._targets.values():
+                target.put(event)
+
+
+class ForwardingTarget(object):
+    """ Queue of events for an API that is sent by its own thread. """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, api, queue_size, batch_size, overflow):
+        self.api = api
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = collections.deque()
+        self._sending = False
+        self._retrying = False
+        # False once the API turns out not to support firing multiple events
+        self._bulk = True
+        self._running = True
+        self._cond = threading.Condition()
+
+        threading.Thread(
+            target=self._run, daemon=True,
+            name="EventForwarder {}:{}".format(api.host, api.port)).start()
+
+    def put(self, event):
+        """ Queues an event to be sent. """
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                self.dropped += 1
+
+                if self.overflow == FORWARD_DROP_NEWEST:
+                    return
+
+                self._queue.popleft()
+
+            self._queue.append(event)
+            self._cond.notify_all()
+
+    def _requeue(self, events):
+        """ Queues events that failed again before the other events. """
+        self._queue.extendleft(reversed(events))
+
+        while len(self._queue) > self.queue_size:
+            self.dropped += 1
+
+            if self.overflow == FORWARD_DROP_NEWEST:
+                self._queue.pop()
+            else:
+                self._queue.popleft()
+
+    def stop(self):
+        """
+        Stops sending events. Queued events are discarded and the connections
+        to the API are closed.
+        """
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def metrics(self):
+        """ Returns the metrics of this target as a dict. """
+        with self._cond:
+            return {
+                'queued': len(self._queue),
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+    def block_till_done(self):
+        """
+        Blocks till all queued events have been sent or sending them failed.
+        """
+        with self._cond:
+            while self._running and not self._retrying and \
+                    (self._queue or self._sending):
+                self._cond.wait()
+
+    def _run(self):
+        """ Sends the queued events in batches. """
+        retry_wait = 0
+
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+
+                if not self._running:
+                    break
+
+                batch = [self._queue.popleft() for _ in
+                         range(min(self.batch_size, len(self._queue)))]
+                self._sending = True
+
+            sent = self._send(batch)
 
-            for api in self._targets.values():
-                fire_event(api, event.event_type, event.data)
+            with self._cond:
+                self._sending = False
+                self.sent += sent
+
+                if sent < len(batch):
+                    self.failed += len(batch) - sent
+                    self._requeue(batch[sent:])
+                    self._retrying = True
+                    retry_wait = min(max(2 * retry_wait, FORWARD_RETRY_WAIT),
+                                     FORWARD_MAX_RETRY_WAIT)
+                else:
+                    self._retrying = False
+                    retry_wait = 0
+
+                self._cond.notify_all()
+
+                if self._retrying:
+                    retry_at = time.monotonic() + retry_wait
+
+                    while self._running and time.monotonic() < retry_at:
+                        self._cond.wait(retry_at - time.monotonic())
+
+        self.api.close()
+
+    def _send(self, batch):
+        """ Sends a batch of events. Returns how many were sent in order. """
+        if self._bulk:
+            success = fire_events(self.api, batch)
+
+            if success is not None:
+                return len(batch) if success else 0
+
+            _LOGGER.info('%s:%s does not support firing multiple events, '
+                         'firing them one by one', self.api.host,
+                         self.api.port)
+            self._bulk = False
+
+        for index, event in enumerate(batch):
+            if not fire_event(self.api, event.event_type, event.data):
+                return index
+
+        return len(batch)
 
 
 class StateMachine(ha.StateMachine):
     """
     Fires set events to an API.
     Uses state_change events to track states.
+
+    Keeps the revision of the remote state machine it is synchronized with
+    so mirror only has to fetch the states that changed since. Events that
+    arrive out of order are buffered. Revisions still missing after
+    MIRROR_RESYNC_DELAY seconds, like those of removals that do not fire
+    events, make it fetch the changes since once.
     """
 
     def __init__(self, bus, api):
         super().__init__(None)
 
         self._api = api
+        self._mirror_revision = None
+        self._incremental = True
+        # Revisions received ahead of a missing revision
+        self._ahead = set()
+        self._resync_timer = None
 
         self.mirror()
 
@@ -252,13 +474,86 @@ class StateMachine(ha.StateMachine):
         set_state(self._api, entity_id, new_state, attributes)
 
     def mirror(self):
-        """ Discards current data and mirrors the remote state machine. """
-        self._states = {state.entity_id: state for state
-                        in get_states(self._api)}
+        """ Synchronizes with the remote state machine.
+
+        Only fetches the changes since the last synchronization unless the
+        remote does not know that revision anymore. """
+        if not self._incremental:
+            self._states = {state.entity_id: state for state
+                            in get_states(self._api)}
+            return
+
+        changes = get_states_since(self._api, self._mirror_revision or 0)
+
+        if changes is None:
+            return
+
+        revision, states, removed, full = changes
+
+        if revision is None:
+            # Remote does not support revisions, stop asking for them
+            self._incremental = False
+
+        with self._lock:
+            if full:
+                self._states = {}
+
+            for entity_id in removed:
+                self._states.pop(entity_id, None)
+
+            for state in states:
+                self._states[state.entity_id] = state
+
+            self._mirror_revision = revision
+
+            if revision is None:
+                self._ahead.clear()
+            else:
+                self._ahead = {rev for rev in self._ahead if rev > revision}
+                self._advance()
+
+    def _advance(self):
+        """ Moves past the buffered revisions that follow the current one. """
+        while self._mirror_revision + 1 in self._ahead:
+            self._mirror_revision += 1
+            self._ahead.remove(self._mirror_revision)
 
     def _state_changed_listener(self, event):
         """ Listens for state changed events and applies them. """
-        self._states[event.data['entity_id']] = event.data['new_state']
+        revision = event.data.get('revision')
+
+        with self._lock:
+            if self._mirror_revision is not None and revision is not None:
+                # Change is already included in the last synchronization
+                if revision <= self._mirror_revision:
+                    return
+
+                # Only move on if no change was missed
+                if revision == self._mirror_revision + 1:
+                    self._mirror_revision = revision
+                    self._advance()
+                else:
+                    self._ahead.add(revision)
+
+                if self._ahead and self._resync_timer is None:
+                    self._resync_timer = threading.Timer(
+                        MIRROR_RESYNC_DELAY, self._resync)
+                    self._resync_timer.daemon = True
+                    self._resync_timer.start()
+
+            self._states[event.data['entity_id']] = event.data['new_state']
+
+    def _resync(self):
+        """ Synchronizes if revisions are still missing. """
+        with self._lock:
+            self._resync_timer = None
+
+            # Missing revisions arrived in the meantime
+            if not self._ahead:
+                return
+
+        # Missed revisions are removals or lost events
+        self.mirror()
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -367,18 +662,53 @@ def get_event_listeners(api):
 
 
 def fire_event(api, event_type, data=None):
-    """ Fire an event at remote API. """
+    """
+    Fire an event at remote API.
+    Returns True if success.
+    """
 
     try:
         req = api(METHOD_POST, URL_API_EVENTS_EVENT.format(event_type), data)
 
         if req.status_code != 200:
-            _LOGGER.error("Error firing event: %d - %d",
+            _LOGGER.error("Error firing event: %d - %s",
                           req.status_code, req.text)
+            return False
+
+        return True
 
     except HomeAssistantError:
         _LOGGER.exception("Error firing event")
 
+        return False
+
+
+def fire_events(api, events):
+    """
+    Fire a list of events at remote API with a single request.
+    Returns True if success, None if the API does not support it.
+    """
+    data = {'events': [{'event_type': event.event_type,
+                        'event_data': event.data} for event in events]}
+
+    try:
+        req = api(METHOD_POST, URL_API_EVENTS, data)
+
+        if req.status_code in (404, 405):
+            return None
+
+        elif req.status_code != 200:
+            _LOGGER.error("Error firing events: %d - %s",
+                          req.status_code, req.text)
+            return False
+        else:
+            return True
+
+    except HomeAssistantError:
+        _LOGGER.exception("Error firing events")
+
+        return False
+
 
 def get_state(api, entity_id):
     """ Queries given API for state of entity_id. """
@@ -415,6 +745,39 @@ def get_states(api):
         return []
 
 
+def get_states_since(api, revision):
+    """
+    Queries given API for the states changed after revision.
+
+    Returns a tuple (revision, changed states, removed entity ids, full) with
+    full True if all states are returned because the revision is not known.
+    If the API does not support revisions all states are returned with
+    revision None. Returns None if not successful.
+    """
+    try:
+        req = api(METHOD_GET,
+                  "{}?since={}".format(URL_API_STATES, revision))
+
+        data = req.json()
+
+        if isinstance(data, list):
+            # APIs without revisions ignore since and return all states
+            _LOGGER.debug("API does not support state revisions")
+
+            return (None, [ha.State.from_dict(item) for item in data],
+                    [], True)
+
+        return (data['revision'],
+                [ha.State.from_dict(item) for item in data['states']],
+                data['removed'], data['full'])
+
+    except (HomeAssistantError, ValueError, KeyError, TypeError):
+        # ValueError if req.json() can't parse the json
+        _LOGGER.exception("Error fetching changed states")
+
+        return None
+
+
 def set_state(api, entity_id, new_state, attributes=None):
     """
     Tells API to update state for entity_id.
@@ -444,6 +807,32 @@ def set_state(api, entity_id, new_state, attributes=None):
         return False
 
 
+def set_states(api, states):
+    """
+    Tells API to update the states of multiple entities with a single
+    request. Returns the new states or None if not successful.
+    """
+    data = {'states': [{'entity_id': state.entity_id,
+                        'state': state.state,
+                        'attributes': state.attributes} for state in states]}
+
+    try:
+        req = api(METHOD_POST, URL_API_STATES, data)
+
+        if req.status_code != 200:
+            _LOGGER.error("Error changing states: %d - %s",
+                          req.status_code, req.text)
+            return None
+
+        return [ha.State.from_dict(item) for item in req.json()]
+
+    except (HomeAssistantError, ValueError):
+        # ValueError if req.json() can't parse the json
+        _LOGGER.exception("Error setting states")
+
+        return None
+
+
 def is_state(api, entity_id, state):
     """ Queries API to see if entity_id is specified state. """
     cur_state = get_state(api, entity_id)
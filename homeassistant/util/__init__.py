@@ -360,14 +360,18 @@ class ThreadPool(object):
         """ Blocks till all work is done. """
         self._work_queue.join()
 
-    def stop(self):
-        """ Stops all the threads. """
+    def stop(self, wait=True):
+        """
+        Stops all the threads. If wait is False, running jobs are not waited
+        for and the workers quit once their job is done.
+        """
         with self._lock:
             if not self.running:
                 return
 
             # Ensure all current jobs finish
-            self.block_till_done()
+            if wait:
+                self.block_till_done()
 
             # Tell the workers to quit
             for _ in range(self.worker_count):
@@ -376,7 +380,8 @@ class ThreadPool(object):
             self.running = False
 
             # Wait till all workers have quit
-            self.block_till_done()
+            if wait:
+                self.block_till_done()
 
     def _worker(self):
         """ Handles jobs for the thread pool. """
@@ -0,0 +1,130 @@
+"""
+homeassistant.util.fetch
+~~~~~~~~~~~~~~~~~~~~~~~~
+Shares the results of fetching data between the users of the same data.
+
+Platforms that create one data object per sensor would otherwise fetch the
+same resource once for every sensor. Results are cached by a key that
+identifies the resource and its parameters. Concurrent fetches of the same
+key wait for the fetch that is in progress instead of starting their own.
+"""
+from datetime import timedelta
+import threading
+import time
+
+# Expired results are removed once the cache holds this many results
+MIN_PRUNE_SIZE = 64
+
+
+class FetchCache(object):
+    """
+    Caches results of fetches by key for a limited time. Expired results are
+    removed when the number of results has doubled since they were last
+    removed, so keys that are no longer fetched do not stay in memory.
+    """
+
+    def __init__(self):
+        # Dict mapping key => (expiry time, result)
+        self._results = {}
+        # Number of results at which expired results are removed
+        self._prune_size = MIN_PRUNE_SIZE
+        # Dict mapping key => fetch in progress
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, key, fetch_func, ttl):
+        """
+        Returns the result of fetch_func for key. Calls fetch_func if there
+        is no result younger than ttl, a timedelta or seconds. Exceptions
+        raised by fetch_func are raised to all callers and not cached.
+        """
+        if isinstance(ttl, timedelta):
+            ttl = ttl.total_seconds()
+
+        with self._lock:
+            cached = self._results.get(key)
+
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+            in_flight = self._in_flight.get(key)
+
+            if in_flight is None:
+                in_flight = self._in_flight[key] = _Fetch()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return in_flight.wait()
+
+        try:
+            result = fetch_func()
+        except Exception as err:
+            with self._lock:
+                del self._in_flight[key]
+
+            in_flight.done(error=err)
+            raise
+
+        with self._lock:
+            self._results[key] = (time.monotonic() + ttl, result)
+            del self._in_flight[key]
+
+            if len(self._results) >= self._prune_size:
+                self._prune()
+
+        in_flight.done(result)
+
+        return result
+
+    def _prune(self):
+        """ Removes expired results. Expects the lock to be held. """
+        now = time.monotonic()
+
+        for key in [key for key, (expiry, _) in self._results.items()
+                    if expiry <= now]:
+            del self._results[key]
+
+        self._prune_size = max(MIN_PRUNE_SIZE, 2 * len(self._results))
+
+    def invalidate(self, key=None):
+        """ Removes the result for key or all results if key is None. """
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+
+class _Fetch(object):
+    """ A fetch that is in progress. """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+
+    def done(self, result=None, error=None):
+        """ Stores the outcome of the fetch and wakes up the waiters. """
+        self._result = result
+        self._error = error
+        self._event.set()
+
+    def wait(self):
+        """ Waits for the fetch and returns its result. """
+        self._event.wait()
+
+        if self._error is not None:
+            raise self._error
+
+        return self._result
+
+
+# The cache shared by all platforms
+FETCH_CACHE = FetchCache()
+
+
+def cached(key, fetch_func, ttl):
+    """ Fetches through the shared cache. See FetchCache.fetch. """
+    return FETCH_CACHE.fetch(key, fetch_func, ttl)
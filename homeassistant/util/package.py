@@ -1,4 +1,5 @@
 """Helpers to install PyPi packages."""
+import json
 import logging
 import os
 import subprocess
@@ -53,3 +54,69 @@ def check_package_exists(package, lib_dir):
     # Check packages from global + virtual environment
     # pylint: disable=not-an-iterable
     return any(dist in req for dist in pkg_resources.working_set)
+
+
+class RequirementsCache(object):
+    """Remembers which requirements are met and stores them in a JSON file.
+
+    The cache is only valid for the state of lib_dir, the directories on
+    sys.path and the Python environment it was written for. Installing,
+    upgrading or removing a package changes the mtime of the directory it
+    is in, so does invalidate the cache. Checking a requirement against it
+    does not scan the installed distributions and never spawns pip."""
+
+    def __init__(self, path, lib_dir):
+        self.path = path
+        self.lib_dir = lib_dir
+        self.requirements = set()
+        self._changed = False
+        self._lock = threading.Lock()
+
+        try:
+            with open(path) as inp:
+                data = json.load(inp)
+
+            if data.get('state') == self.state():
+                self.requirements.update(data['requirements'])
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            pass
+
+    def state(self):
+        """Return the state of the environment the cache is valid for."""
+        mtimes = []
+
+        for path in sorted(set(sys.path + [self.lib_dir])):
+            try:
+                mtimes.append([path, os.stat(path).st_mtime_ns])
+            except OSError:
+                mtimes.append([path, None])
+
+        return [sys.executable, sys.version, mtimes]
+
+    def is_met(self, package):
+        """Return if package is known to be installed."""
+        with self._lock:
+            return package in self.requirements
+
+    def add(self, package):
+        """Remember that package is installed."""
+        with self._lock:
+            if package not in self.requirements:
+                self.requirements.add(package)
+                self._changed = True
+
+    def save(self):
+        """Write the cache to disk if it has changed."""
+        with self._lock:
+            if not self._changed:
+                return
+
+            try:
+                with open(self.path, 'w') as outp:
+                    json.dump({'state': self.state(),
+                               'requirements': sorted(self.requirements)},
+                              outp)
+                self._changed = False
+            except OSError:
+                _LOGGER.warning('Unable to write requirements cache %s',
+                                self.path)
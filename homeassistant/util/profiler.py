@@ -0,0 +1,131 @@
+"""
+homeassistant.util.profiler
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Records a timeline of the phases of the startup of Home Assistant.
+
+The timeline is written in the Chrome trace event format that can be opened
+with chrome://tracing or any other viewer of that format.
+"""
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+CATEGORY_CONFIG = 'config'
+CATEGORY_IMPORT = 'import'
+CATEGORY_REQUIREMENTS = 'requirements'
+CATEGORY_SETUP = 'setup'
+
+# The active profiler, None if not profiling
+_PROFILER = None
+
+# Holds the stack of running phases of each thread
+_THREAD = threading.local()
+
+
+class StartupProfiler(object):
+    """ Collects the phases of the startup. """
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.phases = []
+        self._lock = threading.Lock()
+
+    # pylint: disable=too-many-arguments
+    def add(self, name, category, start, end, self_time=None):
+        """
+        Adds a phase that ran from start till end. self_time is the time in
+        seconds not spent in nested phases, all of it if not given.
+        """
+        if self_time is None:
+            self_time = end - start
+
+        with self._lock:
+            self.phases.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': int((start - self.start_time) * 1000000),
+                'dur': int((end - start) * 1000000),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {'self_us': int(self_time * 1000000)},
+            })
+
+    def totals(self):
+        """
+        Returns the seconds spent per category. Time spent in nested phases
+        only counts for their own category.
+        """
+        totals = {}
+
+        with self._lock:
+            for phase in self.phases:
+                totals[phase['cat']] = (totals.get(phase['cat'], 0) +
+                                        phase['args']['self_us'] / 1000000)
+
+        return totals
+
+    def as_dict(self):
+        """ Returns the timeline in the Chrome trace event format. """
+        with self._lock:
+            return {
+                'traceEvents': list(self.phases),
+                'displayTimeUnit': 'ms',
+            }
+
+    def write(self, path):
+        """ Writes the timeline as JSON to path. """
+        with open(path, 'w') as outp:
+            json.dump(self.as_dict(), outp, indent=1)
+
+
+def start():
+    """ Starts recording the startup. Returns the profiler. """
+    global _PROFILER  # pylint: disable=global-statement
+
+    _PROFILER = StartupProfiler()
+
+    return _PROFILER
+
+
+def stop():
+    """ Stops recording the startup. Returns the profiler if active. """
+    global _PROFILER  # pylint: disable=global-statement
+
+    profiler, _PROFILER = _PROFILER, None
+
+    return profiler
+
+
+@contextmanager
+def phase(name, category):
+    """ Records the time the wrapped block takes if profiling. """
+    profiler = _PROFILER
+
+    if profiler is None:
+        yield
+        return
+
+    stack = getattr(_THREAD, 'stack', None)
+
+    if stack is None:
+        stack = _THREAD.stack = []
+
+    # Seconds spent in the phases nested in this one
+    nested = [0]
+    stack.append(nested)
+    start_time = time.time()
+
+    try:
+        yield
+    finally:
+        end_time = time.time()
+        stack.pop()
+
+        if stack:
+            stack[-1][0] += end_time - start_time
+
+        profiler.add(name, category, start_time, end_time,
+                     end_time - start_time - nested[0])
@@ -0,0 +1,148 @@
+#! /usr/bin/python3
+"""
+Run micro benchmarks of Home Assistant internals.
+
+Usage: script/benchmark.py [name ...]
+Runs all benchmarks if no name is given.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """ Registers a benchmark. """
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def report(name, count, seconds):
+    """ Prints the result of a benchmark. """
+    print("{}: {} runs, {:.2f} us per run".format(
+        name, count, seconds / count * 1000000))
+
+
+@benchmark
+def http_router(count=100000):
+    """ Dispatch latency of the HTTP path router with 100 routes. """
+    from homeassistant.components.http import PathRouter
+
+    def handler(handler, path_match, data):
+        """ Dummy handler. """
+
+    router = PathRouter()
+
+    for idx in range(50):
+        router.register('GET', '/api/static_{}'.format(idx), handler)
+        router.register(
+            'GET',
+            re.compile(r'/api/regex_{}/(?P<entity_id>[a-z\._0-9]+)'.format(
+                idx)),
+            handler)
+
+    router.register(
+        'GET', re.compile(r'/static/(?P<file>[a-zA-Z\._\-0-9/]+)'), handler)
+
+    for path in ('/api/static_25', '/api/regex_49/light.kitchen',
+                 '/static/frontend.html', '/not_found'):
+        seconds = timeit.timeit(
+            lambda: router.resolve('GET', path), number=count)
+        report('http_router {}'.format(path), count, seconds)
+
+
+@benchmark
+def expand_group(count=1000):
+    """ Expanding groups of 1,000 entities as done for service calls. """
+    import homeassistant.core as ha
+    from homeassistant.components import group
+
+    hass = ha.HomeAssistant()
+
+    light_ids = ['light.test_{}'.format(idx) for idx in range(1000)]
+    switch_ids = ['switch.test_{}'.format(idx) for idx in range(1000)]
+
+    hass.states.set('group.all_lights', 'off', {'entity_id': light_ids})
+    hass.states.set('group.all_switches', 'off', {'entity_id': switch_ids})
+    hass.states.set('group.all_devices', 'off', {
+        'entity_id': ['group.all_lights', 'group.all_switches']})
+
+    for name, entity_ids in (
+            ('group', ['group.all_lights']),
+            ('nested groups', ['group.all_devices']),
+            ('group and its entities', ['group.all_lights'] + light_ids)):
+        seconds = timeit.timeit(
+            lambda: group.expand_entity_ids(hass, entity_ids), number=count)
+        report('expand_group {}'.format(name), count, seconds)
+
+    hass.stop()
+
+
+@benchmark
+def active_zone(count=1000):
+    """ Looking up the active zone of a location among 200 zones. """
+    import random
+    import homeassistant.core as ha
+    from homeassistant.components import zone
+
+    hass = ha.HomeAssistant()
+    rand = random.Random(0)
+
+    for idx in range(200):
+        hass.states.set('zone.test_{}'.format(idx), zone.STATE, {
+            'latitude': 32.8 + rand.uniform(-0.5, 0.5),
+            'longitude': -117.2 + rand.uniform(-0.5, 0.5),
+            'radius': 100})
+
+    for name, location in (('in zone', (32.7, -117.1, 0)),
+                           ('accuracy 500m', (32.7, -117.1, 500)),
+                           ('far away', (52.37, 4.89, 0))):
+        seconds = timeit.timeit(
+            lambda: zone.active_zone(hass, *location), number=count)
+        report('active_zone {}'.format(name), count, seconds)
+
+    hass.stop()
+
+
+@benchmark
+def mqtt_topic_match(count=100000):
+    """ Matching a topic against 300 MQTT subscriptions. """
+    from homeassistant.components.mqtt import TopicTrie
+
+    trie = TopicTrie()
+
+    for idx in range(300):
+        trie.add('home/sensor_{}/state'.format(idx), None)
+
+    trie.add('owntracks/+/+', None)
+    trie.add('home/#', None)
+
+    for topic in ('home/sensor_150/state', 'owntracks/paulus/phone',
+                  'other/topic'):
+        seconds = timeit.timeit(lambda: trie.match(topic), number=count)
+        report('mqtt_topic_match {}'.format(topic), count, seconds)
+
+
+def main():
+    """ Runs the requested benchmarks. """
+    parser = argparse.ArgumentParser(
+        description="Run Home Assistant micro benchmarks.")
+    parser.add_argument('names', nargs='*', help="Benchmarks to run")
+    args = parser.parse_args()
+
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error("Unknown benchmark {}. Choose from {}".format(
+                name, ", ".join(sorted(BENCHMARKS))))
+
+    for name in args.names or sorted(BENCHMARKS):
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
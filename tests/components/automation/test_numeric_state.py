@@ -4,10 +4,14 @@ tests.components.automation.test_numeric_state
 
 Tests numeric state automation.
 """
+from datetime import timedelta
 import unittest
 
 import homeassistant.core as ha
 import homeassistant.components.automation as automation
+import homeassistant.util.dt as dt_util
+
+from tests.common import fire_time_changed
 
 
 class TestAutomationNumericState(unittest.TestCase):
@@ -479,3 +483,55 @@ class TestAutomationNumericState(unittest.TestCase):
         self.hass.pool.block_till_done()
 
         self.assertEqual(2, len(self.calls))
+
+    def test_if_fires_on_entity_change_below_with_for(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'numeric_state',
+                    'entity_id': 'test.entity',
+                    'below': 10,
+                    'for': {
+                        'seconds': 5
+                    },
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        self.hass.states.set('test.entity', 9)
+        self.hass.pool.block_till_done()
+        # 8 is still below 10, the pending action is kept
+        self.hass.states.set('test.entity', 8)
+        self.hass.pool.block_till_done()
+        self.assertEqual(0, len(self.calls))
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(self.calls))
+
+    def test_if_not_fires_with_for_if_leaving_range(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'numeric_state',
+                    'entity_id': 'test.entity',
+                    'below': 10,
+                    'for': 5,
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        self.hass.states.set('test.entity', 9)
+        self.hass.pool.block_till_done()
+        self.hass.states.set('test.entity', 11)
+        self.hass.pool.block_till_done()
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.pool.block_till_done()
+        self.assertEqual(0, len(self.calls))
@@ -4,11 +4,15 @@ tests.components.automation.test_state
 
 Tests state automation.
 """
+from datetime import timedelta
 import unittest
 
 import homeassistant.core as ha
 import homeassistant.components.automation as automation
 import homeassistant.components.automation.state as state
+import homeassistant.util.dt as dt_util
+
+from tests.common import fire_time_changed
 
 
 class TestAutomationState(unittest.TestCase):
@@ -351,3 +355,143 @@ class TestAutomationState(unittest.TestCase):
                 'entity_id': 'test.entity',
                 'from': True,
             }, lambda x: x))
+
+    def test_if_fires_on_entity_change_with_for(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'state',
+                    'entity_id': 'test.entity',
+                    'to': 'world',
+                    'for': {
+                        'seconds': 5
+                    },
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        self.hass.states.set('test.entity', 'world')
+        self.hass.pool.block_till_done()
+        self.assertEqual(0, len(self.calls))
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(self.calls))
+
+    def test_if_not_fires_on_entity_change_with_for_if_state_flips_back(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'state',
+                    'entity_id': 'test.entity',
+                    'to': 'world',
+                    'for': 5,
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        self.hass.states.set('test.entity', 'world')
+        self.hass.pool.block_till_done()
+        self.hass.states.set('test.entity', 'hello')
+        self.hass.pool.block_till_done()
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.pool.block_till_done()
+        self.assertEqual(0, len(self.calls))
+
+    def test_if_for_not_restarted_by_attribute_change(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'state',
+                    'entity_id': 'test.entity',
+                    'to': 'world',
+                    'for': 5,
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        self.hass.states.set('test.entity', 'world')
+        self.hass.pool.block_till_done()
+        self.hass.states.set('test.entity', 'world', {'hello': 'there'})
+        self.hass.pool.block_till_done()
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(self.calls))
+
+    def test_if_debounce_fires_once_after_updates_settle(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'state',
+                    'entity_id': 'test.entity',
+                    'debounce': 5,
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        for value in ('one', 'two', 'three'):
+            self.hass.states.set('test.entity', 'world', {'value': value})
+            self.hass.pool.block_till_done()
+
+        self.assertEqual(0, len(self.calls))
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(self.calls))
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=20))
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(self.calls))
+
+    def test_if_max_rate_limits_actions(self):
+        self.assertTrue(automation.setup(self.hass, {
+            automation.DOMAIN: {
+                'trigger': {
+                    'platform': 'state',
+                    'entity_id': 'test.entity',
+                    'max_rate': {
+                        'minutes': 1
+                    },
+                },
+                'action': {
+                    'service': 'test.automation'
+                }
+            }
+        }))
+
+        self.hass.states.set('test.entity', 'world')
+        self.hass.pool.block_till_done()
+        self.hass.states.set('test.entity', 'hello')
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(self.calls))
+
+    def test_if_fails_setup_if_for_and_debounce(self):
+        self.assertFalse(state.trigger(
+            self.hass, {
+                'platform': 'state',
+                'entity_id': 'test.entity',
+                'for': 5,
+                'debounce': 5,
+            }, lambda x: x))
+
+    def test_if_fails_setup_if_invalid_for(self):
+        self.assertFalse(state.trigger(
+            self.hass, {
+                'platform': 'state',
+                'entity_id': 'test.entity',
+                'for': 'invalid',
+            }, lambda x: x))
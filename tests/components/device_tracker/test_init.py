@@ -6,11 +6,12 @@ Tests the device tracker compoments.
 """
 # pylint: disable=protected-access,too-many-public-methods
 import unittest
-from unittest.mock import patch
+from unittest.mock import call, Mock, patch
 from datetime import datetime, timedelta
 import os
+import threading
 
-from homeassistant.config import load_yaml_config_file
+from homeassistant.config import load_yaml_config_file, yaml_cache_path
 from homeassistant.loader import get_component
 import homeassistant.util.dt as dt_util
 from homeassistant.const import (
@@ -32,10 +33,12 @@ class TestComponentsDeviceTracker(unittest.TestCase):
 
     def tearDown(self):  # pylint: disable=invalid-name
         """ Stop down stuff we started. """
-        try:
-            os.remove(self.yaml_devices)
-        except FileNotFoundError:
-            pass
+        for path in (self.yaml_devices,
+                     yaml_cache_path(self.yaml_devices)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
 
         self.hass.stop()
 
@@ -125,6 +128,7 @@ class TestComponentsDeviceTracker(unittest.TestCase):
         scanner.come_home('DEV1')
         self.assertTrue(device_tracker.setup(self.hass, {
             device_tracker.DOMAIN: {CONF_PLATFORM: 'test'}}))
+        self.hass.pool.block_till_done()
         config = device_tracker.load_config(self.yaml_devices, self.hass,
                                             timedelta(seconds=0), 0)[0]
         self.assertEqual('dev1', config.dev_id)
@@ -241,3 +245,146 @@ class TestComponentsDeviceTracker(unittest.TestCase):
         mock_see.assert_called_once_with(
             mac=mac, dev_id=dev_id, host_name=host_name,
             location_name=location_name, gps=gps)
+
+    def test_see_many(self):
+        tracker = device_tracker.DeviceTracker(
+            self.hass, timedelta(seconds=180), True, 0, [])
+        tracker.setup_group()
+
+        tracker.see_many([{'mac': 'AB:CD:EF:01'}, {'dev_id': 'phone'}])
+
+        self.assertEqual(STATE_HOME,
+                         self.hass.states.get('device_tracker.phone').state)
+        self.assertEqual(
+            ('device_tracker.abcdef01', 'device_tracker.phone'),
+            self.hass.states.get(device_tracker.ENTITY_ID_ALL_DEVICES)
+            .attributes[ATTR_ENTITY_ID])
+
+        # Devices that did not change are not written again
+        with patch.object(device_tracker.Device,
+                          'update_ha_state') as mock_update:
+            tracker.see_many([{'mac': 'AB:CD:EF:01'},
+                              {'dev_id': 'phone', 'location_name': 'Work'}])
+
+        self.assertEqual(1, mock_update.call_count)
+
+        self.hass.pool.block_till_done()
+
+        config = device_tracker.load_config(self.yaml_devices, self.hass,
+                                            timedelta(seconds=0), 0)
+        self.assertEqual(['abcdef01', 'phone'],
+                         [device.dev_id for device in config])
+
+    def test_see_many_skips_invalid_entries(self):
+        tracker = device_tracker.DeviceTracker(
+            self.hass, timedelta(seconds=180), True, 0, [])
+        tracker.setup_group()
+
+        tracker.see_many([{'dev_id': 'phone'}, {'host_name': 'nameless'},
+                          {'dev_id': 'tablet'}])
+        self.hass.pool.block_till_done()
+
+        self.assertEqual(
+            ('device_tracker.phone', 'device_tracker.tablet'),
+            self.hass.states.get(device_tracker.ENTITY_ID_ALL_DEVICES)
+            .attributes[ATTR_ENTITY_ID])
+
+        config = device_tracker.load_config(self.yaml_devices, self.hass,
+                                            timedelta(seconds=0), 0)
+        self.assertEqual(['phone', 'tablet'],
+                         [device.dev_id for device in config])
+
+    def test_scanner_platform_sees_devices_one_by_one(self):
+        scanner = Mock(scan_devices=Mock(return_value=['AB:CD', 'EF:01']),
+                       get_device_name=Mock(return_value=None))
+        see_device = Mock()
+
+        device_tracker.setup_scanner_platform(self.hass, {}, scanner,
+                                              see_device)
+
+        self.assertEqual([call(mac='AB:CD', host_name=None),
+                          call(mac='EF:01', host_name=None)],
+                         see_device.call_args_list)
+
+    def test_new_devices_are_saved_in_one_write(self):
+        tracker = device_tracker.DeviceTracker(
+            self.hass, timedelta(seconds=180), True, 0, [])
+
+        with patch('homeassistant.components.device_tracker.append_config') \
+                as mock_append:
+            tracker.see_many([{'dev_id': 'phone'}, {'dev_id': 'tablet'}])
+            self.hass.pool.block_till_done()
+
+        self.assertEqual(1, mock_append.call_count)
+        devices = mock_append.call_args[0][1]
+        self.assertEqual(['phone', 'tablet'],
+                         [device.dev_id for device in devices])
+
+    def test_writes_do_not_overlap(self):
+        tracker = device_tracker.DeviceTracker(
+            self.hass, timedelta(seconds=180), True, 0, [])
+        self.hass.pool.add_worker()
+        writing = threading.Lock()
+        written = []
+
+        def append_config(path, devices):
+            """ Fails if another write is running. """
+            self.assertTrue(writing.acquire(False))
+            threading.Event().wait(0.05)
+            written.extend(device.dev_id for device in devices)
+            writing.release()
+
+        with patch('homeassistant.components.device_tracker.append_config',
+                   side_effect=append_config):
+            tracker.see(dev_id='phone')
+            threading.Event().wait(0.01)
+            tracker.see(dev_id='tablet')
+            self.hass.pool.block_till_done()
+
+        self.assertEqual(['phone', 'tablet'], written)
+
+    def test_changed_name_is_written(self):
+        # Without a configured name the host name is used
+        device = device_tracker.Device(
+            self.hass, timedelta(seconds=180), 0, True, 'phone', 'AB:CD')
+        tracker = device_tracker.DeviceTracker(
+            self.hass, timedelta(seconds=180), True, 0, [device])
+
+        tracker.see(mac='AB:CD', host_name='phone')
+        tracker.see(mac='AB:CD', host_name='new_phone')
+
+        self.assertEqual(
+            'new_phone',
+            self.hass.states.get('device_tracker.phone').attributes.get(
+                ATTR_FRIENDLY_NAME))
+
+    def test_only_expired_devices_are_updated(self):
+        tracker = device_tracker.DeviceTracker(
+            self.hass, timedelta(seconds=60), True, 0, [])
+        seen_time = datetime(2015, 9, 15, 23, tzinfo=dt_util.UTC)
+
+        with patch('homeassistant.components.device_tracker.dt_util.utcnow',
+                   return_value=seen_time):
+            tracker.see(dev_id='phone')
+            tracker.see(dev_id='tablet')
+
+        # Seen again later, so expires later
+        with patch('homeassistant.components.device_tracker.dt_util.utcnow',
+                   return_value=seen_time + timedelta(seconds=30)):
+            tracker.see(dev_id='tablet')
+
+        self.assertEqual(2, len(tracker._expiries))
+
+        update_time = seen_time + timedelta(seconds=61)
+
+        with patch('homeassistant.components.device_tracker.dt_util.utcnow',
+                   return_value=update_time):
+            fire_time_changed(self.hass, update_time)
+            self.hass.pool.block_till_done()
+
+        self.assertEqual(STATE_NOT_HOME,
+                         self.hass.states.get('device_tracker.phone').state)
+        self.assertEqual(STATE_HOME,
+                         self.hass.states.get('device_tracker.tablet').state)
+        self.assertEqual([(seen_time + timedelta(seconds=90), 'tablet')],
+                         tracker._expiries)
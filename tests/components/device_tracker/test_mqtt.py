@@ -2,6 +2,7 @@ import unittest
 import os
 
 from homeassistant.components import device_tracker
+from homeassistant.config import yaml_cache_path
 from homeassistant.const import CONF_PLATFORM
 
 from tests.common import (
@@ -16,10 +17,13 @@ class TestComponentsDeviceTrackerMQTT(unittest.TestCase):
 
     def tearDown(self):  # pylint: disable=invalid-name
         """ Stop down stuff we started. """
-        try:
-            os.remove(self.hass.config.path(device_tracker.YAML_DEVICES))
-        except FileNotFoundError:
-            pass
+        yaml_devices = self.hass.config.path(device_tracker.YAML_DEVICES)
+
+        for path in (yaml_devices, yaml_cache_path(yaml_devices)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
 
     def test_new_message(self):
         dev_id = 'paulus'
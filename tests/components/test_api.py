@@ -8,13 +8,15 @@ Tests Home Assistant HTTP component does what it should do.
 from contextlib import closing
 import json
 import tempfile
+import threading
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import requests
 
 from homeassistant import bootstrap, const
 import homeassistant.core as ha
+import homeassistant.components.api as api
 import homeassistant.components.http as http
 
 API_PASSWORD = "test1234"
@@ -101,6 +103,60 @@ class TestAPI(unittest.TestCase):
 
         self.assertEqual(hass.states.all(), remote_data)
 
+    def test_api_list_state_entities_pretty_for_browsers(self):
+        """ Test that browsers get indented JSON. """
+        headers = dict(HA_HEADERS)
+        headers['Accept'] = 'text/html,application/json'
+        req = requests.get(_url(const.URL_API_STATES), headers=headers)
+
+        self.assertIn('\n    ', req.text)
+        self.assertEqual(
+            hass.states.all(),
+            [ha.State.from_dict(item) for item in req.json()])
+
+    def test_api_states_since(self):
+        """ Test if the API returns only the states changed since. """
+        revision = hass.states.revision
+        hass.states.set('test.since', 'on')
+
+        req = requests.get(
+            _url(const.URL_API_STATES), params={'since': revision},
+            headers=HA_HEADERS)
+
+        data = req.json()
+        self.assertFalse(data['full'])
+        self.assertEqual(hass.states.revision, data['revision'])
+        self.assertEqual([hass.states.get('test.since')],
+                         [ha.State.from_dict(item) for item in data['states']])
+
+    def test_api_large_response_is_gzipped(self):
+        """ Test if large JSON responses are compressed. """
+        hass.states.set('test.large', 'on', {'data': 'x' * 2000})
+
+        req = requests.get(_url(const.URL_API_STATES), headers=HA_HEADERS)
+
+        self.assertEqual('gzip', req.headers['Content-Encoding'])
+        self.assertLess(int(req.headers['Content-Length']), 2000)
+        self.assertEqual(hass.states.get('test.large'), ha.State.from_dict(
+            next(item for item in req.json()
+                 if item['entity_id'] == 'test.large')))
+
+        hass.states.remove('test.large')
+
+    def test_api_bootstrap(self):
+        """ Test the bootstrap data. """
+        req = requests.get(_url(const.URL_API_BOOTSTRAP),
+                           headers=HA_HEADERS)
+
+        data = req.json()
+
+        self.assertEqual(hass.config.as_dict(), data['config'])
+        self.assertEqual(
+            hass.states.all(),
+            [ha.State.from_dict(item) for item in data['states']])
+        self.assertIn('test_event',
+                      [item['event'] for item in data['events']])
+
     def test_api_get_state(self):
         """ Test if the debug interface allows us to get a state. """
         req = requests.get(
@@ -166,6 +222,38 @@ class TestAPI(unittest.TestCase):
 
         self.assertEqual(400, req.status_code)
 
+    def test_api_set_states(self):
+        """ Test if the API allows us to change multiple states. """
+        req = requests.post(
+            _url(const.URL_API_STATES),
+            data=json.dumps({'states': [
+                {'entity_id': 'test.bulk1', 'state': 'on',
+                 'attributes': {'idx': 1}},
+                {'entity_id': 'test.bulk2', 'state': 'off'},
+            ]}),
+            headers=HA_HEADERS)
+
+        self.assertEqual(200, req.status_code)
+        self.assertEqual('on', hass.states.get('test.bulk1').state)
+        self.assertEqual({'idx': 1}, hass.states.get('test.bulk1').attributes)
+        self.assertEqual('off', hass.states.get('test.bulk2').state)
+        self.assertEqual(
+            [hass.states.get('test.bulk1'), hass.states.get('test.bulk2')],
+            [ha.State.from_dict(item) for item in req.json()])
+
+    def test_api_set_states_with_bad_data(self):
+        """ Test if no states are changed if one of them is invalid. """
+        req = requests.post(
+            _url(const.URL_API_STATES),
+            data=json.dumps({'states': [
+                {'entity_id': 'test.bulk_bad', 'state': 'on'},
+                {'entity_id': 'invalid', 'state': 'off'},
+            ]}),
+            headers=HA_HEADERS)
+
+        self.assertEqual(400, req.status_code)
+        self.assertIsNone(hass.states.get('test.bulk_bad'))
+
     # pylint: disable=invalid-name
     def test_api_fire_event_with_no_data(self):
         """ Test if the API allows us to fire an event. """
@@ -207,6 +295,37 @@ class TestAPI(unittest.TestCase):
 
         self.assertEqual(1, len(test_value))
 
+    def test_api_fire_events(self):
+        """ Test if the API allows us to fire multiple events. """
+        test_value = []
+
+        def listener(event):
+            """ Helper method that will verify our events got called. """
+            test_value.append(event.data)
+
+        hass.bus.listen("test_events", listener)
+
+        req = requests.post(
+            _url(const.URL_API_EVENTS),
+            data=json.dumps({'events': [
+                {'event_type': 'test_events', 'event_data': {'idx': 1}},
+                {'event_type': 'test_events'},
+            ]}),
+            headers=HA_HEADERS)
+
+        hass.pool.block_till_done()
+
+        self.assertEqual(200, req.status_code)
+        self.assertEqual(2, len(test_value))
+        self.assertIn({'idx': 1}, test_value)
+
+        req = requests.post(
+            _url(const.URL_API_EVENTS),
+            data=json.dumps({'events': [{'event_data': {}}]}),
+            headers=HA_HEADERS)
+
+        self.assertEqual(400, req.status_code)
+
     # pylint: disable=invalid-name
     def test_api_fire_event_with_invalid_json(self):
         """ Test if the API allows us to fire an event. """
@@ -381,15 +500,17 @@ class TestAPI(unittest.TestCase):
             headers=HA_HEADERS)
         self.assertEqual(422, req.status_code)
 
-        req = requests.post(
-            _url(const.URL_API_EVENT_FORWARD),
-            data=json.dumps({
-                'api_password': 'bla-di-bla',
-                'host': '127.0.0.1',
-                'port': '8125'
-                }),
-            headers=HA_HEADERS)
-        self.assertEqual(422, req.status_code)
+        with patch('homeassistant.remote.API.close') as mock_close:
+            req = requests.post(
+                _url(const.URL_API_EVENT_FORWARD),
+                data=json.dumps({
+                    'api_password': 'bla-di-bla',
+                    'host': '127.0.0.1',
+                    'port': '8125'
+                    }),
+                headers=HA_HEADERS)
+            self.assertEqual(422, req.status_code)
+            self.assertEqual(1, mock_close.call_count)
 
         # Setup a real one
         req = requests.post(
@@ -418,14 +539,23 @@ class TestAPI(unittest.TestCase):
             headers=HA_HEADERS)
         self.assertEqual(422, req.status_code)
 
-        req = requests.delete(
-            _url(const.URL_API_EVENT_FORWARD),
-            data=json.dumps({
-                'host': '127.0.0.1',
-                'port': SERVER_PORT
-                }),
-            headers=HA_HEADERS)
-        self.assertEqual(200, req.status_code)
+        with patch('homeassistant.remote.API.close') as mock_close:
+            req = requests.delete(
+                _url(const.URL_API_EVENT_FORWARD),
+                data=json.dumps({
+                    'host': '127.0.0.1',
+                    'port': SERVER_PORT
+                    }),
+                headers=HA_HEADERS)
+            self.assertEqual(200, req.status_code)
+
+            # The API of the request and the one of the target are closed
+            for _ in range(50):
+                if mock_close.call_count == 2:
+                    break
+                threading.Event().wait(0.01)
+
+            self.assertEqual(2, mock_close.call_count)
 
     def test_stream(self):
         listen_count = self._listen_count()
@@ -468,6 +598,126 @@ class TestAPI(unittest.TestCase):
             data = self._stream_next_event(req)
             self.assertEqual('test_event3', data['event_type'])
 
+    def test_streams_with_different_restrictions(self):
+        with closing(requests.get(_url(const.URL_API_STREAM),
+                                  data=json.dumps({'restrict': 'test_event1'}),
+                                  stream=True, headers=HA_HEADERS)) as req1, \
+                closing(requests.get(_url(const.URL_API_STREAM),
+                                     data=json.dumps({
+                                         'restrict': 'test_event2'}),
+                                     stream=True, headers=HA_HEADERS)) as req2:
+
+            self.assertEqual('ping', self._stream_next_event(req1))
+            self.assertEqual('ping', self._stream_next_event(req2))
+
+            hass.bus.fire('test_event1')
+            hass.pool.block_till_done()
+            hass.bus.fire('test_event2')
+            hass.pool.block_till_done()
+            hass.bus.fire('test_event1')
+            hass.pool.block_till_done()
+
+            for _ in range(2):
+                data = self._stream_next_event(req1)
+                self.assertEqual('test_event1', data['event_type'])
+
+            data = self._stream_next_event(req2)
+            self.assertEqual('test_event2', data['event_type'])
+
+            hass.bus.fire('test_event2')
+            hass.pool.block_till_done()
+
+            data = self._stream_next_event(req2)
+            self.assertEqual('test_event2', data['event_type'])
+
+    def test_stream_with_entity_filters(self):
+        with closing(requests.get(_url(const.URL_API_STREAM),
+                                  data=json.dumps({
+                                      'entity_id': 'test.filtered',
+                                      'domain': 'light'}),
+                                  stream=True, headers=HA_HEADERS)) as req:
+
+            data = self._stream_next_event(req)
+            self.assertEqual('ping', data)
+
+            hass.bus.fire('test_event')
+            hass.states.set('switch.other', 'on')
+            hass.states.set('test.filtered', 'on')
+            hass.states.set('light.kitchen', 'on')
+            hass.pool.block_till_done()
+
+            data = self._stream_next_event(req)
+            self.assertEqual('test.filtered', data['data']['entity_id'])
+            data = self._stream_next_event(req)
+            self.assertEqual('light.kitchen', data['data']['entity_id'])
+
+    def test_stream_serializes_event_once(self):
+        with patch('homeassistant.components.api._compact_json',
+                   wraps=api._compact_json) as mock_json, \
+                closing(requests.get(_url(const.URL_API_STREAM), stream=True,
+                                     headers=HA_HEADERS)) as req1, \
+                closing(requests.get(_url(const.URL_API_STREAM), stream=True,
+                                     headers=HA_HEADERS)) as req2:
+
+            self.assertEqual('ping', self._stream_next_event(req1))
+            self.assertEqual('ping', self._stream_next_event(req2))
+
+            hass.bus.fire('test_event')
+            hass.pool.block_till_done()
+
+            for req in (req1, req2):
+                data = self._stream_next_event(req)
+                self.assertEqual('test_event', data['event_type'])
+
+            self.assertEqual(1, mock_json.call_count)
+
+    def test_stream_state_sync(self):
+        hass.states.set('test.sync', 'on', {'keep': 1, 'change': 1})
+        revision = hass.states.revision
+        hass.states.set('test.sync2', 'on')
+
+        with closing(requests.get(_url(const.URL_API_STREAM),
+                                  data=json.dumps({
+                                      'since': revision,
+                                      'domain': 'test'}),
+                                  stream=True, headers=HA_HEADERS)) as req:
+
+            data = self._stream_next_event(req)
+            self.assertEqual('state_sync', data['event_type'])
+            self.assertFalse(data['data']['full'])
+            self.assertEqual(hass.states.revision, data['data']['revision'])
+            self.assertEqual(['test.sync2'], [
+                state['entity_id'] for state in data['data']['states']])
+
+            self.assertEqual('ping', self._stream_next_event(req))
+
+            hass.states.set('test.sync', 'off', {'keep': 1, 'change': 2,
+                                                 'new': 1})
+            hass.pool.block_till_done()
+
+            data = self._stream_next_event(req)
+            self.assertEqual('state_changed', data['event_type'])
+            self.assertEqual({
+                'entity_id': 'test.sync',
+                'revision': hass.states.revision,
+                'state': 'off',
+                'attributes': {'change': 2, 'new': 1},
+                'removed_attributes': [],
+            }, {key: value for key, value in data['data'].items()
+                if not key.startswith('last_')})
+
+    def test_stream_state_sync_unknown_revision(self):
+        with closing(requests.get(_url(const.URL_API_STREAM),
+                                  data=json.dumps({'since': 1}),
+                                  stream=True, headers=HA_HEADERS)) as req:
+
+            data = self._stream_next_event(req)
+            self.assertTrue(data['data']['full'])
+            self.assertEqual(
+                sorted(hass.states.entity_ids()),
+                sorted(state['entity_id']
+                       for state in data['data']['states']))
+
     def _stream_next_event(self, stream):
         data = b''
         last_new_line = False
@@ -484,3 +734,59 @@ class TestAPI(unittest.TestCase):
     def _listen_count(self):
         """ Return number of event listeners. """
         return sum(hass.bus.listeners.values())
+
+
+class TestEventStreamSubscriber(unittest.TestCase):
+    """ Test the subscribers of the event stream. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        self.wfile = Mock()
+        self.on_events = Mock()
+
+    def test_write_coalesces_queued_messages(self):
+        subscriber = api.EventStreamSubscriber(
+            self.wfile, on_events=self.on_events)
+
+        subscriber.queue('1')
+        subscriber.queue('2')
+        subscriber.write()
+
+        self.assertEqual(1, self.wfile.write.call_count)
+        self.assertEqual(b'data: 1\n\ndata: 2\n\n',
+                         self.wfile.write.call_args[0][0])
+        self.assertEqual(1, self.on_events.call_count)
+
+        subscriber.write()
+        self.assertEqual(1, self.wfile.write.call_count)
+
+    def test_ping_does_not_extend_session(self):
+        subscriber = api.EventStreamSubscriber(
+            self.wfile, on_events=self.on_events)
+
+        subscriber.write('ping')
+
+        self.assertEqual(b'data: ping\n\n', self.wfile.write.call_args[0][0])
+        self.assertEqual(0, self.on_events.call_count)
+
+    def test_write_error_closes(self):
+        self.wfile.write.side_effect = IOError
+        subscriber = api.EventStreamSubscriber(self.wfile)
+
+        subscriber.write('ping')
+
+        self.assertTrue(subscriber.closed.is_set())
+
+    def test_matches(self):
+        subscriber = api.EventStreamSubscriber(
+            self.wfile, entity_ids={'switch.ac'}, domains={'light'})
+
+        self.assertTrue(subscriber.matches(
+            ha.Event('test', {'entity_id': 'switch.ac'})))
+        self.assertTrue(subscriber.matches(
+            ha.Event('test', {'entity_id': 'light.kitchen'})))
+        self.assertFalse(subscriber.matches(
+            ha.Event('test', {'entity_id': 'switch.heater'})))
+        self.assertFalse(subscriber.matches(ha.Event('test')))
+
+        self.assertTrue(api.EventStreamSubscriber(self.wfile).matches(
+            ha.Event('test')))
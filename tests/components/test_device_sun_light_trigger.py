@@ -10,6 +10,7 @@ import unittest
 
 import homeassistant.loader as loader
 from homeassistant.const import CONF_PLATFORM, STATE_HOME, STATE_NOT_HOME
+from homeassistant.config import yaml_cache_path
 from homeassistant.components import (
     device_tracker, light, sun, device_sun_light_trigger)
 
@@ -37,8 +38,13 @@ def setUpModule():   # pylint: disable=invalid-name
 
 def tearDownModule():   # pylint: disable=invalid-name
     """ Stops the Home Assistant server. """
-    os.remove(os.path.join(get_test_config_dir(),
-                           device_tracker.YAML_DEVICES))
+    yaml_devices = os.path.join(get_test_config_dir(),
+                                device_tracker.YAML_DEVICES)
+
+    os.remove(yaml_devices)
+
+    if os.path.isfile(yaml_cache_path(yaml_devices)):
+        os.remove(yaml_cache_path(yaml_devices))
 
 
 class TestDeviceSunLightTrigger(unittest.TestCase):
@@ -81,6 +81,52 @@ class TestFrontend(unittest.TestCase):
 
         self.assertEqual(200, req.status_code)
 
+    def test_static_etag(self):
+        """ Tests conditional requests for static files. """
+        req = requests.get(_url("/static/favicon-192x192.png"))
+
+        self.assertEqual(200, req.status_code)
+        etag = req.headers['ETag']
+        self.assertIn('Last-Modified', req.headers)
+
+        req = requests.get(_url("/static/favicon-192x192.png"),
+                           headers={'If-None-Match': etag})
+
+        self.assertEqual(304, req.status_code)
+        self.assertEqual(etag, req.headers['ETag'])
+        self.assertEqual('Accept-Encoding', req.headers['Vary'])
+        self.assertEqual(b'', req.content)
+
+    def test_static_etag_per_encoding(self):
+        """ Tests that gzip and identity bodies have different ETags. """
+        identity = requests.get(_url("/static/favicon-192x192.png"),
+                                headers={'Accept-Encoding': 'identity'})
+        gzipped = requests.get(_url("/static/favicon-192x192.png"),
+                               headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual('Accept-Encoding', identity.headers['Vary'])
+        self.assertEqual('Accept-Encoding', gzipped.headers['Vary'])
+        self.assertNotEqual(identity.headers['ETag'], gzipped.headers['ETag'])
+
+        req = requests.get(_url("/static/favicon-192x192.png"),
+                           headers={'Accept-Encoding': 'identity',
+                                    'If-None-Match': gzipped.headers['ETag']})
+
+        self.assertEqual(200, req.status_code)
+
+    def test_static_gzip_is_cached(self):
+        """ Tests that the gzipped content of static files is cached. """
+        with patch('homeassistant.components.http.gzip.compress',
+                   wraps=http.gzip.compress) as mock_compress:
+            for _ in range(2):
+                req = requests.get(_url("/static/favicon-192x192.png"),
+                                   headers={'Accept-Encoding': 'gzip'})
+
+                self.assertEqual(200, req.status_code)
+                self.assertEqual('gzip', req.headers['Content-Encoding'])
+
+        self.assertLessEqual(mock_compress.call_count, 1)
+
     def test_auto_filling_in_api_password(self):
         req = requests.get(
             _url("?{}={}".format(http.DATA_API_PASSWORD, API_PASSWORD)))
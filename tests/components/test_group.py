@@ -217,3 +217,73 @@ class TestComponentsGroup(unittest.TestCase):
         grp2 = group.Group(self.hass, 'Je suis Charlie')
 
         self.assertNotEqual(grp1.entity_id, grp2.entity_id)
+
+    def test_group_stays_on_while_one_is_on(self):
+        """ Test if the group only turns off when the last one turns off. """
+        self.hass.states.set('light.Ceiling', STATE_ON)
+        self.hass.pool.block_till_done()
+
+        self.hass.states.set('light.Bowl', STATE_OFF)
+        self.hass.pool.block_till_done()
+        self.assertEqual(
+            STATE_ON, self.hass.states.get(self.group_entity_id).state)
+
+        # Repeated states do not count twice
+        self.hass.states.set('light.Ceiling', STATE_ON, {'brightness': 10})
+        self.hass.pool.block_till_done()
+
+        self.hass.states.set('light.Ceiling', STATE_OFF)
+        self.hass.pool.block_till_done()
+        self.assertEqual(
+            STATE_OFF, self.hass.states.get(self.group_entity_id).state)
+
+    def test_expand_nested_groups(self):
+        """ Test if nested groups are expanded. """
+        self.hass.states.set('switch.AC', STATE_OFF)
+        group.Group(self.hass, 'nested', ['switch.AC', self.group_entity_id,
+                                          'group.non_existing'])
+
+        self.assertEqual(
+            ['light.bowl', 'light.ceiling', 'switch.ac'],
+            sorted(group.expand_entity_ids(self.hass, ['group.nested'])))
+
+    def test_expand_nested_group_cycle(self):
+        """ Test if groups that contain each other are expanded once. """
+        group.Group(self.hass, 'cycle', ['light.Bowl', 'group.cycle'])
+
+        self.assertEqual(['light.bowl'],
+                         group.expand_entity_ids(self.hass, ['group.cycle']))
+
+    def test_expansion_is_cached_till_members_change(self):
+        """ Test if the expansion is updated when members change. """
+        nested = group.Group(self.hass, 'nested', [self.group_entity_id])
+        expanded = group._expand_group(self.hass, nested.entity_id)
+
+        # Group state changes do not change the members
+        self.hass.states.set('light.Bowl', STATE_OFF)
+        self.hass.pool.block_till_done()
+        self.assertIs(expanded,
+                      group._expand_group(self.hass, nested.entity_id))
+
+        # Members of a group change
+        test_group = group.Group(self.hass, 'other', ['light.Ceiling'])
+        group._expand_group(self.hass, test_group.entity_id)
+        test_group.update_tracked_entity_ids(['switch.AC'])
+
+        self.assertEqual(('switch.ac',),
+                         group._expand_group(self.hass, test_group.entity_id))
+
+        # Members of a nested group change
+        self.hass.states.set(self.group_entity_id, STATE_OFF,
+                             {'entity_id': ['switch.AC']})
+
+        self.assertEqual(('switch.ac',),
+                         group._expand_group(self.hass, nested.entity_id))
+
+    def test_expand_entity_ids_keeps_order(self):
+        """ Test if expand_entity_ids keeps the order of the entity ids. """
+        self.assertEqual(
+            ['switch.ac', 'light.bowl', 'light.ceiling', 'light.lamp'],
+            group.expand_entity_ids(
+                self.hass, ['switch.AC', self.group_entity_id, 'light.bowl',
+                            'light.lamp', self.group_entity_id]))
@@ -0,0 +1,282 @@
+"""
+tests.components.test_http
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Tests the HTTP component.
+"""
+# pylint: disable=protected-access,too-many-public-methods
+import os
+import re
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from homeassistant import bootstrap, const
+import homeassistant.core as ha
+import homeassistant.components.http as http
+
+API_PASSWORD = "test1234"
+
+SERVER_PORT = 8127
+
+HTTP_BASE_URL = "http://127.0.0.1:{}".format(SERVER_PORT)
+
+HA_HEADERS = {const.HTTP_HEADER_HA_AUTH: API_PASSWORD}
+
+
+def _url(path=""):
+    """ Helper method to generate urls. """
+    return HTTP_BASE_URL + path
+
+
+def handler_a(handler, path_match, data):
+    """ Test handler. """
+
+
+def handler_b(handler, path_match, data):
+    """ Test handler. """
+
+
+class TestPathRouter(unittest.TestCase):
+    """ Test the PathRouter. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        self.router = http.PathRouter()
+
+    def test_static_path(self):
+        self.router.register('GET', '/api', handler_a, False)
+
+        self.assertEqual((handler_a, False, True),
+                         self.router.resolve('GET', '/api'))
+
+    def test_regex_path(self):
+        self.router.register(
+            'GET', re.compile(r'/api/states/(?P<entity_id>[a-zA-Z\._0-9]+)'),
+            handler_a)
+
+        handler, require_auth, path_match = self.router.resolve(
+            'GET', '/api/states/light.kitchen')
+
+        self.assertEqual(handler_a, handler)
+        self.assertTrue(require_auth)
+        self.assertEqual('light.kitchen', path_match.group('entity_id'))
+
+    def test_regex_path_without_trailing_slash(self):
+        self.router.register(
+            'GET',
+            re.compile(r'/api/logbook(?:/(?P<date>\d{4}-\d{1,2}-\d{1,2})|)'),
+            handler_a)
+
+        handler, _, path_match = self.router.resolve('GET', '/api/logbook')
+        self.assertEqual(handler_a, handler)
+        self.assertIsNone(path_match.group('date'))
+
+        handler, _, path_match = self.router.resolve(
+            'GET', '/api/logbook/2015-12-1')
+        self.assertEqual(handler_a, handler)
+        self.assertEqual('2015-12-1', path_match.group('date'))
+
+    def test_not_found(self):
+        self.router.register('GET', '/api', handler_a)
+        self.router.register(
+            'GET', re.compile(r'/static/(?P<file>[a-zA-Z\._\-0-9/]+)'),
+            handler_a)
+
+        self.assertEqual((None, True, None),
+                         self.router.resolve('GET', '/api/unknown'))
+        self.assertEqual((None, True, None),
+                         self.router.resolve('GET', '/static/'))
+
+    def test_method_not_allowed(self):
+        self.router.register('GET', '/api', handler_a)
+        self.router.register(
+            'POST', re.compile(r'/api/events/(?P<event_type>[a-z_]+)'),
+            handler_a)
+
+        self.assertEqual((None, True, True),
+                         self.router.resolve('POST', '/api'))
+        self.assertEqual((None, True, True),
+                         self.router.resolve('GET', '/api/events/test'))
+
+    def test_registration_order_is_kept(self):
+        self.router.register('GET', re.compile(r'/api/(?P<rest>.*)'),
+                             handler_a)
+        self.router.register('GET', '/api/states', handler_b)
+        self.router.register('POST', '/api/states', handler_b)
+
+        self.assertEqual(handler_a,
+                         self.router.resolve('GET', '/api/states')[0])
+        self.assertEqual(handler_b,
+                         self.router.resolve('POST', '/api/states')[0])
+
+    def test_regex_without_literal_prefix(self):
+        self.router.register('GET', re.compile(r'.*\.js'), handler_a)
+
+        self.assertEqual(handler_a,
+                         self.router.resolve('GET', '/some/file.js')[0])
+
+    def test_case_insensitive_regex(self):
+        self.router.register(
+            'GET', re.compile(r'/API/test', re.IGNORECASE), handler_a)
+
+        self.assertEqual(handler_a,
+                         self.router.resolve('GET', '/api/test')[0])
+
+
+class TestStaticFiles(unittest.TestCase):
+    """ Test the helpers to serve static files. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        self.stat = os.stat(__file__)
+        self.changed = Mock(st_mtime_ns=self.stat.st_mtime_ns + 1,
+                            st_size=self.stat.st_size)
+
+    def test_etag_matches(self):
+        etag = http.file_etag(self.stat)
+
+        self.assertFalse(http.etag_matches(etag, None))
+        self.assertFalse(http.etag_matches(etag, '"other"'))
+        self.assertTrue(http.etag_matches(etag, etag))
+        self.assertTrue(http.etag_matches(etag, '"other", W/' + etag))
+        self.assertTrue(http.etag_matches(etag, '*'))
+
+    def test_etag_changes_with_file(self):
+        self.assertNotEqual(http.file_etag(self.stat),
+                            http.file_etag(self.changed))
+
+    def test_etag_differs_per_encoding(self):
+        self.assertNotEqual(http.file_etag(self.stat),
+                            http.file_etag(self.stat, True))
+
+    def test_file_cache(self):
+        cache = http.StaticFileCache()
+
+        with open(__file__, 'rb') as inp:
+            data = cache.gzip(__file__, self.stat, inp)
+
+        with open(__file__, 'rb') as inp:
+            self.assertIs(data, cache.gzip(__file__, self.stat, inp))
+
+        self.assertEqual(
+            self.stat.st_size, len(http.gzip.decompress(data)))
+
+    def test_file_cache_invalidated_on_change(self):
+        cache = http.StaticFileCache()
+
+        with open(__file__, 'rb') as inp:
+            data = cache.gzip(__file__, self.stat, inp)
+
+        with open(__file__, 'rb') as inp:
+            self.assertIsNot(data, cache.gzip(__file__, self.changed, inp))
+
+    def test_file_cache_evicts_least_recently_used(self):
+        cache = http.StaticFileCache(max_files=2)
+
+        for path in ('a', 'b', 'a', 'c'):
+            with open(__file__, 'rb') as inp:
+                cache.gzip(path, self.stat, inp)
+
+        with open(__file__, 'rb') as inp:
+            data = cache.gzip('a', self.stat, inp)
+
+        with open(__file__, 'rb') as inp:
+            self.assertIs(data, cache.gzip('a', self.stat, inp))
+
+        with patch('homeassistant.components.http.gzip.compress',
+                   wraps=http.gzip.compress) as mock_compress:
+            with open(__file__, 'rb') as inp:
+                cache.gzip('b', self.stat, inp)
+
+        self.assertEqual(1, mock_compress.call_count)
+
+
+class TestPooledHTTPServer(unittest.TestCase):
+    """ Test the pooled HTTP server. """
+
+    @classmethod
+    @patch('homeassistant.components.http.util.get_local_ip',
+           return_value='127.0.0.1')
+    def setUpClass(cls, mock_get_local_ip):  # pylint: disable=invalid-name
+        """ Initalizes a Home Assistant server. """
+        cls.hass = ha.HomeAssistant()
+
+        bootstrap.setup_component(
+            cls.hass, http.DOMAIN,
+            {http.DOMAIN: {http.CONF_API_PASSWORD: API_PASSWORD,
+                           http.CONF_SERVER_PORT: SERVER_PORT,
+                           http.CONF_SERVER_MODE: http.SERVER_MODE_POOLED,
+                           http.CONF_SERVER_WORKERS: 2}})
+
+        bootstrap.setup_component(cls.hass, 'api')
+        bootstrap.setup_component(cls.hass, 'frontend')
+
+        cls.hass.start()
+
+    @classmethod
+    def tearDownClass(cls):  # pylint: disable=invalid-name
+        """ Stops the Home Assistant server. """
+        cls.hass.stop()
+
+    def test_server_is_pooled(self):
+        self.assertIsInstance(self.hass.http, http.PooledHTTPServer)
+
+    def test_keep_alive(self):
+        with patch('homeassistant.components.http.KeepAliveConnection',
+                   wraps=http.KeepAliveConnection) as mock_conn, \
+                requests.Session() as session:
+            for _ in range(5):
+                req = session.get(_url(const.URL_API), headers=HA_HEADERS)
+                self.assertEqual(200, req.status_code)
+                self.assertEqual(11, req.raw.version)
+
+            self.assertEqual(1, mock_conn.call_count)
+
+    def test_access_denied_without_password(self):
+        req = requests.get(_url(const.URL_API))
+
+        self.assertEqual(401, req.status_code)
+
+    def test_not_found(self):
+        req = requests.get(_url('/not_existing'), headers=HA_HEADERS)
+
+        self.assertEqual(404, req.status_code)
+
+    def test_not_modified_keeps_connection(self):
+        with patch('homeassistant.components.http.KeepAliveConnection',
+                   wraps=http.KeepAliveConnection) as mock_conn, \
+                requests.Session() as session:
+            req = session.get(_url('/static/favicon.ico'))
+            self.assertEqual(200, req.status_code)
+
+            req = session.get(_url('/static/favicon.ico'), headers={
+                'If-None-Match': req.headers['ETag']})
+            self.assertEqual(304, req.status_code)
+            self.assertNotIn('Connection', req.headers)
+
+            req = session.get(_url('/static/favicon.ico'))
+            self.assertEqual(200, req.status_code)
+
+            self.assertEqual(1, mock_conn.call_count)
+
+    def test_more_streams_than_workers(self):
+        streams = [requests.get(_url(const.URL_API_STREAM),
+                                stream=True, headers=HA_HEADERS)
+                   for _ in range(3)]
+
+        try:
+            for stream in streams:
+                self.assertEqual(b'data: ping\n\n', stream.raw.read(12))
+
+            # Workers are not blocked by the open streams
+            req = requests.get(_url(const.URL_API), headers=HA_HEADERS)
+            self.assertEqual(200, req.status_code)
+
+            self.hass.bus.fire('test_event')
+            self.hass.pool.block_till_done()
+
+            for stream in streams:
+                self.assertIn(b'test_event', stream.raw.read(50))
+        finally:
+            for stream in streams:
+                stream.close()
@@ -8,6 +8,7 @@ from collections import namedtuple
 import unittest
 from unittest import mock
 import socket
+import threading
 
 import homeassistant.components.mqtt as mqtt
 from homeassistant.const import (
@@ -48,6 +49,12 @@ class TestMQTT(unittest.TestCase):
     def test_setup_fails_if_no_broker_config(self):
         self.assertFalse(mqtt.setup(self.hass, {mqtt.DOMAIN: {}}))
 
+    def test_setup_fails_if_invalid_overload(self):
+        self.assertFalse(mqtt.setup(self.hass, {mqtt.DOMAIN: {
+            mqtt.CONF_BROKER: 'test-broker',
+            mqtt.CONF_OVERLOAD: 'ignore',
+        }}))
+
     def test_setup_fails_if_no_connect_broker(self):
         with mock.patch('homeassistant.components.mqtt.MQTT',
                         side_effect=socket.error()):
@@ -138,6 +145,49 @@ class TestMQTT(unittest.TestCase):
         self.hass.pool.block_till_done()
         self.assertEqual(0, len(self.calls))
 
+    def test_slow_callback_does_not_block_others(self):
+        self.hass.pool.add_worker()
+        self.hass.pool.add_worker()
+        release = threading.Event()
+        fast_called = threading.Event()
+
+        mqtt.subscribe(self.hass, 'test-topic/#',
+                       lambda *args: release.wait(10))
+        mqtt.subscribe(self.hass, 'test-topic/bier',
+                       lambda *args: fast_called.set())
+
+        fire_mqtt_message(self.hass, 'test-topic/bier', 'test-payload')
+
+        try:
+            self.assertTrue(fast_called.wait(2))
+        finally:
+            release.set()
+            self.hass.pool.block_till_done()
+
+    def test_blocking_callbacks_do_not_stop_delivery(self):
+        self.hass.pool.add_worker()
+        mqtt.MESSAGE_QUEUE.max_in_flight = 1
+        release = threading.Event()
+        received = threading.Semaphore(0)
+
+        def blocking_callback(*args):
+            """ Blocks until released. """
+            received.release()
+            release.wait(10)
+
+        mqtt.subscribe(self.hass, 'test-topic', blocking_callback)
+
+        try:
+            for payload in '12':
+                mqtt.MESSAGE_QUEUE.put('test-topic', 0, payload)
+
+            for _ in range(2):
+                self.assertTrue(received.acquire(timeout=2))
+        finally:
+            release.set()
+            mqtt.MESSAGE_QUEUE.stop()
+            self.hass.pool.block_till_done()
+
 
 class TestMQTTCallbacks(unittest.TestCase):
     """ Test the MQTT callbacks. """
@@ -162,7 +212,8 @@ class TestMQTTCallbacks(unittest.TestCase):
         MQTTMessage = namedtuple('MQTTMessage', ['topic', 'qos', 'payload'])
         message = MQTTMessage('test_topic', 1, 'Hello World!'.encode('utf-8'))
 
-        mqtt._mqtt_on_message(None, {'hass': self.hass}, message)
+        mqtt._mqtt_on_message(None, {'queue': mqtt.MESSAGE_QUEUE}, message)
+        mqtt.MESSAGE_QUEUE.block_till_done()
         self.hass.pool.block_till_done()
 
         self.assertEqual(1, len(calls))
@@ -206,3 +257,159 @@ class TestMQTTCallbacks(unittest.TestCase):
         self.assertEqual(4, len(mqttc.reconnect.mock_calls))
         self.assertEqual([1, 2, 4],
                          [call[1][0] for call in mock_sleep.mock_calls])
+
+
+class TestTopicTrie(unittest.TestCase):
+    """ Test the topic trie. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        self.trie = mqtt.TopicTrie()
+
+    def subscribed(self, topic):
+        """ Returns the subscriptions matching topic. """
+        return sorted(self.trie.match(topic))
+
+    def test_match(self):
+        for subscription in ('a/b', 'a/+', '+/b', 'a/#', '#', 'a/b/#',
+                             'a/+/c', '+/+/+', 'x/y'):
+            self.trie.add(subscription, subscription)
+
+        self.assertEqual(['#', '+/b', 'a/#', 'a/+', 'a/b', 'a/b/#'],
+                         self.subscribed('a/b'))
+        self.assertEqual(['#', '+/+/+', 'a/#', 'a/+/c', 'a/b/#'],
+                         self.subscribed('a/b/c'))
+        self.assertEqual(['#', 'a/#'], self.subscribed('a'))
+        self.assertEqual(['#', 'a/#', 'a/b/#'], self.subscribed('a/b/c/d'))
+        self.assertEqual(['#', '+/+/+', 'a/#', 'a/+/c'],
+                         self.subscribed('a//c'))
+        self.assertEqual(['#'], self.subscribed('b'))
+
+    def test_same_subscription_twice(self):
+        self.trie.add('a/b', 'first')
+        self.trie.add('a/b', 'second')
+
+        self.assertEqual(['first', 'second'], self.trie.match('a/b'))
+
+
+class TestMessageQueue(unittest.TestCase):
+    """ Test the queue of received messages. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        self.hass = get_test_home_assistant(1)
+        self.calls = []
+        self.queue = None
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """ Stop down stuff we started. """
+        if self.queue is not None:
+            self.queue.stop()
+        self.hass.stop()
+
+    def queued(self, queue):
+        """ Returns the queued messages as (topic, payload). """
+        return [(topic, payload) for topic, _, payload in queue._queue]
+
+    def test_coalesce_when_full(self):
+        queue = mqtt.MessageQueue(self.hass, 2, mqtt.OVERLOAD_COALESCE)
+
+        queue.put('a', 0, '1')
+        queue.put('b', 0, '1')
+        queue.put('a', 0, '2')
+        self.assertEqual([('a', '2'), ('b', '1')], self.queued(queue))
+
+        # Topics that are not queued replace the oldest message
+        queue.put('c', 0, '1')
+        self.assertEqual([('b', '1'), ('c', '1')], self.queued(queue))
+
+        self.assertEqual(1, queue.coalesced)
+        self.assertEqual(1, queue.dropped)
+        self.assertEqual(2, queue.stats['a'].received)
+        self.assertEqual(1, queue.stats['a'].coalesced)
+        self.assertEqual(1, queue.stats['a'].dropped)
+
+    def test_no_coalesce_before_full(self):
+        queue = mqtt.MessageQueue(self.hass, 10, mqtt.OVERLOAD_COALESCE)
+
+        queue.put('a', 0, '1')
+        queue.put('b', 0, '1')
+        queue.put('a', 0, '2')
+        self.assertEqual([('a', '1'), ('b', '1'), ('a', '2')],
+                         self.queued(queue))
+        self.assertEqual(0, queue.coalesced)
+        self.assertEqual(0, queue.dropped)
+
+    def test_put_while_firing(self):
+        firing = threading.Event()
+        release = threading.Event()
+
+        def slow_fire(event_type, data):
+            """ Blocks while a message is fired. """
+            firing.set()
+            release.wait(5)
+
+        queue = self.queue = mqtt.MessageQueue(self.hass)
+
+        with mock.patch.object(self.hass.bus, 'fire', side_effect=slow_fire):
+            queue.start()
+            queue.put('a', 0, '1')
+            self.assertTrue(firing.wait(5))
+
+            # Does not wait for the event to be fired
+            put = threading.Thread(target=queue.put, args=('b', 0, '1'))
+            put.start()
+            put.join(1)
+            self.assertFalse(put.is_alive())
+
+            release.set()
+            queue.block_till_done()
+
+    def test_drop_oldest_when_full(self):
+        queue = mqtt.MessageQueue(self.hass, 2, mqtt.OVERLOAD_DROP_OLDEST)
+
+        for payload in '123':
+            queue.put('a', 0, payload)
+
+        self.assertEqual([('a', '2'), ('a', '3')], self.queued(queue))
+        self.assertEqual(0, queue.coalesced)
+        self.assertEqual(1, queue.dropped)
+
+    def test_topic_rate(self):
+        queue = mqtt.MessageQueue(self.hass)
+
+        with mock.patch('homeassistant.components.mqtt.time.monotonic',
+                        side_effect=[0, 0.5, 1]):
+            for _ in range(3):
+                queue.put('a', 0, 'payload')
+
+        self.assertEqual(2, queue.stats['a'].rate)
+
+    def test_messages_in_flight_are_limited(self):
+        self.hass.bus.listen(mqtt.EVENT_MQTT_MESSAGE_RECEIVED,
+                             lambda event: self.calls.append(event))
+        queue = self.queue = mqtt.MessageQueue(
+            self.hass, overload=mqtt.OVERLOAD_DROP_OLDEST, max_in_flight=2)
+        queue.start()
+
+        for payload in '123':
+            queue.put('a', 0, payload)
+
+        for _ in range(50):
+            if len(queue._queue) == 1:
+                break
+            threading.Event().wait(0.01)
+
+        self.hass.pool.block_till_done()
+        self.assertEqual(2, len(self.calls))
+        self.assertEqual(1, len(queue._queue))
+
+        # Events the queue did not fire do not free a slot
+        queue.done(dict(self.calls[0].data))
+        self.hass.pool.block_till_done()
+        self.assertEqual(1, len(queue._queue))
+
+        queue.done(self.calls[0].data)
+        queue.block_till_done()
+        self.hass.pool.block_till_done()
+
+        self.assertEqual(['1', '2', '3'],
+                         [event.data['payload'] for event in self.calls])
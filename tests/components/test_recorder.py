@@ -68,3 +68,17 @@ class TestRecorder(unittest.TestCase):
             'SELECT * FROM events WHERE event_type = ?', (event_type, ))
 
         self.assertEqual(events, db_events)
+
+    def test_saving_state_changed_event_without_revision(self):
+        """ Tests the state machine revision is not saved with events. """
+        self.hass.states.set('test.recorder', 'on')
+
+        self.hass.pool.block_till_done()
+        recorder._INSTANCE.block_till_done()
+
+        db_events = recorder.query_events(
+            'SELECT * FROM events WHERE event_type = ?', ('state_changed', ))
+
+        self.assertEqual(1, len(db_events))
+        self.assertEqual('test.recorder', db_events[0].data['entity_id'])
+        self.assertNotIn('revision', db_events[0].data)
@@ -0,0 +1,125 @@
+"""
+tests.components.test_zone
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Tests the zone component.
+"""
+# pylint: disable=too-many-public-methods
+import random
+import unittest
+
+from homeassistant.components import zone
+from homeassistant.util.location import distance
+
+from tests.common import get_test_home_assistant
+
+
+def brute_force_active_zone(hass, latitude, longitude, radius=0):
+    """ Finds the active zone by measuring the distance to all zones. """
+    closest = None
+    min_dist = None
+
+    for entity_id in sorted(hass.states.entity_ids(zone.DOMAIN)):
+        state = hass.states.get(entity_id)
+        zone_dist = distance(latitude, longitude,
+                             state.attributes['latitude'],
+                             state.attributes['longitude'])
+
+        if zone_dist - radius >= state.attributes['radius']:
+            continue
+
+        if closest is None or zone_dist < min_dist or (
+                zone_dist == min_dist and
+                state.attributes['radius'] < closest.attributes['radius']):
+            closest = state
+            min_dist = zone_dist
+
+    return closest
+
+
+class TestComponentZone(unittest.TestCase):
+    """ Tests the zone component. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        """ Init needed objects. """
+        self.hass = get_test_home_assistant()
+        self.assertTrue(zone.setup(self.hass, {zone.DOMAIN: [
+            {'name': 'Work', 'latitude': 32.88, 'longitude': -117.23,
+             'radius': 250},
+            {'name': 'School', 'latitude': 32.87, 'longitude': -117.22},
+            {'name': 'County', 'latitude': 32.8, 'longitude': -117.2,
+             'radius': 30000},
+        ]}))
+        self.hass.pool.block_till_done()
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """ Stop down stuff we started. """
+        self.hass.stop()
+
+    def test_active_zone(self):
+        self.assertEqual(
+            'zone.home',
+            zone.active_zone(self.hass, self.hass.config.latitude,
+                             self.hass.config.longitude).entity_id)
+        self.assertEqual(
+            'zone.work', zone.active_zone(self.hass, 32.8805, -117.23)
+            .entity_id)
+        self.assertEqual(
+            'zone.county', zone.active_zone(self.hass, 32.7, -117.2)
+            .entity_id)
+        self.assertIsNone(zone.active_zone(self.hass, 52.37, 4.89))
+
+        # Inaccurate locations are in a zone if they might be in it
+        self.assertEqual(
+            'zone.school',
+            zone.active_zone(self.hass, 32.8725, -117.22, 300).entity_id)
+
+    def test_index_matches_measuring_all_zones(self):
+        rand = random.Random(0)
+
+        for idx in range(100):
+            self.hass.states.set('zone.test_{}'.format(idx), zone.STATE, {
+                'latitude': 32.8 + rand.uniform(-0.3, 0.3),
+                'longitude': -117.2 + rand.uniform(-0.3, 0.3),
+                'radius': rand.choice((50, 100, 1000, 20000))})
+        self.hass.pool.block_till_done()
+
+        for _ in range(200):
+            location = (32.8 + rand.uniform(-0.4, 0.4),
+                        -117.2 + rand.uniform(-0.4, 0.4),
+                        rand.choice((0, 0, 100, 5000)))
+
+            self.assertEqual(
+                brute_force_active_zone(self.hass, *location),
+                zone.active_zone(self.hass, *location))
+
+    def test_index_is_updated_when_zones_change(self):
+        index = zone.zone_index(self.hass)
+        self.assertIs(index, zone.zone_index(self.hass))
+
+        new_zone = zone.Zone(self.hass, 'New', 52.37, 4.89, 100, None)
+        new_zone.entity_id = 'zone.new'
+        new_zone.update_ha_state()
+
+        self.assertEqual(
+            'zone.new', zone.active_zone(self.hass, 52.37, 4.89).entity_id)
+
+        new_zone.latitude = 52.5
+        new_zone.update_ha_state()
+
+        self.assertIsNone(zone.active_zone(self.hass, 52.37, 4.89))
+        self.assertEqual(
+            'zone.new', zone.active_zone(self.hass, 52.5, 4.89).entity_id)
+
+        self.hass.states.remove('zone.new')
+        self.hass.pool.block_till_done()
+
+        self.assertIsNone(zone.active_zone(self.hass, 52.37, 4.89))
+
+    def test_active_zones(self):
+        self.assertEqual(
+            ['zone.work', None, 'zone.work'],
+            [None if state is None else state.entity_id
+             for state in zone.active_zones(self.hass, [
+                 (32.8805, -117.23, 0), (52.37, 4.89, 0),
+                 (32.8805, -117.23, 0)])])
@@ -121,6 +121,16 @@ class TestEventHelpers(unittest.TestCase):
         self.assertEqual(1, len(specific_runs))
         self.assertEqual(3, len(wildcard_runs))
 
+    def test_matcher(self):
+        """ Test matching subjects against processed parameters. """
+        self.assertEqual(ha.MATCH_ALL, process_match_param(None))
+        self.assertEqual(('on',), process_match_param('on'))
+        self.assertEqual(('on', 'off'), process_match_param(['on', 'off']))
+
+        self.assertTrue(matcher('on', process_match_param(None)))
+        self.assertTrue(matcher('on', process_match_param(['on', 'off'])))
+        self.assertFalse(matcher('on', process_match_param('off')))
+
     def _send_time_changed(self, now):
         """ Send a time changed event. """
         self.hass.bus.fire(ha.EVENT_TIME_CHANGED, {ha.ATTR_NOW: now})
@@ -0,0 +1,220 @@
+"""
+tests.helpers.test_polling
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Tests the polling scheduler.
+"""
+# pylint: disable=protected-access,too-many-public-methods
+# pylint: disable=too-few-public-methods
+from datetime import timedelta
+import logging
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import homeassistant.core as ha
+from homeassistant.helpers.entity_component import EntityComponent
+from homeassistant.helpers.polling import (
+    PollingScheduler, ADAPTIVE_MAX_FACTOR)
+import homeassistant.util.dt as dt_util
+
+from tests.common import fire_time_changed
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollEntity(object):
+    """ Entity that counts its updates. """
+
+    def __init__(self, entity_id, block=None):
+        self.entity_id = entity_id
+        self.should_poll = True
+        self.updates = 0
+        self.block = block
+
+    def update_ha_state(self, force_refresh=False):
+        """ Counts an update and waits for block if given. """
+        self.updates += 1
+
+        if self.block is not None:
+            self.block.wait(5)
+
+
+class ValueEntity(PollEntity):
+    """ Entity that writes value as its state. """
+
+    def __init__(self, hass, entity_id):
+        super().__init__(entity_id)
+        self.hass = hass
+        self.value = 0
+
+    def update_ha_state(self, force_refresh=False):
+        """ Writes the value to the state machine. """
+        super().update_ha_state(force_refresh)
+        self.hass.states.set(self.entity_id, self.value)
+
+
+class TestPollingScheduler(unittest.TestCase):
+    """ Tests the polling scheduler. """
+
+    def setUp(self):     # pylint: disable=invalid-name
+        """ things to be run when tests are started. """
+        self.hass = ha.HomeAssistant()
+        self.block = threading.Event()
+        self.poller = PollingScheduler(self.hass, _LOGGER, 10)
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """ Stop down stuff we started. """
+        self.block.set()
+        self.hass.stop()
+
+    def _tick(self, seconds):
+        """ Fires a time changed event seconds from now. """
+        fire_time_changed(
+            self.hass, dt_util.utcnow() + timedelta(seconds=seconds))
+        self.hass.pool.block_till_done()
+
+    def _poll(self, seconds):
+        """ Ticks seconds from now and waits for the updates. """
+        self._tick(seconds)
+        self.poller.block_till_done()
+
+    def test_updates_are_spread(self):
+        for idx in range(5):
+            self.poller.add(PollEntity('sensor.test_{}'.format(idx)))
+
+        start = dt_util.utcnow()
+        planned = sorted(item[0] for item in self.poller._schedule)
+
+        self.assertEqual(5, len(set(planned)))
+        self.assertLess(planned[-1], start + timedelta(seconds=10))
+        # No two updates are planned within a second of each other
+        self.assertTrue(all(
+            (later - earlier).total_seconds() > 1
+            for earlier, later in zip(planned, planned[1:])))
+
+    def test_slow_update_does_not_delay_others(self):
+        slow = PollEntity('sensor.slow', self.block)
+        fast = PollEntity('sensor.fast')
+        self.poller.add(slow)
+        self.poller.add(fast)
+
+        self._tick(10)
+        for _ in range(50):
+            if fast.updates:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual(1, slow.updates)
+        self.assertEqual(1, fast.updates)
+        self.assertIn('sensor.fast', self.poller.durations)
+
+        # The slow update is still running and is skipped
+        self._tick(20)
+        self.block.set()
+        self.poller.block_till_done()
+
+        self.assertEqual(1, slow.updates)
+        self.assertEqual(2, fast.updates)
+        self.assertEqual(1, self.poller.skipped['sensor.slow'])
+        self.assertIn('sensor.slow', self.poller.durations)
+
+    def test_update_timeout_adds_worker(self):
+        self.poller.timeout = 0
+        self.poller.add(PollEntity('sensor.slow', self.block))
+
+        self._tick(10)
+        self._tick(20)
+
+        self.assertEqual(1, self.poller.timeouts['sensor.slow'])
+        self.assertEqual(self.poller.workers + 1,
+                         self.poller._pool.worker_count)
+
+        self.block.set()
+        self.poller.block_till_done()
+
+        self.assertEqual(self.poller.workers, self.poller._pool.worker_count)
+
+    def test_stop(self):
+        entity = PollEntity('sensor.test')
+        self.poller.add(entity)
+        self.hass.bus.fire(ha.EVENT_HOMEASSISTANT_STOP)
+        self.hass.pool.block_till_done()
+
+        self._tick(10)
+
+        self.assertEqual(0, entity.updates)
+
+    def test_stop_does_not_wait_for_hanging_update(self):
+        self.poller.add(PollEntity('sensor.slow', self.block))
+        self._tick(10)
+        pool = self.poller._pool
+
+        self.hass.bus.fire(ha.EVENT_HOMEASSISTANT_STOP)
+        self.hass.pool.block_till_done()
+
+        self.assertFalse(pool.running)
+        self.assertFalse(self.block.is_set())
+
+    def test_schedulers_share_pool(self):
+        other = PollingScheduler(self.hass, _LOGGER, 10)
+        self.poller.add(PollEntity('sensor.test'))
+        other.add(PollEntity('sensor.other'))
+
+        self._tick(10)
+        self.poller.block_till_done()
+
+        self.assertIs(self.poller._pool, other._pool)
+
+    def test_entity_scan_interval(self):
+        entity = PollEntity('sensor.test')
+        entity.scan_interval = 300
+        self.poller.add(entity)
+        self.poller.add(PollEntity('sensor.platform'), 60)
+
+        self.assertEqual(300, self.poller.interval('sensor.test'))
+        self.assertEqual(60, self.poller.interval('sensor.platform'))
+
+        self._poll(300)
+        self._poll(400)
+        self.assertEqual(1, entity.updates)
+
+        self._poll(700)
+        self.assertEqual(2, entity.updates)
+
+    def test_adaptive_scan_interval(self):
+        entity = ValueEntity(self.hass, 'sensor.test')
+        self.poller.add(entity, adaptive=True)
+
+        # The first update creates the state
+        self._poll(10)
+        self.assertEqual(10, self.poller.interval('sensor.test'))
+
+        intervals = []
+        for idx in range(5):
+            self._poll(1000 * (idx + 1))
+            intervals.append(self.poller.interval('sensor.test'))
+
+        self.assertEqual([20, 40, 80, 80, 80], intervals)
+        self.assertEqual(80, 10 * ADAPTIVE_MAX_FACTOR)
+
+        entity.value = 1
+        self._poll(10000)
+
+        self.assertEqual(10, self.poller.interval('sensor.test'))
+
+    def test_platform_scan_interval(self):
+        platform = Mock(SCAN_INTERVAL=None)
+        platform.setup_platform = \
+            lambda hass, config, add_devices, info: add_devices(
+                [PollEntity('test_domain.test')])
+        component = EntityComponent(_LOGGER, 'test_domain', self.hass, 30)
+
+        with patch('homeassistant.helpers.entity_component.'
+                   'prepare_setup_platform', return_value=platform):
+            component._setup_platform('test', {
+                'scan_interval': '120', 'adaptive_scan': True})
+
+        polled = component.poller._entities['test_domain.test']
+        self.assertEqual(120, polled.scan_interval)
+        self.assertTrue(polled.adaptive)
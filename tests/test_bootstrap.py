@@ -6,15 +6,22 @@ Tests bootstrap.
 """
 # pylint: disable=too-many-public-methods,protected-access
 import os
+import sys
 import tempfile
 import unittest
 from unittest import mock
 
-from homeassistant import core, bootstrap
+import logging
+import threading
+
+from homeassistant import core, bootstrap, loader
 from homeassistant.const import __version__
+from homeassistant.helpers.entity_component import EntityComponent
 import homeassistant.util.dt as dt_util
 
-from tests.common import mock_detect_location_info
+from tests.common import mock_detect_location_info, MockModule
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class TestBootstrap(unittest.TestCase):
@@ -83,3 +90,143 @@ class TestBootstrap(unittest.TestCase):
             bootstrap.process_ha_config_upgrade(hass)
 
             self.assertTrue(os.path.isfile(check_file))
+
+    def test_parallel_setup(self):
+        hass = core.HomeAssistant()
+        loader.prepare(hass)
+        hass.config.setup_workers = 2
+        order = []
+        comp_b_started = threading.Event()
+
+        def setup_a(hass, config):
+            """ Only succeeds if comp_b is set up at the same time. """
+            order.append('comp_a')
+            return comp_b_started.wait(5)
+
+        def setup_b(hass, config):
+            """ Lets comp_a finish. """
+            order.append('comp_b')
+            comp_b_started.set()
+            return True
+
+        def setup_c(hass, config):
+            """ Depends on comp_a. """
+            order.append('comp_c')
+            return True
+
+        loader.set_component('comp_a', MockModule('comp_a'))
+        loader.set_component('comp_b', MockModule('comp_b'))
+        loader.set_component('comp_c', MockModule('comp_c', ['comp_a']))
+        loader.get_component('comp_a').setup = setup_a
+        loader.get_component('comp_b').setup = setup_b
+        loader.get_component('comp_c').setup = setup_c
+
+        try:
+            setup_times = bootstrap._setup_components_parallel(
+                hass, ['comp_a', 'comp_b', 'comp_c'], {}, 2)
+        finally:
+            hass.stop()
+
+        self.assertEqual(['comp_a', 'comp_b', 'comp_c'],
+                         sorted(hass.config.components))
+        self.assertLess(order.index('comp_a'), order.index('comp_c'))
+        self.assertEqual(['comp_a', 'comp_b', 'comp_c'], sorted(setup_times))
+
+    def test_parallel_setup_shares_platform_pool(self):
+        hass = core.HomeAssistant()
+        loader.prepare(hass)
+        platform_b_started = threading.Event()
+        threads = set()
+
+        def setup_platform_a(hass, config, add_devices, info=None):
+            """ Only succeeds if platform b is set up at the same time. """
+            threads.add(threading.current_thread())
+            self.assertTrue(platform_b_started.wait(5))
+
+        def setup_platform_b(hass, config, add_devices, info=None):
+            """ Lets platform a finish. """
+            threads.add(threading.current_thread())
+            platform_b_started.set()
+
+        def setup_comp(hass, config):
+            """ Sets up both platforms with an entity component. """
+            EntityComponent(_LOGGER, 'comp', hass).setup(config)
+            return True
+
+        loader.set_component('comp', MockModule('comp', setup=setup_comp))
+        loader.get_component('comp').setup = setup_comp
+        loader.set_component(
+            'comp.a', mock.Mock(setup_platform=setup_platform_a,
+                                DEPENDENCIES=[], REQUIREMENTS=[]))
+        loader.set_component(
+            'comp.b', mock.Mock(setup_platform=setup_platform_b,
+                                DEPENDENCIES=[], REQUIREMENTS=[]))
+
+        try:
+            with mock.patch('homeassistant.core.create_worker_pool',
+                            wraps=core.create_worker_pool) as mock_pool:
+                bootstrap._setup_components_parallel(
+                    hass, ['comp'],
+                    {'comp': [{'platform': 'a'}, {'platform': 'b'}]}, 2)
+        finally:
+            hass.stop()
+
+        self.assertIn('comp', hass.config.components)
+        self.assertEqual(2, mock_pool.call_count)
+        self.assertEqual(2, len(threads))
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual({}, bootstrap._PLATFORM_POOLS)
+
+    def test_setup_workers_config(self):
+        hass = core.HomeAssistant()
+
+        with mock.patch('homeassistant.util.location.detect_location_info',
+                        mock_detect_location_info):
+            bootstrap.process_ha_core_config(hass, {'setup_workers': '4'})
+
+        self.assertEqual(4, hass.config.setup_workers)
+        hass.stop()
+
+    def test_requirements_cache(self):
+        with tempfile.TemporaryDirectory() as config_dir, \
+                tempfile.TemporaryDirectory() as site_dir, \
+                mock.patch.object(sys, 'path', sys.path + [site_dir]), \
+                mock.patch('homeassistant.util.package.install_package',
+                           return_value=True) as mock_install:
+            hass = core.HomeAssistant()
+            hass.config.config_dir = config_dir
+            component = MockModule('comp')
+            component.REQUIREMENTS = ['package==1.0']
+
+            self.assertTrue(
+                bootstrap._handle_requirements(hass, component, 'comp'))
+            self.assertEqual(1, mock_install.call_count)
+
+            # A restart does not check the requirement again
+            bootstrap._REQUIREMENTS_CACHES.clear()
+            self.assertTrue(
+                bootstrap._handle_requirements(hass, component, 'comp'))
+            self.assertEqual(1, mock_install.call_count)
+
+            # Changing the lib dir invalidates the cache
+            bootstrap._REQUIREMENTS_CACHES.clear()
+            os.mkdir(hass.config.path('lib'))
+            self.assertTrue(
+                bootstrap._handle_requirements(hass, component, 'comp'))
+            self.assertEqual(2, mock_install.call_count)
+
+            # Installing or removing a package in site-packages invalidates it
+            bootstrap._REQUIREMENTS_CACHES.clear()
+            os.mkdir(os.path.join(site_dir, 'package-1.0.dist-info'))
+            self.assertTrue(
+                bootstrap._handle_requirements(hass, component, 'comp'))
+            self.assertEqual(3, mock_install.call_count)
+
+            bootstrap._REQUIREMENTS_CACHES.clear()
+            os.rmdir(os.path.join(site_dir, 'package-1.0.dist-info'))
+            self.assertTrue(
+                bootstrap._handle_requirements(hass, component, 'comp'))
+            self.assertEqual(4, mock_install.call_count)
+
+            bootstrap._REQUIREMENTS_CACHES.clear()
+            hass.stop()
@@ -5,6 +5,8 @@ tests.test_config
 Tests config utils.
 """
 # pylint: disable=too-many-public-methods,protected-access
+import datetime
+import json
 import unittest
 import unittest.mock as mock
 import os
@@ -19,6 +21,7 @@ from tests.common import get_test_config_dir, mock_detect_location_info
 
 CONFIG_DIR = get_test_config_dir()
 YAML_PATH = os.path.join(CONFIG_DIR, config_util.YAML_CONFIG_FILE)
+INCLUDE_PATH = os.path.join(CONFIG_DIR, 'include.yaml')
 
 
 def create_file(path):
@@ -32,8 +35,10 @@ class TestConfig(unittest.TestCase):
 
     def tearDown(self):  # pylint: disable=invalid-name
         """ Clean up. """
-        if os.path.isfile(YAML_PATH):
-            os.remove(YAML_PATH)
+        for path in (YAML_PATH, INCLUDE_PATH,
+                     config_util.yaml_cache_path(YAML_PATH)):
+            if os.path.isfile(path):
+                os.remove(path)
 
     def test_create_default_config(self):
         """ Test creationg of default config. """
@@ -102,6 +107,89 @@ class TestConfig(unittest.TestCase):
         self.assertEqual({'hello': 'world'},
                          config_util.load_config_file(YAML_PATH))
 
+    def test_load_yaml_config_include(self):
+        """ Test loading of included YAML files. """
+        with open(YAML_PATH, 'w') as f:
+            f.write('hello: !include include.yaml')
+        with open(INCLUDE_PATH, 'w') as f:
+            f.write('- world')
+
+        self.assertEqual({'hello': ['world']},
+                         config_util.load_yaml_config_file(YAML_PATH))
+
+    def test_load_config_uses_cache(self):
+        """ Test that unchanged config is loaded from the cache. """
+        with open(YAML_PATH, 'w') as f:
+            f.write('hello: !include include.yaml')
+        with open(INCLUDE_PATH, 'w') as f:
+            f.write('world')
+
+        self.assertEqual({'hello': 'world'},
+                         config_util.load_config_file(YAML_PATH))
+        self.assertTrue(
+            os.path.isfile(config_util.yaml_cache_path(YAML_PATH)))
+
+        with mock.patch('yaml.SafeLoader.get_single_data') as mock_load, \
+                mock.patch('yaml.CSafeLoader.get_single_data',
+                           create=True) as mock_cload:
+            self.assertEqual({'hello': 'world'},
+                             config_util.load_config_file(YAML_PATH))
+
+        self.assertFalse(mock_load.called or mock_cload.called)
+
+        # Changing an included file invalidates the cache
+        with open(INCLUDE_PATH, 'w') as f:
+            f.write('home assistant')
+
+        self.assertEqual({'hello': 'home assistant'},
+                         config_util.load_config_file(YAML_PATH))
+
+    def test_load_config_cache_is_json(self):
+        """ Test that the cache is stored as JSON. """
+        with open(YAML_PATH, 'w') as f:
+            f.write('hello: world')
+
+        config_util.load_config_file(YAML_PATH)
+
+        with open(config_util.yaml_cache_path(YAML_PATH)) as inp:
+            cache = json.load(inp)
+
+        self.assertEqual(os.path.abspath(YAML_PATH), cache['path'])
+        self.assertEqual({'hello': 'world'}, cache['config'])
+
+    def test_load_config_ignores_invalid_cache(self):
+        """ Test that invalid or foreign caches are not used. """
+        with open(YAML_PATH, 'w') as f:
+            f.write('hello: world')
+
+        for cache in ('invalid', json.dumps(['hello']), json.dumps({
+                'path': '/other/configuration.yaml',
+                'versions': [],
+                'config': {'hello': 'cache'}})):
+            with open(config_util.yaml_cache_path(YAML_PATH), 'w') as f:
+                f.write(cache)
+
+            self.assertEqual({'hello': 'world'},
+                             config_util.load_config_file(YAML_PATH))
+
+    def test_load_config_does_not_cache_non_json_values(self):
+        """ Test that configs JSON can not represent are not cached. """
+        with open(YAML_PATH, 'w') as f:
+            f.write('1: one\nday: 2015-10-19')
+
+        self.assertEqual({1: 'one', 'day': datetime.date(2015, 10, 19)},
+                         config_util.load_config_file(YAML_PATH))
+        self.assertFalse(
+            os.path.isfile(config_util.yaml_cache_path(YAML_PATH)))
+
+    def test_load_config_rejects_python_tags(self):
+        """ Test that Python specific YAML tags are not supported. """
+        with open(YAML_PATH, 'w') as f:
+            f.write('hello: !!python/name:os.system')
+
+        self.assertRaises(HomeAssistantError,
+                          config_util.load_config_file, YAML_PATH)
+
     @mock.patch('homeassistant.util.location.detect_location_info',
                 mock_detect_location_info)
     @mock.patch('builtins.print')
@@ -7,6 +7,7 @@ Provides tests to verify that Home Assistant core works.
 # pylint: disable=protected-access,too-many-public-methods
 # pylint: disable=too-few-public-methods
 import os
+import json
 import unittest
 from unittest.mock import patch
 import time
@@ -282,6 +283,24 @@ class TestState(unittest.TestCase):
         state = ha.State('domain.hello', 'world', {'some': 'attr'})
         self.assertEqual(state, ha.State.from_dict(state.as_dict()))
 
+    def test_as_json(self):
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        self.assertEqual(state,
+                         ha.State.from_dict(json.loads(state.as_json())))
+        self.assertNotIn('", "', state.as_json())
+
+    def test_as_json_is_cached(self):
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        state.as_json()
+
+        with patch.object(ha.State, 'as_dict',
+                          return_value={}) as mock_as_dict:
+            state.as_json()
+            self.assertEqual(0, mock_as_dict.call_count)
+
+            state.copy().as_json()
+            self.assertEqual(1, mock_as_dict.call_count)
+
     def test_dict_conversion_with_wrong_data(self):
         self.assertIsNone(ha.State.from_dict(None))
         self.assertIsNone(ha.State.from_dict({'state': 'yes'}))
@@ -336,6 +355,13 @@ class TestStateMachine(unittest.TestCase):
         states = sorted(state.entity_id for state in self.states.all())
         self.assertEqual(['light.bowl', 'switch.ac'], states)
 
+    def test_all_as_json(self):
+        states = json.loads(self.states.all_as_json())
+        self.assertEqual(
+            sorted(self.states.all(), key=lambda state: state.entity_id),
+            sorted((ha.State.from_dict(state) for state in states),
+                   key=lambda state: state.entity_id))
+
     def test_remove(self):
         """ Test remove method. """
         self.assertTrue('light.bowl' in self.states.entity_ids())
@@ -345,6 +371,62 @@ class TestStateMachine(unittest.TestCase):
         # If it does not exist, we should get False
         self.assertFalse(self.states.remove('light.Bowl'))
 
+    def test_revision(self):
+        """ Test the revision is increased by changes. """
+        revision = self.states.revision
+        self.assertEqual(self.states.first_revision + 2, revision)
+
+        self.states.set('light.bowl', 'on')
+        self.assertEqual(revision, self.states.revision)
+
+        self.states.set('light.bowl', 'off')
+        self.assertEqual(revision + 1, self.states.revision)
+
+        self.states.remove('light.bowl')
+        self.assertEqual(revision + 2, self.states.revision)
+
+    def test_changed_since(self):
+        """ Test changed_since method. """
+        revision = self.states.revision
+        self.states.set('light.bowl', 'off')
+        self.states.remove('switch.ac')
+
+        current, states, removed = self.states.changed_since(revision)
+
+        self.assertEqual(self.states.revision, current)
+        self.assertEqual([self.states.get('light.bowl')], states)
+        self.assertEqual(['switch.ac'], removed)
+
+        self.assertEqual((current, [], []),
+                         self.states.changed_since(current))
+
+        self.states.set('switch.ac', 'on')
+        self.assertEqual(
+            [], self.states.changed_since(self.states.revision)[2])
+
+    def test_changed_since_unknown_revision(self):
+        """ Test changed_since with revisions of another run. """
+        self.assertIsNone(
+            self.states.changed_since(self.states.first_revision - 1))
+        self.assertIsNone(
+            self.states.changed_since(self.states.revision + 1))
+
+    def test_changed_since_trimmed_removals(self):
+        """ Test changed_since with revisions older than known removals. """
+        revision = self.states.revision
+
+        with patch('homeassistant.core.REMOVED_HISTORY_SIZE', 1):
+            self.states.remove('light.bowl')
+            removed_revision = self.states.revision
+            self.states.remove('switch.ac')
+
+        self.assertEqual(1, len(self.states._removed))
+        self.assertIsNone(self.states.changed_since(revision))
+        self.assertEqual(
+            ['switch.ac'], self.states.changed_since(removed_revision)[2])
+        self.assertIsNotNone(
+            self.states.changed_since(self.states.first_revision))
+
     def test_track_change(self):
         """ Test states.track_change. """
         self.pool.add_worker()
@@ -5,12 +5,17 @@ ha_tests.test_loader
 Provides tests to verify that we can load components.
 """
 # pylint: disable=too-many-public-methods,protected-access
+import json
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
 import homeassistant.loader as loader
 import homeassistant.components.http as http
 
-from tests.common import get_test_home_assistant, MockModule
+from tests.common import (
+    get_test_home_assistant, get_test_config_dir, MockModule)
 
 
 class TestLoader(unittest.TestCase):
@@ -84,3 +89,63 @@ class TestLoader(unittest.TestCase):
         self.assertEqual(
             ['group', 'mod2'],
             loader.load_order_components(['mod2', 'mod1']))
+
+    def test_load_order_without_import(self):
+        """ Test that the load order is resolved without importing. """
+        loader._COMPONENT_CACHE.pop('logbook', None)
+
+        with patch('homeassistant.loader.get_component') as mock_get:
+            self.assertEqual(
+                ['recorder', 'http', 'logbook'],
+                loader.load_order_component('logbook'))
+
+        self.assertFalse(mock_get.called)
+
+        manifest = loader.get_manifest('logbook')
+        self.assertEqual(['recorder', 'http'], manifest['dependencies'])
+
+    def test_manifest_cached_in_config_dir(self):
+        """ Test that the manifest is stored and invalidated on change. """
+        with tempfile.TemporaryDirectory() as config_dir:
+            custom_path = os.path.join(config_dir, 'custom_components')
+            source = os.path.join(custom_path, 'manifest_test.py')
+            os.mkdir(custom_path)
+
+            with open(source, 'w') as outp:
+                outp.write("DEPENDENCIES = ['http']\n"
+                           "REQUIREMENTS = ['package==1.0']\n")
+
+            self.hass.config.config_dir = config_dir
+
+            try:
+                loader.prepare(self.hass)
+
+                self.assertEqual(['http', 'manifest_test'],
+                                 loader.load_order_component('manifest_test'))
+                loader.save_manifest()
+
+                with open(os.path.join(config_dir,
+                                       loader.MANIFEST_FILE)) as inp:
+                    self.assertEqual(
+                        ['dependencies', 'mtime', 'path'],
+                        sorted(json.load(inp)['manifest_test']))
+
+                # A new run uses the stored manifest
+                loader.prepare(self.hass)
+
+                with patch('homeassistant.loader._parse_manifest') as mock:
+                    self.assertEqual(
+                        ['http'],
+                        loader.get_manifest('manifest_test')['dependencies'])
+                self.assertFalse(mock.called)
+
+                # Changing the component invalidates its entry
+                with open(source, 'w') as outp:
+                    outp.write("DEPENDENCIES = ['sun']\n")
+                os.utime(source, (1, 1))
+
+                self.assertEqual(['sun', 'manifest_test'],
+                                 loader.load_order_component('manifest_test'))
+            finally:
+                self.hass.config.config_dir = get_test_config_dir()
+                loader.prepare(self.hass)
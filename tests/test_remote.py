@@ -7,8 +7,9 @@ Uses port 8122 for master, 8123 for slave
 Uses port 8125 as a port that nothing runs on
 """
 # pylint: disable=protected-access,too-many-public-methods
+import threading
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import homeassistant.core as ha
 import homeassistant.bootstrap as bootstrap
@@ -120,6 +121,65 @@ class TestRemoteMethods(unittest.TestCase):
         # Should not trigger any exception
         remote.fire_event(broken_api, "test.event_no_data")
 
+    def test_fire_events(self):
+        """ Test Python API fire_events. """
+        test_value = []
+
+        def listener(event):
+            """ Helper method that will verify our event got called. """
+            test_value.append(event.data)
+
+        hass.bus.listen("test.events", listener)
+
+        remote.fire_events(master_api, [
+            ha.Event("test.events", {'idx': 1}),
+            ha.Event("test.events", {'idx': 2}),
+        ])
+
+        hass.pool.block_till_done()
+
+        self.assertEqual([{'idx': 1}, {'idx': 2}],
+                         sorted(test_value, key=lambda data: data['idx']))
+
+        # Should not trigger any exception
+        remote.fire_events(broken_api, [ha.Event("test.events")])
+
+    def test_api_uses_session(self):
+        """ Test that calls to the API are made with its session. """
+        api = remote.API("127.0.0.1", API_PASSWORD, 8122)
+
+        with patch.object(api._session, 'get',
+                          wraps=api._session.get) as mock_get:
+            self.assertEqual(hass.states.get('test.test'),
+                             remote.get_state(api, 'test.test'))
+            remote.get_state(api, 'test.test')
+
+        self.assertEqual(2, mock_get.call_count)
+
+    def test_api_retries_only_connect_errors(self):
+        """ Test that requests that reached the API are not retried. """
+        api = remote.API("127.0.0.1", API_PASSWORD, 8122)
+        retries = api._session.get_adapter(api.base_url).max_retries
+
+        self.assertEqual(remote.API_RETRIES, retries.total)
+        self.assertFalse(retries.read)
+
+    def test_forwarding_target_closes_api(self):
+        """ Test that a stopped ForwardingTarget closes its API. """
+        api = remote.API('127.0.0.1', API_PASSWORD, 8126)
+
+        with patch.object(api, 'close') as mock_close:
+            target = remote.ForwardingTarget(
+                api, 10, 10, remote.FORWARD_DROP_OLDEST)
+            target.stop()
+
+            for _ in range(50):
+                if mock_close.called:
+                    break
+                threading.Event().wait(0.01)
+
+        self.assertEqual(1, mock_close.call_count)
+
     def test_get_state(self):
         """ Test Python API get_state. """
 
@@ -146,6 +206,63 @@ class TestRemoteMethods(unittest.TestCase):
 
         self.assertFalse(remote.set_state(broken_api, 'test.test', 'set_test'))
 
+    def test_get_states_since(self):
+        """ Test Python API get_states_since. """
+        revision = hass.states.revision
+        hass.states.set('test.since', 'on')
+
+        self.assertEqual(
+            (hass.states.revision, [hass.states.get('test.since')], [], False),
+            remote.get_states_since(master_api, revision))
+
+        revision, states, removed, full = \
+            remote.get_states_since(master_api, 0)
+
+        self.assertTrue(full)
+        self.assertEqual(hass.states.revision, revision)
+        self.assertEqual(len(hass.states.all()), len(states))
+
+        self.assertIsNone(remote.get_states_since(broken_api, 0))
+
+    def test_get_states_since_without_revisions(self):
+        """ Test get_states_since with an API that predates revisions. """
+        states = [ha.State('test.old', 'on')]
+        api = Mock(return_value=Mock(json=Mock(
+            return_value=[state.as_dict() for state in states])))
+
+        with patch('homeassistant.remote._LOGGER') as mock_logger:
+            self.assertEqual((None, states, [], True),
+                             remote.get_states_since(api, 0))
+
+        self.assertEqual(0, mock_logger.exception.call_count)
+
+    def test_statemachine_without_revisions(self):
+        """ Test mirror stops asking an API without revisions for them. """
+        api = Mock(return_value=Mock(json=Mock(
+            return_value=[ha.State('test.old', 'on').as_dict()])))
+
+        with patch('homeassistant.remote.get_states_since',
+                   wraps=remote.get_states_since) as mock_since:
+            states = remote.StateMachine(Mock(), api)
+            states.mirror()
+
+        self.assertEqual(1, mock_since.call_count)
+        self.assertEqual('on', states.get('test.old').state)
+
+    def test_set_states(self):
+        """ Test Python API set_states. """
+        states = remote.set_states(master_api, [
+            ha.State('test.bulk1', 'on', {'idx': 1}),
+            ha.State('test.bulk2', 'off'),
+        ])
+
+        self.assertEqual([hass.states.get('test.bulk1'),
+                          hass.states.get('test.bulk2')], states)
+        self.assertEqual({'idx': 1}, states[0].attributes)
+
+        self.assertIsNone(
+            remote.set_states(broken_api, [ha.State('test.bulk1', 'on')]))
+
     def test_is_state(self):
         """ Test Python API is_state. """
 
@@ -221,10 +338,97 @@ class TestRemoteClasses(unittest.TestCase):
         slave.pool.block_till_done()
         # Wait till master gives updated state
         hass.pool.block_till_done()
+        hass.http.event_forwarder.block_till_done()
+        slave.pool.block_till_done()
 
         self.assertEqual("remote.statemachine test",
                          slave.states.get("remote.test").state)
 
+    def test_statemachine_mirror_is_incremental(self):
+        """ Tests if mirror only fetches the changed states. """
+        results = []
+        original = remote.get_states_since
+
+        def get_states_since(api, revision):
+            """ Records the changes fetched by mirror. """
+            result = original(api, revision)
+            results.append(result)
+            return result
+
+        hass.states.set('remote.mirror_removed', 'on')
+        slave.states.mirror()
+        self.assertIsNotNone(slave.states.get('remote.mirror_removed'))
+
+        hass.states.set('remote.mirror', 'on')
+        hass.states.remove('remote.mirror_removed')
+
+        with patch('homeassistant.remote.get_states_since',
+                   side_effect=get_states_since), \
+                patch('homeassistant.remote.get_states') as mock_get_states:
+            slave.states.mirror()
+
+        _, states, removed, full = results[0]
+        self.assertFalse(full)
+        self.assertEqual(['remote.mirror'],
+                         [state.entity_id for state in states])
+        self.assertEqual(['remote.mirror_removed'], removed)
+        self.assertEqual(0, mock_get_states.call_count)
+
+        self.assertEqual('on', slave.states.get('remote.mirror').state)
+        self.assertIsNone(slave.states.get('remote.mirror_removed'))
+
+    def test_statemachine_catches_up_on_removal(self):
+        """ Tests if a removal on the master reaches the slave. """
+        hass.states.set('remote.catch_up_removed', 'on')
+        hass.pool.block_till_done()
+        hass.http.event_forwarder.block_till_done()
+        slave.pool.block_till_done()
+        self.assertIsNotNone(slave.states.get('remote.catch_up_removed'))
+
+        with patch('homeassistant.remote.MIRROR_RESYNC_DELAY', 0):
+            hass.states.remove('remote.catch_up_removed')
+            hass.states.set('remote.catch_up', 'on')
+            hass.pool.block_till_done()
+            hass.http.event_forwarder.block_till_done()
+            slave.pool.block_till_done()
+
+        self.assertEqual('on', slave.states.get('remote.catch_up').state)
+
+        for _ in range(50):
+            if slave.states.get('remote.catch_up_removed') is None:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertIsNone(slave.states.get('remote.catch_up_removed'))
+
+    def test_statemachine_buffers_out_of_order_revisions(self):
+        """ Tests that out of order events do not make the slave sync. """
+        states = remote.StateMachine(Mock(), master_api)
+        revision = states._mirror_revision
+
+        def state_changed(rev):
+            """ Returns a state changed event with revision rev. """
+            return ha.Event(ha.EVENT_STATE_CHANGED, {
+                'entity_id': 'remote.order',
+                'new_state': ha.State('remote.order', str(rev)),
+                'revision': rev})
+
+        with patch.object(states, 'mirror') as mock_mirror, \
+                patch('homeassistant.remote.MIRROR_RESYNC_DELAY', 0.05):
+            states._state_changed_listener(state_changed(revision + 2))
+            states._state_changed_listener(state_changed(revision + 3))
+            states._state_changed_listener(state_changed(revision + 1))
+
+            self.assertEqual(revision + 3, states._mirror_revision)
+            threading.Event().wait(0.1)
+
+            # A missing revision is fetched once
+            states._state_changed_listener(state_changed(revision + 5))
+            states._state_changed_listener(state_changed(revision + 6))
+            threading.Event().wait(0.1)
+
+        self.assertEqual(1, mock_mirror.call_count)
+
     def test_eventbus_fire(self):
         """ Test if events fired from the eventbus get fired. """
         test_value = []
@@ -241,9 +445,116 @@ class TestRemoteClasses(unittest.TestCase):
         slave.pool.block_till_done()
         # Wait till master gives updated event
         hass.pool.block_till_done()
+        hass.http.event_forwarder.block_till_done()
+        slave.pool.block_till_done()
 
         self.assertEqual(1, len(test_value))
 
+    def test_event_forwarder_batches(self):
+        """ Test that the EventForwarder sends queued events in batches. """
+        forwarder = remote.EventForwarder(hass, batch_size=2)
+        api = remote.API('127.0.0.1', API_PASSWORD, 8126)
+
+        with patch('homeassistant.remote.fire_events',
+                   return_value=True) as mock_fire:
+            forwarder.connect(api)
+            target = forwarder._targets[('127.0.0.1', 8126)]
+
+            # Hold the sender while events are queued
+            with target._cond:
+                for idx in range(3):
+                    forwarder._event_listener(ha.Event('test', {'idx': idx}))
+
+            forwarder.block_till_done()
+            forwarder.disconnect(api)
+
+        self.assertEqual([2, 1], [len(call[0][1])
+                                  for call in mock_fire.call_args_list])
+        self.assertEqual(3, target.sent)
+
+    def test_forwarding_target_falls_back_to_single_events(self):
+        """ Test a target without the bulk endpoint gets single events. """
+        api = remote.API('127.0.0.1', API_PASSWORD, 8126)
+
+        with patch('homeassistant.remote.fire_events',
+                   return_value=None) as mock_fire_events, \
+                patch('homeassistant.remote.fire_event',
+                      return_value=True) as mock_fire_event:
+            target = remote.ForwardingTarget(
+                api, 10, 10, remote.FORWARD_DROP_OLDEST)
+
+            for idx in range(2):
+                target.put(ha.Event('test', {'idx': idx}))
+                target.block_till_done()
+
+            target.stop()
+
+        self.assertEqual(1, mock_fire_events.call_count)
+        self.assertEqual(
+            [{'idx': 0}, {'idx': 1}],
+            [call[0][2] for call in mock_fire_event.call_args_list])
+        self.assertEqual(2, target.sent)
+        self.assertEqual(0, target.failed)
+
+    def test_forwarding_target_retries_failed_events(self):
+        """ Test that events that failed are sent again. """
+        api = remote.API('127.0.0.1', API_PASSWORD, 8126)
+
+        with patch('homeassistant.remote.fire_events',
+                   side_effect=[False, True]) as mock_fire, \
+                patch('homeassistant.remote.FORWARD_RETRY_WAIT', 0):
+            target = remote.ForwardingTarget(
+                api, 10, 10, remote.FORWARD_DROP_OLDEST)
+            target.put(ha.Event('test', {'idx': 0}))
+
+            for _ in range(50):
+                if target.sent:
+                    break
+                threading.Event().wait(0.01)
+
+            target.stop()
+
+        self.assertEqual(2, mock_fire.call_count)
+        self.assertEqual(1, target.sent)
+        self.assertEqual(1, target.failed)
+
+    def test_forwarding_target_requeue_overflow(self):
+        """ Test that requeued events respect the overflow policy. """
+        api = remote.API('127.0.0.1', API_PASSWORD, 8126)
+
+        for overflow, expected in ((remote.FORWARD_DROP_OLDEST, [1, 2]),
+                                   (remote.FORWARD_DROP_NEWEST, [0, 1])):
+            target = remote.ForwardingTarget(api, 2, 10, overflow)
+
+            with target._cond:
+                target.put(ha.Event('test', {'idx': 1}))
+                target.put(ha.Event('test', {'idx': 2}))
+                target._requeue([ha.Event('test', {'idx': 0})])
+
+                self.assertEqual(
+                    expected, [event.data['idx'] for event in target._queue])
+                self.assertEqual(1, target.dropped)
+
+                target.stop()
+
+    def test_forwarding_target_overflow(self):
+        """ Test the overflow policies of a ForwardingTarget. """
+        api = remote.API('127.0.0.1', API_PASSWORD, 8126)
+
+        for overflow, expected in ((remote.FORWARD_DROP_OLDEST, [1, 2]),
+                                   (remote.FORWARD_DROP_NEWEST, [0, 1])):
+            target = remote.ForwardingTarget(api, 2, 10, overflow)
+
+            with target._cond:
+                for idx in range(3):
+                    target.put(ha.Event('test', {'idx': idx}))
+
+                self.assertEqual(
+                    expected, [event.data['idx'] for event in target._queue])
+                self.assertEqual(1, target.dropped)
+
+                target.stop()
+
     def test_json_encoder(self):
         """ Test the JSON Encoder. """
         ha_json_enc = remote.JSONEncoder()
@@ -0,0 +1,94 @@
+"""
+tests.util.test_fetch
+~~~~~~~~~~~~~~~~~~~~~
+
+Tests the shared fetch cache.
+"""
+# pylint: disable=too-many-public-methods,protected-access
+from datetime import timedelta
+import threading
+import unittest
+
+from homeassistant.util import fetch
+
+
+class TestFetchCache(unittest.TestCase):
+    """ Tests the fetch cache. """
+
+    def setUp(self):  # pylint: disable=invalid-name
+        self.cache = fetch.FetchCache()
+        self.calls = []
+
+    def fetch_func(self):
+        """ Counts the fetches. """
+        self.calls.append(1)
+        return len(self.calls)
+
+    def test_result_is_shared(self):
+        self.assertEqual(1, self.cache.fetch('key', self.fetch_func, 60))
+        self.assertEqual(
+            1, self.cache.fetch('key', self.fetch_func, timedelta(minutes=1)))
+
+        # Other keys are fetched separately
+        self.assertEqual(2, self.cache.fetch('other', self.fetch_func, 60))
+
+    def test_result_expires(self):
+        self.assertEqual(1, self.cache.fetch('key', self.fetch_func, 0))
+        self.assertEqual(2, self.cache.fetch('key', self.fetch_func, 0))
+
+    def test_expired_results_are_removed(self):
+        for idx in range(fetch.MIN_PRUNE_SIZE - 1):
+            self.cache.fetch(idx, self.fetch_func, 0)
+
+        self.assertEqual(fetch.MIN_PRUNE_SIZE - 1, len(self.cache._results))
+
+        self.cache.fetch('key', self.fetch_func, 60)
+
+        self.assertEqual(['key'], list(self.cache._results))
+
+    def test_invalidate(self):
+        self.cache.fetch('key', self.fetch_func, 60)
+        self.cache.invalidate('key')
+
+        self.assertEqual(2, self.cache.fetch('key', self.fetch_func, 60))
+
+    def test_error_is_not_cached(self):
+        def fail():
+            """ Fails to fetch. """
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.cache.fetch('key', fail, 60)
+
+        self.assertEqual(1, self.cache.fetch('key', self.fetch_func, 60))
+
+    def test_concurrent_fetches_are_deduplicated(self):
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def slow_fetch():
+            """ Blocks till released. """
+            started.set()
+            release.wait(5)
+            return self.fetch_func()
+
+        def fetch_in_thread():
+            """ Fetches the key. """
+            results.append(self.cache.fetch('key', slow_fetch, 60))
+
+        threads = [threading.Thread(target=fetch_in_thread)]
+        threads[0].start()
+        started.wait(5)
+
+        threads.extend(threading.Thread(target=fetch_in_thread)
+                       for _ in range(3))
+        for thread in threads[1:]:
+            thread.start()
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual([1, 1, 1, 1], results)
+        self.assertEqual(1, len(self.calls))
@@ -0,0 +1,95 @@
+"""
+tests.util.test_profiler
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Tests the startup profiler.
+"""
+# pylint: disable=too-many-public-methods,protected-access
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from homeassistant import loader
+from homeassistant.util import profiler
+
+from tests.common import get_test_home_assistant
+
+
+class TestProfiler(unittest.TestCase):
+    """ Tests the startup profiler. """
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """ Stop profiling. """
+        profiler.stop()
+
+    def test_phase_without_profiler(self):
+        with profiler.phase('light', profiler.CATEGORY_SETUP):
+            pass
+
+        self.assertIsNone(profiler.stop())
+
+    def test_records_phases(self):
+        startup = profiler.start()
+
+        with profiler.phase('light', profiler.CATEGORY_SETUP):
+            pass
+
+        with self.assertRaises(ValueError):
+            with profiler.phase('switch', profiler.CATEGORY_SETUP):
+                raise ValueError()
+
+        self.assertIs(startup, profiler.stop())
+        self.assertEqual(['light', 'switch'],
+                         [phase['name'] for phase in startup.phases])
+        self.assertEqual([profiler.CATEGORY_SETUP], list(startup.totals()))
+
+        # Phases after stopping are not recorded
+        with profiler.phase('sun', profiler.CATEGORY_SETUP):
+            pass
+
+        self.assertEqual(2, len(startup.phases))
+
+    def test_totals_exclude_nested_phases(self):
+        startup = profiler.start()
+
+        with patch('homeassistant.util.profiler.time.time',
+                   side_effect=[0, 1, 3, 4]):
+            with profiler.phase('light', profiler.CATEGORY_SETUP):
+                with profiler.phase('light', profiler.CATEGORY_IMPORT):
+                    pass
+
+        self.assertEqual({profiler.CATEGORY_SETUP: 2,
+                          profiler.CATEGORY_IMPORT: 2}, startup.totals())
+
+    def test_records_imports(self):
+        hass = get_test_home_assistant()
+        loader._COMPONENT_CACHE.pop('light', None)
+        startup = profiler.start()
+
+        loader.get_component('light')
+        hass.stop()
+
+        self.assertIn(('light', profiler.CATEGORY_IMPORT),
+                      [(phase['name'], phase['cat'])
+                       for phase in startup.phases])
+
+    def test_write_chrome_trace(self):
+        startup = profiler.start()
+
+        with profiler.phase('light', profiler.CATEGORY_SETUP):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'trace.json')
+            startup.write(path)
+
+            with open(path) as inp:
+                trace = json.load(inp)
+
+        event = trace['traceEvents'][0]
+        self.assertEqual('light', event['name'])
+        self.assertEqual('X', event['ph'])
+        for key in ('ts', 'dur', 'pid', 'tid'):
+            self.assertIn(key, event)